@@ -0,0 +1,214 @@
+import os
+import heapq
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from dotenv import load_dotenv
+from .db import get_collection
+from .cache import score_resume_cached
+from .local_scorer import corpus_stats, document_features, local_scorer
+from .storage import resume_text
+from .scores import build_score_docs, record_scores, jd_hash
+from .scheduler import PRIORITY_BACKGROUND
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_WRITE_SIZE = int(os.getenv("BATCH_WRITE_SIZE", "100"))
+BATCH_CURSOR_SIZE = int(os.getenv("BATCH_CURSOR_SIZE", "500"))
+
+# Operators that would let a caller run arbitrary code inside MongoDB
+FORBIDDEN_OPERATORS = {"$where", "$function", "$accumulator", "$expr"}
+# Both rankers need the text: the local one scores it, Gemini's fallback too
+RESUME_PROJECTION = {"parsed": 1, "filename": 1, "text": 1, "text_file_id": 1}
+
+resumes_col = get_collection("resumes")
+batch_jobs_col = get_collection("batch_jobs")
+
+
+def _check_filter(value):
+    if isinstance(value, dict):
+        for key, inner in value.items():
+            if key in FORBIDDEN_OPERATORS:
+                raise ValueError(f"Operator {key} is not allowed in batch filters")
+            _check_filter(inner)
+    elif isinstance(value, list):
+        for inner in value:
+            _check_filter(inner)
+
+
+def build_resume_query(resume_ids: Optional[List[str]], filter: Optional[Dict],
+                       candidate_ids: Optional[List[str]] = None) -> Dict:
+    """Mongo query selecting the resumes of a batch; raises ValueError on bad input.
+
+    ``candidate_ids`` (e.g. from the embedding pre-filter) further restricts
+    whatever ``resume_ids``/``filter`` select.
+    """
+    query = {}
+    if filter:
+        _check_filter(filter)
+        query.update(filter)
+    if resume_ids:
+        try:
+            query["_id"] = {"$in": [ObjectId(rid) for rid in resume_ids]}
+        except (InvalidId, TypeError):
+            raise ValueError("resume_ids must be valid ObjectId strings")
+    if candidate_ids is not None:
+        restrict = {"_id": {"$in": [ObjectId(rid) for rid in candidate_ids]}}
+        query = {"$and": [query, restrict]} if query else restrict
+    return query
+
+
+async def create_batch_job(job_description: str, query: Dict, top_k: int) -> str:
+    total = await resumes_col.count_documents(query)
+    now = datetime.utcnow()
+    result = await batch_jobs_col.insert_one({
+        "status": "queued",
+        "job_description": job_description,
+        "jd_hash": jd_hash(job_description),
+        "top_k": top_k,
+        "total": total,
+        "processed": 0,
+        "failed": 0,
+        "top": [],
+        "created_at": now,
+        "updated_at": now
+    })
+    return str(result.inserted_id)
+
+
+def _rank_locally(job_description: str, docs: List[Dict], texts: List[str]) -> List[Dict]:
+    documents = [document_features(text, doc.get("parsed")) for text, doc in zip(texts, docs)]
+    return local_scorer.results(job_description, documents)
+
+
+async def run_batch_job(job_id: str, job_description: str, query: Dict, top_k: int,
+                        concurrency: Optional[int] = None, ranker: str = "gemini"):
+    """Score every resume matching ``query`` against one JD.
+
+    Resumes are streamed from a cursor and scored with bounded parallelism;
+    scores are written to the scores collection with one insert_many per
+    BATCH_WRITE_SIZE results, at which point job progress and the current
+    top-K are saved. ``ranker="local"`` scores each chunk of BATCH_WRITE_SIZE
+    resumes with one vectorized BM25 call instead of Gemini.
+    """
+    concurrency = max(1, concurrency or BATCH_MAX_CONCURRENCY)
+    job_oid = ObjectId(job_id)
+    await batch_jobs_col.update_one(
+        {"_id": job_oid},
+        {"$set": {"status": "running", "started_at": datetime.utcnow()}}
+    )
+
+    sem = asyncio.Semaphore(concurrency)
+    top = []  # min-heap of (score, resume_id, filename)
+    writes = []
+    progress = {"processed": 0, "failed": 0}
+
+    async def score_one(doc):
+        async with sem:
+            # The text is only used if Gemini fails, so the fallback matches ranker="local"
+            text = await resume_text(doc)
+            return doc, await score_resume_cached(doc.get("parsed") or {}, job_description, PRIORITY_BACKGROUND, text)
+
+    def collect(task):
+        try:
+            doc, llm_resp = task.result()
+        except Exception as e:
+            logger.warning("Batch scoring error", extra={"batch_job_id": job_id, "error": str(e)})
+            progress["failed"] += 1
+            return
+        add_result(doc, llm_resp)
+
+    def add_result(doc, llm_resp):
+        score_doc, raw_doc = build_score_docs(str(doc["_id"]), job_description, llm_resp, batch_job_id=job_id)
+        writes.append((score_doc, raw_doc))
+        progress["processed"] += 1
+        entry = (float(score_doc["score"]), str(doc["_id"]), doc.get("filename"))
+        if len(top) < top_k:
+            heapq.heappush(top, entry)
+        elif entry > top[0]:
+            heapq.heapreplace(top, entry)
+
+    async def flush():
+        if writes:
+            await record_scores(writes)
+            writes.clear()
+        ranked = sorted(top, reverse=True)
+        await batch_jobs_col.update_one(
+            {"_id": job_oid},
+            {"$set": {
+                "processed": progress["processed"],
+                "failed": progress["failed"],
+                "top": [{"resume_id": rid, "filename": fn, "score": sc} for sc, rid, fn in ranked],
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+    async def rank_chunk(chunk):
+        texts = [await resume_text(doc) for doc in chunk]
+        # Feature extraction and scoring are CPU work; keep them off the event loop
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, _rank_locally, job_description, chunk, texts
+        )
+        for doc, result in zip(chunk, results):
+            add_result(doc, result)
+        await flush()
+
+    tasks = set()
+    try:
+        if ranker == "local":
+            await corpus_stats.ensure_fresh()
+            chunk = []
+            cursor = resumes_col.find(query, RESUME_PROJECTION)
+            async for doc in cursor.batch_size(BATCH_CURSOR_SIZE):
+                chunk.append(doc)
+                if len(chunk) >= BATCH_WRITE_SIZE:
+                    await rank_chunk(chunk)
+                    chunk = []
+            await rank_chunk(chunk)
+        else:
+            cursor = resumes_col.find(query, RESUME_PROJECTION).batch_size(BATCH_CURSOR_SIZE)
+            async for doc in cursor:
+                tasks.add(asyncio.create_task(score_one(doc)))
+                # Don't pull documents off the cursor much faster than we can score them
+                if len(tasks) >= concurrency * 2:
+                    done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        collect(task)
+                    if len(writes) >= BATCH_WRITE_SIZE:
+                        await flush()
+            if tasks:
+                done, _ = await asyncio.wait(tasks)
+                for task in done:
+                    collect(task)
+            await flush()
+        await batch_jobs_col.update_one(
+            {"_id": job_oid},
+            {"$set": {"status": "done", "finished_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        logger.exception("Batch job failed", extra={"batch_job_id": job_id})
+        for task in tasks:
+            task.cancel()
+        await batch_jobs_col.update_one(
+            {"_id": job_oid},
+            {"$set": {"status": "failed", "error": str(e), "finished_at": datetime.utcnow()}}
+        )
+        # Let the job queue record the failure (and dead-letter the job)
+        raise
+
+
+async def get_batch_job(job_id: str, top_k: Optional[int] = None) -> Optional[Dict]:
+    doc = await batch_jobs_col.find_one({"_id": ObjectId(job_id)})
+    if not doc:
+        return None
+    doc["id"] = str(doc.pop("_id"))
+    doc["progress"] = round((doc["processed"] + doc["failed"]) / doc["total"], 4) if doc["total"] else 1.0
+    if top_k is not None:
+        doc["top"] = doc["top"][:top_k]
+    return doc
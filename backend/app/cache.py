@@ -0,0 +1,179 @@
+import os
+import time
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+from dotenv import load_dotenv
+from .db import get_collection
+from .gemini_client import (
+    PARSE_PROMPT_VERSION, SCORE_PROMPT_VERSION, COMBINED_PROMPT_VERSION, score_resume_with_gemini
+)
+from .scheduler import PRIORITY_INTERACTIVE
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "512"))
+PARSE_CACHE_TTL_SECONDS = int(os.getenv("PARSE_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "2048"))
+SCORE_CACHE_TTL_SECONDS = int(os.getenv("SCORE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of raw upload bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class LRUCache:
+    """Small in-process LRU with optional per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache:
+    """In-process LRU in front of a MongoDB collection.
+
+    Mongo documents look like ``{"key": ..., "value": ..., "created_at": ...}``
+    plus any extra fields passed to ``set`` (used for invalidation). Expiry in
+    Mongo is handled by a TTL index on ``created_at``.
+    """
+
+    def __init__(self, collection_name: str, max_entries: int, ttl_seconds: int):
+        self.collection_name = collection_name
+        self.collection = get_collection(collection_name)
+        self.ttl_seconds = ttl_seconds
+        self.local = LRUCache(max_entries, ttl_seconds)
+        self.stats = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "errors": 0}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("key", unique=True)
+        await self.collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+        try:
+            doc = await self.collection.find_one({"key": key}, {"_id": 0, "value": 1})
+        except Exception as e:
+            logger.warning("Cache lookup failed", extra={"cache": self.collection_name, "error": str(e)})
+            self.stats["errors"] += 1
+            doc = None
+        if doc is not None:
+            self.stats["mongo_hits"] += 1
+            self.local.set(key, doc["value"])
+            return doc["value"]
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any, **fields):
+        self.local.set(key, value)
+        try:
+            await self.collection.update_one(
+                {"key": key},
+                {"$set": {"value": value, "created_at": datetime.utcnow(), **fields}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning("Cache write failed", extra={"cache": self.collection_name, "error": str(e)})
+            self.stats["errors"] += 1
+
+    async def invalidate(self, query: dict) -> int:
+        """Delete matching Mongo entries and drop the local tier."""
+        self.local.clear()
+        result = await self.collection.delete_many(query)
+        return result.deleted_count
+
+    def snapshot(self) -> dict:
+        hits = self.stats["memory_hits"] + self.stats["mongo_hits"]
+        total = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "memory_entries": len(self.local),
+            "hit_rate": round(hits / total, 4) if total else 0.0
+        }
+
+
+parse_cache = TwoTierCache("parse_cache", PARSE_CACHE_MAX_ENTRIES, PARSE_CACHE_TTL_SECONDS)
+
+
+def parse_cache_key(pdf_hash: str, prompt_version: str = PARSE_PROMPT_VERSION) -> str:
+    """Key of a cached parse; combined parse+score results use COMBINED_PROMPT_VERSION."""
+    return f"{pdf_hash}:{prompt_version}"
+
+
+async def invalidate_stale_parse_cache() -> int:
+    """Remove parse cache entries produced by an older parse (or combined) prompt."""
+    return await parse_cache.invalidate(
+        {"prompt_version": {"$nin": [PARSE_PROMPT_VERSION, COMBINED_PROMPT_VERSION]}}
+    )
+
+
+score_cache = TwoTierCache("score_cache", SCORE_CACHE_MAX_ENTRIES, SCORE_CACHE_TTL_SECONDS)
+
+
+def normalize_job_description(job_description: str) -> str:
+    """Collapse whitespace so cosmetic JD edits map to the same cache key."""
+    return " ".join(job_description.split())
+
+
+def score_cache_key(parsed_resume: dict, job_description: str) -> str:
+    canonical_resume = json.dumps(parsed_resume, sort_keys=True, separators=(",", ":"), default=str)
+    h = hashlib.sha256()
+    for part in (canonical_resume, normalize_job_description(job_description), SCORE_PROMPT_VERSION):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+async def score_resume_cached(parsed_resume: dict, job_description: str,
+                              priority: int = PRIORITY_INTERACTIVE, text: str = "") -> dict:
+    """score_resume_with_gemini behind the score cache.
+
+    The returned dict carries ``cached: True`` when it was served from either
+    cache tier. Fallback scores (no Gemini response) are never stored.
+    """
+    key = score_cache_key(parsed_resume, job_description)
+    cached = await score_cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    result = await score_resume_with_gemini(parsed_resume, job_description, priority, text)
+    if result.get("raw_llm_response") is not None and "raw_text" not in result:
+        await score_cache.set(key, result, prompt_version=SCORE_PROMPT_VERSION)
+    return {**result, "cached": False}
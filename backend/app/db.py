@@ -1,15 +1,83 @@
 import os
+import threading
+from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+from .metrics import MongoCommandMetrics
 
 load_dotenv()
 
 MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
 MONGO_DB = os.environ.get("MONGO_DB", "resume_screener")
 
-_client = AsyncIOMotorClient(MONGODB_URI)
-db = _client[MONGO_DB]
+_client: Optional[AsyncIOMotorClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AsyncIOMotorClient:
+    """The shared Motor client, created on first use rather than at import."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AsyncIOMotorClient(MONGODB_URI, event_listeners=[MongoCommandMetrics()])
+    return _client
+
+
+def set_client(client) -> None:
+    """Use ``client`` instead of connecting to MONGODB_URI (e.g. mongomock_motor in benchmarks).
+
+    Collections already handed out switch over on their next use.
+    """
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def client_started() -> bool:
+    return _client is not None
+
+
+def get_database():
+    return get_client()[MONGO_DB]
+
+
+class LazyCollection:
+    """A collection handle that creates the client on first use.
+
+    Modules bind their collections at import time
+    (``scores_col = get_collection("scores")``); this keeps that from
+    constructing the Motor client during import.
+    """
+
+    __slots__ = ("name", "_client", "_collection")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._client = None
+        self._collection = None
+
+    def _resolve(self):
+        client = get_client()
+        if self._client is not client:
+            self._collection = client[MONGO_DB][self.name]
+            self._client = client
+        return self._collection
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self):
+        return f"LazyCollection({self.name!r})"
+
+
+def __getattr__(name):
+    # ``from app.db import db`` still works, without creating the client at import
+    if name == "db":
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # helper accessors
 def get_collection(name="resumes"):
-    return db[name]
+    return LazyCollection(name)
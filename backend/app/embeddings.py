@@ -0,0 +1,415 @@
+import os
+import re
+import json
+import zlib
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from bson import ObjectId
+from dotenv import load_dotenv
+from .db import get_collection
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "hashing")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", "data/embeddings")
+# How often the writer process embeds resumes stored by other processes
+EMBEDDING_SYNC_INTERVAL = float(os.getenv("EMBEDDING_SYNC_INTERVAL", "30"))
+# Resume ids are generated before the insert, so each sync looks back this far before the last one
+EMBEDDING_SYNC_OVERLAP = 300
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+
+def _tokens(text: str) -> List[str]:
+    return [t.rstrip(".-") for t in TOKEN_RE.findall(text.lower())]
+
+
+class HashingEmbedder:
+    """Feature-hashing bag of words + character trigrams.
+
+    Needs no model files or network and is stable across processes (crc32,
+    not Python's salted hash). Good enough to pre-filter candidates by
+    skill/title overlap before the LLM sees them.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _add(self, vec: np.ndarray, feature: str, weight: float):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % self.dim] += weight if (h >> 31) & 1 else -weight
+
+    def embed_weighted(self, parts: Iterable[Tuple[str, float]]) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for text, weight in parts:
+            tokens = _tokens(text)
+            for tok in tokens:
+                self._add(vec, "w:" + tok, weight)
+                padded = f"<{tok}>"
+                for i in range(len(padded) - 2):
+                    self._add(vec, "c:" + padded[i:i + 3], weight * 0.25)
+            for a, b in zip(tokens, tokens[1:]):
+                self._add(vec, f"b:{a} {b}", weight * 0.5)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+class SpacyEmbedder:
+    """Averaged static word vectors from a local spaCy model (e.g. en_core_web_md)."""
+
+    def __init__(self, model: str):
+        import spacy
+        self._nlp = spacy.load(model, exclude=["tagger", "parser", "ner", "lemmatizer", "attribute_ruler", "senter"])
+        self.dim = self._nlp.vocab.vectors_length
+        self.name = f"spacy-{model}"
+
+    def embed_weighted(self, parts: Iterable[Tuple[str, float]]) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for text, weight in parts:
+            if text:
+                vec += weight * self._nlp(text).vector
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+def _build_embedder():
+    if EMBEDDING_MODEL == "hashing":
+        return HashingEmbedder(EMBEDDING_DIM)
+    return SpacyEmbedder(EMBEDDING_MODEL)
+
+
+embedder = _build_embedder()
+
+
+def resume_embedding_parts(parsed: Dict) -> List[Tuple[str, float]]:
+    """Weighted text fields of a parsed resume used for its embedding."""
+    parts = [(skill, 2.0) for skill in parsed.get("skills") or [] if isinstance(skill, str)]
+    for exp in parsed.get("experience") or []:
+        if isinstance(exp, dict) and exp.get("title"):
+            parts.append((exp["title"], 1.0))
+    return parts
+
+
+def embed_resume(parsed: Dict) -> np.ndarray:
+    return embedder.embed_weighted(resume_embedding_parts(parsed))
+
+
+def embed_job_description(job_description: str) -> np.ndarray:
+    return embedder.embed_weighted([(job_description, 1.0)])
+
+
+def _lock_file(path: str):
+    """Take an exclusive lock on ``path`` without waiting; the open file, or None if another process has it."""
+    f = open(path, "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+class EmbeddingIndex:
+    """Append-only, memory-mapped matrix of unit vectors with a resume-id map.
+
+    Files in ``directory``: ``vectors.f32`` (capacity x dim float32),
+    ``ids.txt`` (one resume id per row) and ``meta.json``. The matrix doubles
+    in capacity when full. Re-adding an id overwrites its row.
+
+    There is a single writer: ``open`` takes an exclusive lock on
+    ``writer.lock`` and only the process holding it writes. Every other
+    process (further uvicorn workers, job workers) opens the files read-only,
+    reloads them when the writer commits a new ``meta.json``, and skips
+    ``add``/``add_many``; the writer picks up the resumes they store with
+    ``sync_from_mongo``. ``meta.json`` also records when that last ran.
+    """
+
+    def __init__(self, directory: str, dim: int, model_name: str, initial_capacity: int = 1024):
+        self.directory = directory
+        self.dim = dim
+        self.model_name = model_name
+        self.initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._capacity = 0
+        self._opened = False
+        self._writer_lock = None
+        self._committed: Optional[Tuple[int, int]] = None  # read-only: (count, capacity) last loaded
+        self._synced_at: Optional[datetime] = None
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def _ids_path(self):
+        return os.path.join(self.directory, "ids.txt")
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.directory, "meta.json")
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, resume_id: str) -> bool:
+        return resume_id in self._row_of
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened
+
+    @property
+    def writable(self) -> bool:
+        return self._writer_lock is not None
+
+    @property
+    def synced_at(self) -> Optional[datetime]:
+        """Start of the writer's last completed sync; None for a new index."""
+        return self._synced_at
+
+    def _read_meta(self, warn: bool = True) -> Optional[Dict]:
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        if meta.get("dim") != self.dim or meta.get("model") != self.model_name:
+            if warn:
+                logger.warning("Embedding index was built with another model; starting a new one",
+                               extra={"directory": self.directory, "model": meta.get("model")})
+            return None
+        return meta
+
+    def open(self):
+        with self._lock:
+            if self._opened:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._writer_lock = _lock_file(os.path.join(self.directory, "writer.lock"))
+            if self.writable:
+                self._open_for_writing()
+            else:
+                logger.info("Embedding index is written by another process; opened read-only",
+                            extra={"directory": self.directory})
+                self._reload()
+            self._opened = True
+
+    def close(self):
+        with self._lock:
+            if self._matrix is not None and self.writable:
+                self._matrix.flush()
+            self._matrix = None
+            self._ids, self._row_of = [], {}
+            if self._writer_lock is not None:
+                self._writer_lock.close()  # releases the lock
+                self._writer_lock = None
+            self._opened = False
+            self._committed = None
+            self._synced_at = None
+
+    def _open_for_writing(self):
+        meta = self._read_meta()
+        if meta is None:
+            self._ids, self._row_of = [], {}
+            self._synced_at = None
+            self._capacity = self.initial_capacity
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="w+",
+                                     shape=(self._capacity, self.dim))
+            open(self._ids_path, "w").close()
+            self._write_meta()
+            return
+        self._capacity = meta["capacity"]
+        self._synced_at = datetime.fromisoformat(meta["synced_at"]) if meta.get("synced_at") else None
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                 shape=(self._capacity, self.dim))
+        with open(self._ids_path) as f:
+            lines = [line.rstrip("\n") for line in f]
+        self._ids = lines[:meta["count"]]
+        if len(lines) > len(self._ids):
+            # ids appended after the last meta write were never committed
+            with open(self._ids_path, "w") as f:
+                f.write("".join(rid + "\n" for rid in self._ids))
+        self._row_of = {rid: row for row, rid in enumerate(self._ids)}
+
+    def _reload(self):
+        """Read-only processes: load what the writer last committed, if it changed.
+
+        Rows overwritten in place show through the shared mapping; only new
+        rows and a grown matrix need a reload.
+        """
+        meta = self._read_meta(warn=self._committed is None)
+        if meta is None or (meta["count"], meta["capacity"]) == self._committed:
+            return
+        with open(self._ids_path) as f:
+            ids = [line.rstrip("\n") for line in f][:meta["count"]]
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r",
+                                 shape=(meta["capacity"], self.dim))
+        self._capacity = meta["capacity"]
+        self._ids, self._row_of = ids, {rid: row for row, rid in enumerate(ids)}
+        self._committed = (meta["count"], meta["capacity"])
+
+    def _write_meta(self):
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"dim": self.dim, "model": self.model_name,
+                       "capacity": self._capacity, "count": len(self._ids),
+                       "synced_at": self._synced_at.isoformat() if self._synced_at else None}, f)
+        os.replace(tmp, self._meta_path)
+
+    def _grow(self, needed: int):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._matrix.flush()
+        tmp = self._vectors_path + ".tmp"
+        grown = np.memmap(tmp, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+        grown.flush()
+        del grown
+        self._matrix = None
+        os.replace(tmp, self._vectors_path)
+        self._capacity = capacity
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                 shape=(self._capacity, self.dim))
+
+    def add_many(self, resume_ids: List[str], vectors: np.ndarray):
+        """Insert or overwrite rows for ``resume_ids`` (vectors must be unit length).
+
+        A no-op outside the writer process.
+        """
+        if not self.writable:
+            if not self._opened:
+                logger.warning("Embedding index is not open; vectors skipped", extra={"count": len(resume_ids)})
+            else:
+                logger.debug("Embedding index is read-only here; the writer embeds these on its next sync",
+                             extra={"count": len(resume_ids)})
+            return
+        with self._lock:
+            new_ids = []
+            for rid, vec in zip(resume_ids, vectors):
+                row = self._row_of.get(rid)
+                if row is not None:
+                    self._matrix[row] = vec
+                    continue
+                if len(self._ids) >= self._capacity:
+                    self._grow(len(self._ids) + 1)
+                row = len(self._ids)
+                self._matrix[row] = vec
+                self._ids.append(rid)
+                self._row_of[rid] = row
+                new_ids.append(rid)
+            self._matrix.flush()
+            if new_ids:
+                with open(self._ids_path, "a") as f:
+                    f.write("".join(rid + "\n" for rid in new_ids))
+            self._write_meta()
+
+    def add(self, resume_id: str, vector: np.ndarray):
+        self.add_many([resume_id], vector[np.newaxis, :])
+
+    def add_resumes(self, resume_ids: List[str], parsed: List[Dict]):
+        """Embed parsed resumes and add them. Blocking; async callers run it in a thread."""
+        self.add_many(resume_ids, np.stack([embed_resume(p) for p in parsed]))
+
+    def mark_synced(self, started: datetime):
+        """Record a completed ``sync_from_mongo`` pass that started at ``started``."""
+        with self._lock:
+            if not self.writable:
+                return
+            self._synced_at = started
+            self._write_meta()
+
+    def search(self, query: np.ndarray, k: int = 50) -> List[Tuple[str, float]]:
+        """Top-k (resume_id, cosine similarity), best first."""
+        with self._lock:
+            if self._opened and not self.writable:
+                self._reload()
+            ids, matrix = self._ids, self._matrix
+        count = len(ids)
+        if count == 0 or k <= 0:
+            return []
+        sims = matrix[:count] @ query.astype(np.float32)
+        k = min(k, count)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(ids[i], float(sims[i])) for i in top]
+
+
+embedding_index = EmbeddingIndex(EMBEDDING_INDEX_DIR, embedder.dim, embedder.name)
+
+
+async def _embed_stored(index: EmbeddingIndex, query: Dict, skip_known: bool, batch_size: int) -> int:
+    resumes_col = get_collection("resumes")
+    ids, parsed, total = [], [], 0
+    async for doc in resumes_col.find(query, {"parsed": 1}).batch_size(batch_size):
+        rid = str(doc["_id"])
+        if skip_known and rid in index:
+            continue
+        ids.append(rid)
+        parsed.append(doc.get("parsed") or {})
+        if len(ids) >= batch_size:
+            await asyncio.to_thread(index.add_resumes, ids, parsed)
+            total += len(ids)
+            ids, parsed = [], []
+    if ids:
+        await asyncio.to_thread(index.add_resumes, ids, parsed)
+        total += len(ids)
+    return total
+
+
+async def rebuild_from_mongo(batch_size: int = 1000) -> int:
+    """(Re)embed every stored resume; used to backfill the index."""
+    embedding_index.open()
+    if not embedding_index.writable:
+        raise RuntimeError(f"{EMBEDDING_INDEX_DIR} is locked by a running process (the API); stop it first")
+    return await _embed_stored(embedding_index, {}, False, batch_size)
+
+
+async def sync_from_mongo(index: Optional[EmbeddingIndex] = None, since: Optional[datetime] = None,
+                          batch_size: int = 1000) -> int:
+    """Embed the resumes stored since ``since`` (all when None) that ``index`` does not have yet."""
+    index = index or embedding_index
+    query = {}
+    if since is not None:
+        query["_id"] = {"$gte": ObjectId.from_datetime(since - timedelta(seconds=EMBEDDING_SYNC_OVERLAP))}
+    return await _embed_stored(index, query, True, batch_size)
+
+
+async def sync_loop(interval: float = EMBEDDING_SYNC_INTERVAL):
+    """Run in the writer process: embed resumes that other processes stored.
+
+    Those are uploads handled by read-only API workers, standalone job
+    workers and ``python -m app.ingest``. Each pass starts from the last
+    completed one (``synced_at`` in ``meta.json``), so the first pass on a
+    new index embeds every stored resume.
+    """
+    while True:
+        started = datetime.utcnow()
+        try:
+            added = await sync_from_mongo(embedding_index, embedding_index.synced_at)
+            if added:
+                logger.info("Embedded resumes stored by other processes", extra={"added": added})
+            await asyncio.to_thread(embedding_index.mark_synced, started)
+        except Exception as e:
+            logger.warning("Embedding index sync failed", extra={"error": str(e)})
+        await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    print(f"Embedded {asyncio.run(rebuild_from_mongo())} resumes into {EMBEDDING_INDEX_DIR}")
@@ -1,16 +1,40 @@
 import os
+import re
 import json
+import hashlib
+import logging
 import httpx
+from typing import Optional, Tuple
 from dotenv import load_dotenv
+from .scheduler import gemini_scheduler, estimate_tokens, PRIORITY_INTERACTIVE
+from .singleflight import SingleFlight
+from .metrics import GEMINI_CALL_SECONDS, timed
+from .local_scorer import local_score
+from .llm_decode import LLMDecodeError, response_text, decode_parsed_resume, decode_score, decode_combined
+from .prompt_compaction import (
+    COMPACTION_VERSION, compact_json, compact_resume_text, compact_job_description, prompt_stats
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_ENDPOINT = os.getenv(
     "GEMINI_API_ENDPOINT",
     "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
 )
 
+# Connection pool / timeout settings for the shared Gemini HTTP client
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "100"))
+GEMINI_MAX_KEEPALIVE = int(os.getenv("GEMINI_MAX_KEEPALIVE", "20"))
+GEMINI_KEEPALIVE_EXPIRY = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "60"))
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "60"))
+GEMINI_POOL_TIMEOUT = float(os.getenv("GEMINI_POOL_TIMEOUT", "10"))
+GEMINI_HTTP2 = os.getenv("GEMINI_HTTP2", "auto").lower()
+GEMINI_COALESCE = os.getenv("GEMINI_COALESCE", "1") not in ("0", "false", "no")
+
 # New prompt for resume parsing
 PARSE_PROMPT_TEMPLATE = """
 You are an expert resume parser. Extract the following information from the resume text in STRUCTURED JSON format:
@@ -48,6 +72,14 @@ Resume Text:
 {resume_text}
 """
 
+# Bump (or let the hash change) whenever the parse prompt or the input
+# compaction changes so cached parses produced by an older prompt are no
+# longer served.
+PARSE_PROMPT_VERSION = os.getenv(
+    "PARSE_PROMPT_VERSION",
+    hashlib.sha256((PARSE_PROMPT_TEMPLATE + COMPACTION_VERSION).encode("utf-8")).hexdigest()[:12]
+)
+
 # Existing scoring prompt (keep this)
 SCORE_PROMPT_TEMPLATE = """
 You are an expert AI recruiter. Compare the candidate's resume and the given job description.
@@ -71,13 +103,142 @@ Job Description:
 {job_description}
 """
 
-async def parse_resume_with_gemini(text: str) -> dict:
-    """Parse resume text using Gemini AI"""
-    if not GEMINI_API_KEY:
-        raise Exception("Gemini API key not configured for parsing")
-    
-    prompt = PARSE_PROMPT_TEMPLATE.format(resume_text=text)
-    
+SCORE_PROMPT_VERSION = os.getenv(
+    "SCORE_PROMPT_VERSION",
+    hashlib.sha256((SCORE_PROMPT_TEMPLATE + COMPACTION_VERSION).encode("utf-8")).hexdigest()[:12]
+)
+
+# One round trip instead of two: structure the resume and score it against the JD
+COMBINED_PROMPT_TEMPLATE = """
+You are an expert resume screener. Read the resume text, structure it, and evaluate it against the job description.
+Evaluate based on **skills, education, experience, and project relevance**.
+
+Return a **strict JSON** object with exactly two keys:
+{
+  "parsed": {
+    "name": "full name",
+    "email": "email address",
+    "phone": "phone number",
+    "skills": ["list of technical skills", "programming languages", "tools"],
+    "education": [{"degree": "degree name", "institution": "institution name", "year": "graduation year"}],
+    "experience": [{"title": "job title", "company": "company name", "from_date": "start date", "to_date": "end date"}],
+    "total_experience_years": "total years of experience"
+  },
+  "score": {
+    "score": number (0-100),
+    "justification": ["short bullet points"],
+    "matched_skills": ["skills or keywords found in both"],
+    "missing_skills": ["skills missing from resume but present in job description"],
+    "evidence": ["phrases from resume supporting the match"]
+  }
+}
+
+Rules:
+- Extract ALL technical skills mentioned, don't limit to common ones
+- For experience dates, use the format you find (MM/YYYY, Month YYYY, etc.)
+- Calculate total_experience_years by summing all experience periods
+- Base the score mainly on **semantic similarity**, not word count
+- Return only valid JSON, no other text
+
+Resume Text:
+{resume_text}
+
+Job Description:
+{job_description}
+"""
+
+COMBINED_PROMPT_VERSION = os.getenv(
+    "COMBINED_PROMPT_VERSION",
+    hashlib.sha256((COMBINED_PROMPT_TEMPLATE + COMPACTION_VERSION).encode("utf-8")).hexdigest()[:12]
+)
+
+# Upload default for the combined prompt (the upload form can override it)
+GEMINI_COMBINED_MODE = os.getenv("GEMINI_COMBINED_MODE", "0") in ("1", "true", "yes")
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Identical prompts in flight at the same time share one Gemini request
+gemini_singleflight = SingleFlight()
+
+def _http2_enabled() -> bool:
+    if GEMINI_HTTP2 in ("0", "false", "no", "off"):
+        return False
+    try:
+        import h2  # noqa: F401  (httpx needs it for HTTP/2)
+        return True
+    except ImportError:
+        if GEMINI_HTTP2 not in ("auto", ""):
+            logger.warning("GEMINI_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+
+def _build_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=GEMINI_MAX_CONNECTIONS,
+        max_keepalive_connections=GEMINI_MAX_KEEPALIVE,
+        keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(
+        GEMINI_READ_TIMEOUT,
+        connect=GEMINI_CONNECT_TIMEOUT,
+        pool=GEMINI_POOL_TIMEOUT
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=_http2_enabled(),
+        headers={"Content-Type": "application/json"}
+    )
+
+async def start_http_client():
+    """Create the shared Gemini client (called on app startup)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+
+async def close_http_client():
+    """Close the shared Gemini client (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def http_client_started() -> bool:
+    return _http_client is not None and not _http_client.is_closed
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client; created lazily when used outside the FastAPI app (scripts, benchmarks)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
+
+def _build_prompt(kind: str, template: str, raw_tokens: int, truncated: bool = False, **values) -> str:
+    """Fill ``{name}`` placeholders and record token estimates.
+
+    One substitution pass over the template (str.format would trip on the
+    JSON braces): inserted text is never scanned again, so a resume that
+    contains "{job_description}" stays as written.
+    """
+    placeholder = re.compile("{(" + "|".join(map(re.escape, values)) + ")}")
+    prompt = placeholder.sub(lambda m: values[m.group(1)], template) if values else template
+    sent_tokens = estimate_tokens(prompt)
+    prompt_stats.record(kind, estimate_tokens(template) + raw_tokens, sent_tokens, truncated)
+    return prompt
+
+def _redact(message: str) -> str:
+    # httpx errors quote the request URL, which carries the API key
+    return message.replace(GEMINI_API_KEY, "***") if GEMINI_API_KEY else message
+
+def _resume_text_for_prompt(text: str):
+    compacted, info = compact_resume_text(text)
+    return compacted, bool(info["truncated_sections"])
+
+async def _generate_content(prompt: str, priority: int = PRIORITY_INTERACTIVE) -> dict:
+    """POST a single-turn prompt to Gemini (through the scheduler) and return the decoded body.
+
+    Concurrent calls with the same prompt are coalesced into one request;
+    it runs at the priority of whichever caller arrived first.
+    """
     payload = {
         "contents": [
             {
@@ -87,114 +248,117 @@ async def parse_resume_with_gemini(text: str) -> dict:
         ]
     }
 
-    headers = {"Content-Type": "application/json"}
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # FIX: Use params instead of appending to URL to avoid duplicate ?key=
-            resp = await client.post(
-                GEMINI_ENDPOINT,
-                headers=headers,
-                json=payload,
-                params={"key": GEMINI_API_KEY}  # This is the fix
-            )
-            resp.raise_for_status()
-            data = resp.json()
-
-        text_output = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-        
-        # Clean the response - remove markdown code blocks if present
-        text_output = text_output.replace("```json", "").replace("```", "").strip()
-        
+    async def _post():
+        # Use params instead of appending to URL to avoid duplicate ?key=
+        resp = await get_http_client().post(
+            GEMINI_ENDPOINT,
+            json=payload,
+            params={"key": GEMINI_API_KEY}
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _scheduled():
+        return await gemini_scheduler.run(_post, priority=priority, tokens=estimate_tokens(prompt))
+
+    if not GEMINI_COALESCE:
+        return await _scheduled()
+    key = hashlib.sha256(f"{GEMINI_ENDPOINT}\x00{prompt}".encode("utf-8")).hexdigest()
+    return await gemini_singleflight.do(key, _scheduled)
+
+async def parse_resume_with_gemini(text: str, priority: int = PRIORITY_INTERACTIVE) -> dict:
+    """Parse resume text using Gemini AI"""
+    if not GEMINI_API_KEY:
+        raise Exception("Gemini API key not configured for parsing")
+    
+    resume_text, truncated = _resume_text_for_prompt(text)
+    prompt = _build_prompt("parse", PARSE_PROMPT_TEMPLATE, estimate_tokens(text), truncated,
+                           resume_text=resume_text)
+
+    with timed(GEMINI_CALL_SECONDS, kind="parse") as call:
+        data = await _generate_content(prompt, priority)
         try:
-            parsed = json.loads(text_output)
-            # Validate required fields
-            parsed.setdefault("skills", [])
-            parsed.setdefault("education", [])
-            parsed.setdefault("experience", [])
-            return parsed
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse Gemini response as JSON: {text_output}")
+            # Validated and coerced into ParsedResume
+            return decode_parsed_resume(data)
+        except LLMDecodeError as e:
+            call["outcome"] = "invalid_json"
+            # Length only: the answer holds the candidate's personal data
+            logger.warning("Gemini parse answer is not valid JSON",
+                           extra={"chars": len(response_text(data)), "error": str(e)})
             raise Exception(f"Gemini returned invalid JSON: {str(e)}")
 
-    except Exception as e:
-        print(f"Gemini parsing error: {e}")
-        raise
+async def parse_and_score_with_gemini(text: str, job_description: str,
+                                      priority: int = PRIORITY_INTERACTIVE) -> Tuple[dict, dict]:
+    """Parse and score a resume with one Gemini call; returns (parsed, score).
 
-async def score_resume_with_gemini(parsed_resume: dict, job_description: str) -> dict:
-    """Sends parsed resume + job description to Gemini API and returns a structured score."""
+    Raises when Gemini is not configured or the answer is not the expected
+    JSON, so callers can fall back to the two-call path.
+    """
     if not GEMINI_API_KEY:
-        # Fallback logic (keep existing)
-        skills = set([s.lower() for s in parsed_resume.get("skills", [])])
-        jd = job_description.lower().split()
-        matched = [s for s in skills if s in jd]
-        score = int(len(matched) / (len(skills) or 1) * 100)
-        return {
-            "score": score,
-            "justification": ["Fallback score computed from keyword overlap (Gemini not configured)."],
-            "matched_skills": matched,
-            "missing_skills": list(skills - set(matched)),
-            "evidence": [],
-            "raw_llm_response": None
-        }
-
-    prompt = SCORE_PROMPT_TEMPLATE.format(
-        parsed_resume_json=json.dumps(parsed_resume, indent=2),
-        job_description=job_description
+        raise Exception("Gemini API key not configured for parsing")
+
+    resume_text, resume_truncated = _resume_text_for_prompt(text)
+    jd_text, jd_truncated = compact_job_description(job_description)
+    prompt = _build_prompt(
+        "combined", COMBINED_PROMPT_TEMPLATE,
+        estimate_tokens(text) + estimate_tokens(job_description), resume_truncated or jd_truncated,
+        resume_text=resume_text, job_description=jd_text
     )
+    with timed(GEMINI_CALL_SECONDS, kind="combined") as call:
+        data = await _generate_content(prompt, priority)
+        try:
+            parsed, score = decode_combined(data)
+        except LLMDecodeError as e:
+            call["outcome"] = "invalid_json"
+            logger.warning("Combined Gemini answer is not valid JSON",
+                           extra={"chars": len(response_text(data)), "error": str(e)})
+            raise Exception(f"Gemini returned invalid combined JSON: {str(e)}")
+    score["raw_llm_response"] = data
+    return parsed, score
 
-    payload = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [{"text": prompt}]
-            }
-        ]
-    }
+async def score_resume_with_gemini(parsed_resume: dict, job_description: str,
+                                   priority: int = PRIORITY_INTERACTIVE, text: str = "") -> dict:
+    """Sends parsed resume + job description to Gemini API and returns a structured score.
 
-    headers = {"Content-Type": "application/json"}
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # FIX: Use params instead of appending to URL
-            resp = await client.post(
-                GEMINI_ENDPOINT,
-                headers=headers,
-                json=payload,
-                params={"key": GEMINI_API_KEY}  # This is the fix
-            )
-            resp.raise_for_status()
-            data = resp.json()
-
-        text_output = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+    ``text`` (the resume's extracted text) is only used by the local BM25
+    fallback, which scores text and parsed fields like every other local score.
+    """
+    if not GEMINI_API_KEY:
+        result = local_score(job_description, parsed=parsed_resume, text=text)
+        result["justification"].insert(0, "Gemini not configured; scored with the local BM25 scorer.")
+        return result
+
+    # Raw size: what the prompt used to carry (pretty-printed JSON, JD as is)
+    raw_tokens = estimate_tokens(json.dumps(parsed_resume, indent=2, default=str)) + estimate_tokens(job_description)
+    jd_text, jd_truncated = compact_job_description(job_description)
+    prompt = _build_prompt(
+        "score", SCORE_PROMPT_TEMPLATE, raw_tokens, jd_truncated,
+        parsed_resume_json=compact_json(parsed_resume),
+        job_description=jd_text
+    )
+
+    with timed(GEMINI_CALL_SECONDS, kind="score") as call:
         try:
-            parsed = json.loads(text_output)
-        except Exception:
-            parsed = {
-                "score": 0,
-                "justification": ["Invalid Gemini response format. Raw text received instead of JSON."],
-                "matched_skills": [],
-                "missing_skills": [],
-                "evidence": [],
-                "raw_text": text_output
-            }
+            data = await _generate_content(prompt, priority)
+            try:
+                parsed = decode_score(data)
+            except LLMDecodeError:
+                call["outcome"] = "invalid_json"
+                parsed = {
+                    "score": 0,
+                    "justification": ["Invalid Gemini response format. Raw text received instead of JSON."],
+                    "matched_skills": [],
+                    "missing_skills": [],
+                    "evidence": [],
+                    "raw_text": response_text(data)
+                }
+
+            parsed["raw_llm_response"] = data
+            return parsed
 
-        for key in ["score", "justification", "matched_skills", "missing_skills", "evidence"]:
-            parsed.setdefault(key, [] if key != "score" else 0)
-
-        parsed["raw_llm_response"] = data
-        return parsed
-
-    except Exception as e:
-        jd_words = job_description.lower().split()
-        resume_text = json.dumps(parsed_resume).lower()
-        matched = [w for w in jd_words if w in resume_text]
-        missing = [w for w in jd_words if w not in resume_text]
-        score = round(len(matched) / (len(jd_words) or 1) * 100, 2)
-
-        return {
-            "score": score,
-            "justification": [f"Gemini request failed ({str(e)}). Used fallback keyword match scoring."],
-            "matched_skills": matched,
-            "missing_skills": missing,
-            "evidence": [],
-            "raw_llm_response": None
-        }
\ No newline at end of file
+        except Exception as e:
+            call["outcome"] = "error"
+            logger.warning("Gemini scoring failed; using the local scorer", extra={"error": _redact(str(e))})
+            result = local_score(job_description, parsed=parsed_resume, text=text)
+            result["justification"].insert(0, f"Gemini request failed ({_redact(str(e))}). Used the local BM25 scorer.")
+            return result
\ No newline at end of file
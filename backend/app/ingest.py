@@ -0,0 +1,421 @@
+"""Bulk ingestion of a directory or ZIP archive of PDF resumes.
+
+    python -m app.ingest resumes.zip [--checkpoint FILE] [--gemini] [--batch-size 200]
+
+ZIP members are read one at a time, never extracted to disk, and hashed
+while they are read; reads, hashing and checkpoint writes run in a thread so
+an API process keeps serving requests. A batch is flushed at
+INGEST_BATCH_SIZE files or INGEST_BATCH_BYTES of PDF data, whichever comes
+first. Files whose SHA-256 is already on a stored resume are skipped. Extraction and the
+rule-based parse run in the worker pool; with ``--gemini`` the pool only
+extracts and Gemini parses at background priority. Resumes are written
+with one ``insert_many(ordered=False)`` per batch, after which the batch's
+file names are appended to the checkpoint, so a rerun with the same
+checkpoint continues where the last one stopped. A crash between the insert
+and the checkpoint write is harmless: the rerun finds those files by hash.
+
+The embedding index has a single writer (the process holding its lock,
+normally the API). Ingestion in that process embeds the new resumes
+directly; elsewhere the writer embeds them on its next sync.
+"""
+import os
+import time
+import zipfile
+import hashlib
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from functools import partial
+from typing import Awaitable, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+import orjson
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+from .db import get_collection
+from .embeddings import embedding_index, embed_resume
+from .local_scorer import corpus_stats, document_features
+from .metrics import STAGE_SECONDS, timed
+from .parser import parse_resume_text_with_source
+from .pdf_utils import MAX_PDF_BYTES, PDFExtractionError
+from .pipeline import resume_document
+from .scheduler import PRIORITY_BACKGROUND
+from .storage import delete_file, get_bucket, gridfs_enabled, store_text
+from .workers import WORKER_PROCESSES, extract_and_parse, worker_pool
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+# PDF bytes held in memory per batch
+INGEST_BATCH_BYTES = int(os.getenv("INGEST_BATCH_BYTES", str(256 * 1024 ** 2)))
+READ_CHUNK_BYTES = 1024 ** 2
+# PDFs extracted/parsed at once; keeps every worker process busy
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", str(max(2, WORKER_PROCESSES * 2))))
+# Spooled /ingest/zip uploads and their checkpoints; job workers must see the same directory
+INGEST_DIR = os.getenv("INGEST_DIR", "data/ingest")
+INGEST_MAX_ZIP_BYTES = int(os.getenv("INGEST_MAX_ZIP_BYTES", str(2 * 1024 ** 3)))
+MAX_FAILURES_REPORTED = 100
+
+resumes_col = get_collection("resumes")
+ingest_jobs_col = get_collection("ingest_jobs")
+
+# Called with the running totals after every batch
+ProgressCallback = Callable[[Dict], Awaitable[None]]
+
+
+class IngestItem(NamedTuple):
+    name: str
+    size: int
+    open: Callable[[], BinaryIO]
+
+
+async def ensure_indexes():
+    await resumes_col.create_index("sha256")
+
+
+def _is_pdf(name: str) -> bool:
+    base = os.path.basename(name)
+    return name.lower().endswith(".pdf") and not base.startswith("._") and "__MACOSX/" not in name
+
+
+def iter_directory(path: str) -> Iterator[IngestItem]:
+    """PDFs under ``path`` in a stable order, named by their relative path."""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            full = os.path.join(root, filename)
+            name = os.path.relpath(full, path)
+            if _is_pdf(name):
+                yield IngestItem(name, os.path.getsize(full), partial(open, full, "rb"))
+
+
+def iter_zip(path: str) -> Iterator[IngestItem]:
+    """PDF members of a ZIP archive, each opened only when needed (and only while iterating)."""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and _is_pdf(info.filename):
+                yield IngestItem(info.filename, info.file_size, partial(archive.open, info))
+
+
+def iter_source(path: str) -> Iterator[IngestItem]:
+    return iter_directory(path) if os.path.isdir(path) else iter_zip(path)
+
+
+class Checkpoint:
+    """Append-only JSON lines of handled files: {"name", "status", "sha256"}.
+
+    ``status`` is inserted, duplicate or failed; none of them is retried.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        self.counts = Counter()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        entry = orjson.loads(line)
+                        self.done.add(entry["name"])
+                        self.counts[entry["status"]] += 1
+
+    def append(self, entries: List[Dict]):
+        with open(self.path, "ab") as f:
+            f.write(b"".join(orjson.dumps(entry) + b"\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in entries:
+            self.done.add(entry["name"])
+            self.counts[entry["status"]] += 1
+
+
+class _Loaded(NamedTuple):
+    name: str
+    data: Optional[bytes]  # None when unreadable or too large
+    sha256: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _load(item: IngestItem) -> _Loaded:
+    """Read and hash ``item`` while its source is still open (a ZIP closes when iteration ends)."""
+    too_large = _Loaded(item.name, None, error=f"PDF larger than {MAX_PDF_BYTES} bytes.")
+    if item.size > MAX_PDF_BYTES:
+        return too_large
+    h, chunks, size = hashlib.sha256(), [], 0
+    try:
+        with item.open() as f:
+            while True:
+                chunk = f.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_PDF_BYTES:  # the ZIP header's size was wrong
+                    return too_large
+                h.update(chunk)
+                chunks.append(chunk)
+    except (zipfile.BadZipFile, OSError) as e:
+        return _Loaded(item.name, None, error=str(e))
+    return _Loaded(item.name, b"".join(chunks), h.hexdigest())
+
+
+def _next_loaded(items: Iterator[IngestItem], done: set) -> Tuple[int, Optional[_Loaded]]:
+    """Skip the items in ``done`` and load the next one; (skipped, loaded or None at the end)."""
+    skipped = 0
+    for item in items:
+        if item.name in done:
+            skipped += 1
+            continue
+        return skipped, _load(item)
+    return skipped, None
+
+
+class _Pending(NamedTuple):
+    name: str
+    data: bytes
+    sha256: str
+
+
+async def _prepare(p: _Pending, use_gemini: bool, sem: asyncio.Semaphore) -> Tuple[str, Dict]:
+    async with sem:
+        text, parsed = await extract_and_parse(p.data, parse=not use_gemini)
+    if use_gemini:
+        parsed, _ = await parse_resume_text_with_source(text, PRIORITY_BACKGROUND)
+    return text, parsed
+
+
+def _entry(name: str, status: str, sha256: Optional[str]) -> Dict:
+    return {"name": name, "status": status, "sha256": sha256}
+
+
+def _failed(name: str, sha256: Optional[str], error: str, failures: List[Dict]) -> Dict:
+    if len(failures) < MAX_FAILURES_REPORTED:
+        failures.append({"name": name, "error": error})
+    return _entry(name, "failed", sha256)
+
+
+def _features_and_vectors(resumes: List[Tuple[str, Dict]]) -> Tuple[List, List[np.ndarray]]:
+    return ([document_features(text, parsed) for text, parsed in resumes],
+            [embed_resume(parsed) for _, parsed in resumes])
+
+
+async def _ingest_batch(batch: List[_Loaded], run_id: str, use_gemini: bool, sem: asyncio.Semaphore,
+                        seen: set, failures: List[Dict]) -> List[Dict]:
+    """Ingest one batch; returns its checkpoint entries."""
+    entries, pending = [], []
+    for item in batch:
+        if item.data is None:
+            entries.append(_failed(item.name, None, item.error, failures))
+            continue
+        sha256 = item.sha256
+        if sha256 in seen:
+            entries.append(_entry(item.name, "duplicate", sha256))
+            continue
+        seen.add(sha256)
+        pending.append(_Pending(item.name, item.data, sha256))
+
+    # One round trip for the whole batch instead of a lookup per file
+    existing = set()
+    if pending:
+        async for doc in resumes_col.find({"sha256": {"$in": [p.sha256 for p in pending]}}, {"sha256": 1}):
+            existing.add(doc["sha256"])
+    new = []
+    for p in pending:
+        if p.sha256 in existing:
+            entries.append(_entry(p.name, "duplicate", p.sha256))
+        else:
+            new.append(p)
+
+    results = await asyncio.gather(*(_prepare(p, use_gemini, sem) for p in new), return_exceptions=True)
+    prepared, docs = [], []
+    for p, result in zip(new, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, PDFExtractionError):
+                logger.warning("Ingest item failed", extra={"run_id": run_id, "file": p.name, "error": str(result)})
+            entries.append(_failed(p.name, p.sha256, str(result) or type(result).__name__, failures))
+            continue
+        text, parsed = result
+        filename = os.path.basename(p.name)
+        pdf_file_id = None
+        if gridfs_enabled():
+            pdf_file_id = await get_bucket("resume_pdfs").upload_from_stream(
+                filename, p.data, metadata={"content_type": "application/pdf"}
+            )
+        doc = resume_document(filename, p.sha256, len(p.data), parsed, text, pdf_file_id)
+        doc["_id"] = ObjectId()
+        doc["ingest"] = {"run_id": run_id, "path": p.name}
+        if gridfs_enabled():
+            doc["text_file_id"] = await store_text(text, filename)
+        prepared.append((p, text, parsed))
+        docs.append(doc)
+
+    failed_rows = {}
+    if docs:
+        with timed(STAGE_SECONDS, stage="ingest_insert"):
+            try:
+                await resumes_col.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                # ordered=False: every other document was still written
+                failed_rows = {err["index"]: err.get("errmsg", "write error") for err in e.details.get("writeErrors", [])}
+        # No stored resume refers to the GridFS files of a rejected row
+        for row in failed_rows:
+            await delete_file("resume_pdfs", docs[row].get("pdf_file_id"))
+            await delete_file("resume_texts", docs[row].get("text_file_id"))
+    inserted, ids = [], []
+    for row, (doc, (p, text, parsed)) in enumerate(zip(docs, prepared)):
+        if row in failed_rows:
+            entries.append(_failed(p.name, p.sha256, failed_rows[row], failures))
+            continue
+        entries.append(_entry(p.name, "inserted", p.sha256))
+        inserted.append((text, parsed))
+        ids.append(str(doc["_id"]))
+    features, vectors = await asyncio.to_thread(_features_and_vectors, inserted)
+    # The index has a single writer; other processes leave these to its sync
+    if ids and embedding_index.writable:
+        await asyncio.to_thread(embedding_index.add_many, ids, np.stack(vectors))
+    await corpus_stats.record(features)
+    return entries
+
+
+async def ingest(items: Iterable[IngestItem], checkpoint_path: Optional[str] = None, use_gemini: bool = False,
+                 batch_size: int = INGEST_BATCH_SIZE, concurrency: int = INGEST_CONCURRENCY,
+                 progress: Optional[ProgressCallback] = None) -> Dict:
+    """Ingest ``items`` in batches; returns the totals and resumes/sec of this run."""
+    run_id = str(ObjectId())
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+    sem = asyncio.Semaphore(max(1, min(concurrency, worker_pool.queue_size)))
+    counts, seen, failures = Counter(), set(), []
+    start = time.perf_counter()
+
+    def totals() -> Dict:
+        elapsed = time.perf_counter() - start
+        handled = counts["inserted"] + counts["duplicate"] + counts["failed"]
+        return {
+            "run_id": run_id,
+            "handled": handled,
+            "inserted": counts["inserted"],
+            "duplicates": counts["duplicate"],
+            "failed": counts["failed"],
+            "skipped_from_checkpoint": counts["skipped"],
+            "seconds": round(elapsed, 2),
+            "resumes_per_sec": round(handled / elapsed, 2) if elapsed else 0.0,
+            "failures": failures[:MAX_FAILURES_REPORTED],
+        }
+
+    async def flush(batch):
+        entries = await _ingest_batch(batch, run_id, use_gemini, sem, seen, failures)
+        counts.update(entry["status"] for entry in entries)
+        if checkpoint is not None:
+            await asyncio.to_thread(checkpoint.append, entries)
+        report = totals()
+        logger.info("Ingest progress", extra={k: v for k, v in report.items() if k != "failures"})
+        if progress is not None:
+            await progress(report)
+
+    iterator, done = iter(items), checkpoint.done if checkpoint is not None else set()
+    batch, batch_bytes = [], 0
+    while True:
+        skipped, loaded = await asyncio.to_thread(_next_loaded, iterator, done)
+        counts["skipped"] += skipped
+        if loaded is None:
+            break
+        batch.append(loaded)
+        batch_bytes += len(loaded.data or b"")
+        if len(batch) >= batch_size or batch_bytes >= INGEST_BATCH_BYTES:
+            await flush(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        await flush(batch)
+    return totals()
+
+
+async def create_ingest_job(filename: str, path: str) -> str:
+    now = datetime.utcnow()
+    result = await ingest_jobs_col.insert_one({
+        "status": "queued",
+        "filename": filename,
+        "path": path,
+        "created_at": now,
+        "updated_at": now
+    })
+    return str(result.inserted_id)
+
+
+async def run_ingest_job(ingest_id: str, path: str, use_gemini: bool = False) -> Dict:
+    """Ingest a spooled ZIP for /ingest/zip, tracking progress on its ingest_jobs document.
+
+    The checkpoint sits next to the archive, so a retried job skips what an
+    earlier attempt already handled. Both files are removed once it succeeds.
+    """
+    job_oid = ObjectId(ingest_id)
+    checkpoint_path = path + ".checkpoint.jsonl"
+    await ingest_jobs_col.update_one({"_id": job_oid}, {"$set": {"status": "running", "updated_at": datetime.utcnow()}})
+
+    async def progress(report):
+        await ingest_jobs_col.update_one({"_id": job_oid}, {"$set": {**report, "updated_at": datetime.utcnow()}})
+
+    try:
+        report = await ingest(iter_zip(path), checkpoint_path, use_gemini, progress=progress)
+    except Exception as e:
+        await ingest_jobs_col.update_one(
+            {"_id": job_oid}, {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+        raise
+    await ingest_jobs_col.update_one(
+        {"_id": job_oid}, {"$set": {**report, "status": "done", "finished_at": datetime.utcnow()}}
+    )
+    for leftover in (path, checkpoint_path):
+        try:
+            os.unlink(leftover)
+        except FileNotFoundError:
+            pass
+    return report
+
+
+async def get_ingest_job(ingest_id: str) -> Optional[Dict]:
+    doc = await ingest_jobs_col.find_one({"_id": ObjectId(ingest_id)}, {"path": 0})
+    if not doc:
+        return None
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+if __name__ == "__main__":
+    import argparse
+    from .gemini_client import start_http_client, close_http_client
+    from .logs import configure_logging
+    from .skill_index import load_learned_aliases
+
+    ap = argparse.ArgumentParser(description="Ingest a directory or ZIP archive of PDF resumes.")
+    ap.add_argument("path")
+    ap.add_argument("--checkpoint", help="default: <path>.ingest-checkpoint.jsonl")
+    ap.add_argument("--gemini", action="store_true", help="parse with Gemini (background priority) instead of the rule-based parser")
+    ap.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    ap.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    args = ap.parse_args()
+
+    async def _main():
+        await ensure_indexes()
+        await load_learned_aliases()
+        if args.gemini:
+            await start_http_client()
+        worker_pool.start()
+        try:
+            return await ingest(
+                iter_source(args.path), args.checkpoint or args.path.rstrip("/\\") + ".ingest-checkpoint.jsonl",
+                args.gemini, args.batch_size, args.concurrency
+            )
+        finally:
+            worker_pool.shutdown()
+            if args.gemini:
+                await close_http_client()
+
+    configure_logging()
+    report = asyncio.run(_main())
+    print(f"Ingested {report['inserted']} resumes ({report['duplicates']} duplicates, {report['failed']} failed, "
+          f"{report['skipped_from_checkpoint']} already in the checkpoint) in {report['seconds']} s: "
+          f"{report['resumes_per_sec']} resumes/sec")
+    if report["inserted"]:
+        print("Semantic search: the running API embeds the new resumes within EMBEDDING_SYNC_INTERVAL (or when it starts)")
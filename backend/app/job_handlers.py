@@ -0,0 +1,45 @@
+from bson import ObjectId, json_util
+from .db import get_collection
+from .jobs import PermanentJobError, job_handler
+from .cache import score_resume_cached
+from .scores import record_score
+from .batch import run_batch_job
+from .ingest import run_ingest_job
+from .scheduler import PRIORITY_BACKGROUND
+from .storage import resume_text
+
+resumes_col = get_collection("resumes")
+
+
+@job_handler("score")
+async def score_job(payload: dict) -> dict:
+    """Score one stored resume against a JD (what /score/{resume_id} enqueues)."""
+    if not ObjectId.is_valid(payload["resume_id"]):
+        raise PermanentJobError(f"Invalid resume id {payload['resume_id']!r}")
+    doc = await resumes_col.find_one({"_id": ObjectId(payload["resume_id"])},
+                                     {"parsed": 1, "text": 1, "text_file_id": 1})
+    if not doc:
+        # Deleted since it was queued; retrying will not bring it back
+        raise PermanentJobError(f"Resume {payload['resume_id']} not found")
+    llm_resp = await score_resume_cached(doc.get("parsed") or {}, payload["job_description"], PRIORITY_BACKGROUND,
+                                         await resume_text(doc))
+    score = await record_score(payload["resume_id"], payload["job_description"], llm_resp)
+    return {"score_id": score["id"], "score": score["score"], "cached": score["cached"]}
+
+
+# A retry would score the whole batch again, so batches get a single attempt;
+# progress and failures are tracked on the batch_jobs document.
+@job_handler("batch_score", max_attempts=1)
+async def batch_score_job(payload: dict) -> dict:
+    # The query is stored as Extended JSON: it holds ObjectIds and $-operators
+    await run_batch_job(
+        payload["batch_job_id"], payload["job_description"], json_util.loads(payload["query"]),
+        payload["top_k"], payload.get("concurrency"), payload.get("ranker", "gemini")
+    )
+    return {"batch_job_id": payload["batch_job_id"]}
+
+
+# Attempts resume from the checkpoint next to the spooled ZIP (see app/ingest.py)
+@job_handler("ingest", max_attempts=3)
+async def ingest_job(payload: dict) -> dict:
+    return await run_ingest_job(payload["ingest_id"], payload["path"], payload.get("use_gemini", False))
@@ -0,0 +1,36 @@
+"""Standalone job worker: ``python -m app.job_worker [--concurrency N]``.
+
+Runs the same handlers as the API's in-process workers, so scoring can be
+scaled separately (set JOB_WORKERS_IN_PROCESS=0 on the API then). Starts
+and stops the same services as the API (``app.lifecycle``).
+"""
+import signal
+import asyncio
+import logging
+import argparse
+from . import job_handlers  # noqa: F401  (registers the handlers)
+from .jobs import job_workers, JOB_CONCURRENCY
+from .lifecycle import start_services, stop_services
+from .logs import configure_logging
+
+logger = logging.getLogger("app.job_worker")
+
+
+async def main(concurrency: int):
+    await start_services()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    job_workers.start(concurrency)
+    logger.info("Job worker running", extra={"worker_id": job_workers.worker_id, "concurrency": concurrency})
+    await stop.wait()
+    await job_workers.stop()
+    await stop_services()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=JOB_CONCURRENCY)
+    configure_logging()
+    asyncio.run(main(parser.parse_args().concurrency))
@@ -0,0 +1,262 @@
+import os
+import socket
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from .db import get_collection
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "2.0"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "600"))
+
+# queued -> running -> done, or back to queued (retry) until max_attempts, then dead
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"
+
+jobs_col = get_collection("jobs")
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when a retry cannot succeed; the job is dead-lettered at once."""
+
+
+Handler = Callable[[Dict], Awaitable[Optional[Dict]]]
+HANDLERS: Dict[str, Handler] = {}
+HANDLER_MAX_ATTEMPTS: Dict[str, int] = {}
+
+
+def job_handler(job_type: str, max_attempts: Optional[int] = None):
+    """Register ``fn(payload) -> result dict`` as the handler of ``job_type``."""
+    def register(fn: Handler) -> Handler:
+        HANDLERS[job_type] = fn
+        if max_attempts is not None:
+            HANDLER_MAX_ATTEMPTS[job_type] = max_attempts
+        return fn
+    return register
+
+
+async def ensure_indexes():
+    await jobs_col.create_index([("status", 1), ("run_at", 1)])
+    await jobs_col.create_index([("status", 1), ("locked_until", 1)])
+
+
+async def enqueue_job(job_type: str, payload: Dict, max_attempts: Optional[int] = None,
+                      delay_seconds: float = 0) -> str:
+    now = datetime.utcnow()
+    result = await jobs_col.insert_one({
+        "type": job_type,
+        "payload": payload,
+        "status": STATUS_QUEUED,
+        "attempts": 0,
+        "max_attempts": max_attempts or HANDLER_MAX_ATTEMPTS.get(job_type, JOB_MAX_ATTEMPTS),
+        "run_at": now + timedelta(seconds=delay_seconds),
+        "locked_until": None,
+        "worker_id": None,
+        "errors": [],
+        "created_at": now,
+        "updated_at": now
+    })
+    job_workers.notify()
+    return str(result.inserted_id)
+
+
+async def get_job(job_id: str) -> Optional[Dict]:
+    doc = await jobs_col.find_one({"_id": ObjectId(job_id)})
+    if not doc:
+        return None
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+async def job_counts() -> Dict[str, int]:
+    counts = {STATUS_QUEUED: 0, STATUS_RUNNING: 0, STATUS_DONE: 0, STATUS_DEAD: 0}
+    async for row in jobs_col.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+    return counts
+
+
+async def pending_job_counts() -> Dict[str, int]:
+    """Queued and running jobs only; served from the status indexes (cheap enough per metrics scrape)."""
+    return {status: await jobs_col.count_documents({"status": status}) for status in (STATUS_QUEUED, STATUS_RUNNING)}
+
+
+async def claim_job(worker_id: str, visibility_timeout: int = JOB_VISIBILITY_TIMEOUT) -> Optional[Dict]:
+    """Atomically take the oldest runnable job.
+
+    Runnable means queued and due, or running with an expired lock (its
+    worker died or stopped heartbeating).
+    """
+    now = datetime.utcnow()
+    return await jobs_col.find_one_and_update(
+        {"$or": [
+            {"status": STATUS_QUEUED, "run_at": {"$lte": now}},
+            {"status": STATUS_RUNNING, "locked_until": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "status": STATUS_RUNNING,
+                "worker_id": worker_id,
+                "locked_until": now + timedelta(seconds=visibility_timeout),
+                "started_at": now,
+                "updated_at": now
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _retry_delay(attempts: int) -> float:
+    return random.uniform(0, min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * (2 ** attempts)))
+
+
+class JobWorkerPool:
+    """``concurrency`` asyncio loops that claim and run jobs from the ``jobs`` collection.
+
+    A claimed job is invisible to other workers until ``locked_until``; the
+    lock is extended while the handler runs. Failed jobs are requeued with
+    jittered exponential backoff and end up ``dead`` after ``max_attempts``.
+    Any number of pools (API process or ``python -m app.job_worker``) can
+    share the collection.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, visibility_timeout: int = JOB_VISIBILITY_TIMEOUT,
+                 poll_interval: float = JOB_POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.stats = {"claimed": 0, "succeeded": 0, "retried": 0, "dead": 0, "released": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, concurrency: Optional[int] = None):
+        if self._tasks:
+            return
+        self.concurrency = concurrency or self.concurrency
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._loop(i)) for i in range(self.concurrency)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self):
+        """Wake idle loops in this process (a job was just enqueued here)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _loop(self, index: int):
+        while True:
+            try:
+                job = await claim_job(self.worker_id, self.visibility_timeout)
+            except Exception as e:
+                logger.warning("Job claim failed", extra={"error": str(e)})
+                job = None
+            if job is None:
+                await self._idle()
+                continue
+            self.stats["claimed"] += 1
+            await self._run(job)
+
+    async def _heartbeat(self, job_id: ObjectId):
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                await jobs_col.update_one(
+                    {"_id": job_id, "worker_id": self.worker_id, "status": STATUS_RUNNING},
+                    {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=self.visibility_timeout)}}
+                )
+            except Exception as e:
+                # Keep trying: the lock only lapses after a full visibility timeout without a beat
+                logger.warning("Job heartbeat failed", extra={"job_id": str(job_id), "error": str(e)})
+
+    async def _finish(self, job: Dict, update: Dict):
+        # Only the current lock holder may settle the job
+        update.setdefault("$set", {})["updated_at"] = datetime.utcnow()
+        await jobs_col.update_one(
+            {"_id": job["_id"], "worker_id": self.worker_id, "status": STATUS_RUNNING},
+            update
+        )
+
+    async def _run(self, job: Dict):
+        if job["attempts"] > job["max_attempts"]:
+            # Lock expired on its last attempt (worker crash)
+            self.stats["dead"] += 1
+            await self._finish(job, {"$set": {"status": STATUS_DEAD, "finished_at": datetime.utcnow()},
+                                     "$push": {"errors": "visibility timeout expired"}})
+            return
+        handler = HANDLERS.get(job["type"])
+        heartbeat = asyncio.create_task(self._heartbeat(job["_id"]))
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job type {job['type']!r}")
+            result = await handler(job["payload"])
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without spending an attempt
+            self.stats["released"] += 1
+            await asyncio.shield(self._finish(job, {
+                "$set": {"status": STATUS_QUEUED, "run_at": datetime.utcnow(), "locked_until": None},
+                "$inc": {"attempts": -1}
+            }))
+            raise
+        except Exception as e:
+            logger.warning("Job failed", extra={"job_id": str(job["_id"]), "type": job["type"],
+                                                "attempt": job["attempts"], "error": str(e)})
+            error = f"attempt {job['attempts']}: {e}"
+            if isinstance(e, PermanentJobError) or job["attempts"] >= job["max_attempts"]:
+                self.stats["dead"] += 1
+                update = {"$set": {"status": STATUS_DEAD, "finished_at": datetime.utcnow()}}
+            else:
+                self.stats["retried"] += 1
+                run_at = datetime.utcnow() + timedelta(seconds=_retry_delay(job["attempts"]))
+                update = {"$set": {"status": STATUS_QUEUED, "run_at": run_at, "locked_until": None}}
+            update["$push"] = {"errors": error}
+            await self._finish(job, update)
+        else:
+            self.stats["succeeded"] += 1
+            await self._finish(job, {"$set": {
+                "status": STATUS_DONE, "result": result, "locked_until": None,
+                "finished_at": datetime.utcnow()
+            }})
+        finally:
+            heartbeat.cancel()
+
+    def snapshot(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "running": self.running,
+            "concurrency": self.concurrency if self.running else 0,
+            **self.stats
+        }
+
+
+job_workers = JobWorkerPool()
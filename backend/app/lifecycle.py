@@ -0,0 +1,54 @@
+"""Process startup and shutdown shared by the API and ``python -m app.job_worker``.
+
+Both run the same pipelines and job handlers, so both need the Gemini HTTP
+client, the worker pool, the embedding index, the learned skill aliases and
+the BM25 corpus statistics.
+"""
+import asyncio
+import logging
+from typing import Optional
+from . import ingest, jobs, scores, skill_index
+from .cache import invalidate_stale_parse_cache, parse_cache, score_cache
+from .embeddings import embedding_index, sync_loop as embedding_sync_loop
+from .gemini_client import start_http_client, close_http_client
+from .local_scorer import corpus_stats
+from .workers import worker_pool
+
+logger = logging.getLogger(__name__)
+
+embedding_sync_task: Optional[asyncio.Task] = None
+
+
+async def start_services():
+    global embedding_sync_task
+    await start_http_client()
+    worker_pool.start()
+    embedding_index.open()
+    try:
+        await parse_cache.ensure_indexes()
+        await score_cache.ensure_indexes()
+        await skill_index.ensure_indexes()
+        await scores.ensure_indexes()
+        await jobs.ensure_indexes()
+        await ingest.ensure_indexes()
+        await skill_index.load_learned_aliases()
+        await corpus_stats.load()
+        removed = await invalidate_stale_parse_cache()
+        if removed:
+            logger.info("Removed parse cache entries from older prompt versions", extra={"removed": removed})
+    except Exception as e:
+        logger.error("Index setup failed", extra={"error": str(e)})
+    if embedding_index.writable:
+        embedding_sync_task = asyncio.create_task(embedding_sync_loop())
+
+
+async def stop_services():
+    """Call after the job workers and other users of these services have stopped."""
+    global embedding_sync_task
+    if embedding_sync_task is not None:
+        embedding_sync_task.cancel()
+        await asyncio.gather(embedding_sync_task, return_exceptions=True)
+        embedding_sync_task = None
+    await close_http_client()
+    worker_pool.shutdown()
+    embedding_index.close()
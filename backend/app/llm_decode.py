@@ -0,0 +1,131 @@
+from typing import Any, Dict, Iterator, Tuple
+import orjson
+from pydantic import ValidationError
+from .models import ParsedResume, ScoreResult
+
+SCORE_FIELDS = ("score", "justification", "matched_skills", "missing_skills", "evidence")
+
+
+class LLMDecodeError(ValueError):
+    """The model answer contained no usable JSON (or not the expected shape)."""
+
+
+def response_text(data: Dict) -> str:
+    """Concatenated text parts of the first candidate of a generateContent response."""
+    try:
+        parts = data["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+    return "".join(part.get("text", "") for part in parts if isinstance(part, dict))
+
+
+def iter_json_candidates(text: str) -> Iterator[str]:
+    """Complete top-level ``{...}``/``[...]`` spans of ``text``, in order.
+
+    One pass with a bracket stack that skips string contents, so code
+    fences, a leading "Here is the JSON:" or trailing remarks are ignored
+    without any string replacing.
+    """
+    closing = {"{": "}", "[": "]"}
+    start = -1
+    stack = []
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch in closing:
+            if not stack:
+                start = i
+            stack.append(closing[ch])
+        elif stack:
+            if ch == '"':
+                in_string = True
+            elif ch == stack[-1]:
+                stack.pop()
+                if not stack:
+                    yield text[start:i + 1]
+            elif ch in "}]":
+                # Mismatched bracket: restart the search after this opening
+                stack.clear()
+
+
+def iter_json_values(text: str) -> Iterator[Any]:
+    """The JSON values in a model answer, in the order they are tried: the
+    text as-is, then the outermost bracket slice (fences/chatter around one
+    value), then each bracketed span."""
+    try:
+        yield orjson.loads(text)
+        return
+    except orjson.JSONDecodeError:
+        pass
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    end = max(text.rfind("}"), text.rfind("]"))
+    if starts and end > min(starts):
+        try:
+            yield orjson.loads(text[min(starts):end + 1])
+            return
+        except orjson.JSONDecodeError:
+            pass
+    for candidate in iter_json_candidates(text):
+        try:
+            yield orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            continue
+
+
+def decode_json(text: str) -> Any:
+    """The first JSON value in a model answer."""
+    for value in iter_json_values(text):
+        return value
+    raise LLMDecodeError("No valid JSON value in model output")
+
+
+def decode_object(data: Dict) -> Dict:
+    """The first JSON object in a generateContent response (arrays before it are skipped)."""
+    found = False
+    for value in iter_json_values(response_text(data)):
+        if isinstance(value, dict):
+            return value
+        found = True
+    raise LLMDecodeError("Model output is not a JSON object" if found else "No valid JSON value in model output")
+
+
+def validate_parsed_resume(value: Any) -> Dict:
+    if not isinstance(value, dict):
+        raise LLMDecodeError("Parsed resume is not a JSON object")
+    try:
+        return ParsedResume.parse_obj(value).dict()
+    except ValidationError as e:
+        raise LLMDecodeError(f"Parsed resume failed validation: {e}")
+
+
+def validate_score(value: Any) -> Dict:
+    if not isinstance(value, dict):
+        raise LLMDecodeError("Score is not a JSON object")
+    value.setdefault("justification", [])
+    try:
+        result = ScoreResult.parse_obj(value).dict()
+    except ValidationError as e:
+        raise LLMDecodeError(f"Score failed validation: {e}")
+    return {key: result[key] for key in SCORE_FIELDS}
+
+
+def decode_parsed_resume(data: Dict) -> Dict:
+    return validate_parsed_resume(decode_object(data))
+
+
+def decode_score(data: Dict) -> Dict:
+    return validate_score(decode_object(data))
+
+
+def decode_combined(data: Dict) -> Tuple[Dict, Dict]:
+    value = decode_object(data)
+    if "parsed" not in value or "score" not in value:
+        raise LLMDecodeError("Combined output needs 'parsed' and 'score'")
+    return validate_parsed_resume(value["parsed"]), validate_score(value["score"])
@@ -0,0 +1,249 @@
+import os
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+from .db import get_collection
+from .skills import match_tokens, skill_matcher, vocabulary
+
+load_dotenv()
+
+LOCAL_BM25_K1 = float(os.getenv("LOCAL_BM25_K1", "1.2"))
+LOCAL_BM25_B = float(os.getenv("LOCAL_BM25_B", "0.75"))
+# Weight of a JD skill relative to a plain JD keyword
+LOCAL_SKILL_BOOST = float(os.getenv("LOCAL_SKILL_BOOST", "3.0"))
+# Other processes also add to the corpus; reload its statistics when older than this
+LOCAL_STATS_MAX_AGE = float(os.getenv("LOCAL_STATS_MAX_AGE", "300"))
+
+SKILL_PREFIX = "skill:"
+META_ID = "__corpus__"  # cannot collide with a term: terms never contain "_"
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but
+by can could did do does doing down during each etc few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+ours out over own same she should so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would you your
+ability able candidate candidates experience experienced familiarity good great ideal including knowledge looking
+must plus preferred required requirements responsibilities role skills strong team using work working year years
+""".split())
+
+corpus_stats_col = get_collection("corpus_stats")
+resumes_col = get_collection("resumes")
+
+
+def terms(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords, numbers and single characters.
+
+    Tokens are whole words ("java" does not match "javascript") and keep the
+    in-word punctuation of skill names (c++, node.js).
+    """
+    return [t for t in match_tokens(text or "") if len(t) > 1 and t not in STOPWORDS and not t.isdigit()]
+
+
+def _strings(value) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for inner in value.values():
+            yield from _strings(inner)
+    elif isinstance(value, list):
+        for inner in value:
+            yield from _strings(inner)
+
+
+def parsed_text(parsed: Optional[Dict]) -> str:
+    """The searchable fields of a parsed resume as one text (contact details left out)."""
+    fields = {k: v for k, v in (parsed or {}).items() if k not in ("name", "email", "phone")}
+    return "\n".join(_strings(fields))
+
+
+class Document(NamedTuple):
+    tf: Counter  # term -> count, plus SKILL_PREFIX + canonical skill -> 1
+    length: int  # number of word terms
+
+
+def document_features(text: str = "", parsed: Optional[Dict] = None) -> Document:
+    """Terms and skills of a resume: its extracted text, or its parsed fields when there is no text."""
+    text = text or parsed_text(parsed)
+    words = terms(text)
+    tf = Counter(words)
+    skills = set(skill_matcher.extract(text)) if text else set()
+    skills.update(vocabulary.canonical_ids((parsed or {}).get("skills")))
+    for skill in skills:
+        tf[SKILL_PREFIX + skill] = 1
+    return Document(tf, len(words))
+
+
+class CorpusStats:
+    """Document frequencies over every stored resume, for IDF.
+
+    Kept in memory and in the ``corpus_stats`` collection (one document per
+    term plus a META_ID document with the totals). ``record`` applies new
+    resumes to both with one unordered bulk of ``$inc`` upserts.
+    """
+
+    def __init__(self):
+        self.docs = 0
+        self.total_length = 0
+        self.df: Dict[str, int] = {}
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_length / self.docs if self.docs else 0.0
+
+    def _add(self, documents: Iterable[Document]) -> Counter:
+        increments = Counter()
+        for doc in documents:
+            increments.update(doc.tf.keys())
+            self.docs += 1
+            self.total_length += doc.length
+        for term, n in increments.items():
+            self.df[term] = self.df.get(term, 0) + n
+        return increments
+
+    async def record(self, documents: List[Document]):
+        if not documents:
+            return
+        total_length = sum(doc.length for doc in documents)
+        increments = self._add(documents)
+        ops = [UpdateOne({"_id": term}, {"$inc": {"df": n}}, upsert=True) for term, n in increments.items()]
+        ops.append(UpdateOne({"_id": META_ID}, {"$inc": {"docs": len(documents), "total_length": total_length}},
+                             upsert=True))
+        await corpus_stats_col.bulk_write(ops, ordered=False)
+
+    async def load(self):
+        docs, total_length, df = 0, 0, {}
+        async for doc in corpus_stats_col.find({}):
+            if doc["_id"] == META_ID:
+                docs, total_length = doc.get("docs", 0), doc.get("total_length", 0)
+            else:
+                df[doc["_id"]] = doc.get("df", 0)
+        self.docs, self.total_length, self.df = docs, total_length, df
+        self.loaded_at = time.monotonic()
+
+    async def ensure_fresh(self, max_age: float = LOCAL_STATS_MAX_AGE):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > max_age:
+            await self.load()
+
+    async def rebuild(self, batch_size: int = 500) -> int:
+        """Recompute the statistics from the resumes collection."""
+        await corpus_stats_col.delete_many({})
+        self.docs, self.total_length, self.df = 0, 0, {}
+        batch, total = [], 0
+        async for doc in resumes_col.find({}, {"parsed": 1, "text": 1}).batch_size(batch_size):
+            batch.append(document_features(doc.get("text") or "", doc.get("parsed")))
+            if len(batch) >= batch_size:
+                await self.record(batch)
+                total += len(batch)
+                batch = []
+        await self.record(batch)
+        self.loaded_at = time.monotonic()
+        return total + len(batch)
+
+    def idf(self, query_terms: List[str]) -> np.ndarray:
+        df = np.array([self.df.get(t, 0) for t in query_terms], dtype=np.float64)
+        n = max(self.docs, 1)
+        # Lucene's non-negative BM25 IDF; stale stats from another process can leave df > n
+        return np.log1p((np.maximum(n - df, 0) + 0.5) / (df + 0.5))
+
+    def snapshot(self) -> Dict:
+        return {"docs": self.docs, "terms": len(self.df), "avgdl": round(self.avgdl, 1)}
+
+
+class Query(NamedTuple):
+    terms: List[str]  # keywords first, then SKILL_PREFIX terms
+    weights: np.ndarray
+    n_words: int
+
+
+class LocalScorer:
+    """BM25 between a job description and resumes, with JD skills as boosted terms.
+
+    JD keywords are scored with BM25 (saturating term frequency, length
+    normalization against the corpus average). JD skills (found by the
+    skill matcher, aliases included) count once when the resume has them.
+    Each keyword's BM25 term score is divided by its ceiling (k1 + 1), so it
+    lies in [0, 1) like a skill hit; the score is their IDF-weighted mean
+    times 100. Scores stay below 100 and keep their order (no clipping).
+    """
+
+    def __init__(self, stats: CorpusStats, k1: float = LOCAL_BM25_K1, b: float = LOCAL_BM25_B,
+                 skill_boost: float = LOCAL_SKILL_BOOST):
+        self.stats = stats
+        self.k1 = k1
+        self.b = b
+        self.skill_boost = skill_boost
+
+    def query(self, job_description: str) -> Query:
+        words = list(dict.fromkeys(terms(job_description)))
+        skills = [SKILL_PREFIX + s for s in skill_matcher.extract(job_description)]
+        weights = np.array([1.0] * len(words) + [self.skill_boost] * len(skills))
+        return Query(words + skills, weights, len(words))
+
+    def _matrix(self, query: Query, documents: List[Document]) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw 0-100 scores and the (documents x query terms) tf matrix."""
+        tf = np.array([[doc.tf.get(t, 0) for t in query.terms] for doc in documents], dtype=np.float64)
+        tf = tf.reshape(len(documents), len(query.terms))
+        if not query.terms or not documents:
+            return np.zeros(len(documents)), tf
+        lengths = np.array([doc.length for doc in documents], dtype=np.float64)
+        avgdl = self.stats.avgdl or float(lengths.mean()) or 1.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / avgdl)
+        saturated = tf / (tf + norm[:, None])  # BM25 term score / (k1 + 1)
+        saturated[:, query.n_words:] = tf[:, query.n_words:] > 0
+        weights = self.stats.idf(query.terms) * query.weights
+        return saturated @ weights / weights.sum() * 100, tf
+
+    def score_many(self, job_description: str, documents: List[Document]) -> np.ndarray:
+        """0-100 score of each document, in one vectorized pass."""
+        return self._matrix(self.query(job_description), documents)[0]
+
+    def results(self, job_description: str, documents: List[Document]) -> List[Dict]:
+        """Scores of ``documents`` as score results (score, matched/missing skills, justification)."""
+        query = self.query(job_description)
+        scores, tf = self._matrix(query, documents)
+        words, skills = query.terms[:query.n_words], [t[len(SKILL_PREFIX):] for t in query.terms[query.n_words:]]
+        idf = self.stats.idf(words)
+        by_weight = np.argsort(-idf, kind="stable")
+        results = []
+        for row, score in zip(tf, scores):
+            present = row > 0
+            matched_words = [words[i] for i in by_weight if present[i]]
+            missing_words = [words[i] for i in by_weight if not present[i]]
+            matched_skills = [s for s, hit in zip(skills, present[query.n_words:]) if hit]
+            missing_skills = [s for s, hit in zip(skills, present[query.n_words:]) if not hit]
+            justification = [
+                f"Local BM25 match: {len(matched_skills)} of {len(skills)} job skills and "
+                f"{len(matched_words)} of {len(words)} keywords found."
+            ]
+            if matched_words:
+                justification.append("Strongest keyword matches: " + ", ".join(matched_words[:8]) + ".")
+            results.append({
+                "score": round(float(score), 2),
+                # Vocabulary skills first, then the other JD keywords by weight
+                "matched_skills": list(dict.fromkeys(matched_skills + matched_words))[:25],
+                "missing_skills": list(dict.fromkeys(missing_skills + missing_words))[:25],
+                "justification": justification,
+                "evidence": [],
+                "raw_llm_response": None
+            })
+        return results
+
+
+corpus_stats = CorpusStats()
+local_scorer = LocalScorer(corpus_stats)
+
+
+def local_score(job_description: str, parsed: Optional[Dict] = None, text: str = "") -> Dict:
+    """Score one resume locally (the Gemini fallback)."""
+    return local_scorer.results(job_description, [document_features(text, parsed)])[0]
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    print(f"Rebuilt corpus statistics from {asyncio.run(corpus_stats.rebuild())} resumes")
@@ -1,18 +1,72 @@
 import os
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Form
+import time
+import zipfile
+import asyncio
+import logging
+from fastapi import FastAPI, Request, UploadFile, File, HTTPException, Form, Query
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from app.pdf_utils import extract_text_from_pdf_bytes
-from app.parser import parse_resume_text
-from app.db import get_collection
-from app.models import ResumeDocument, ScoreResult
-from app.gemini_client import score_resume_with_gemini
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from app.logs import configure_logging
+from app.metrics import HTTP_REQUEST_SECONDS, JOBS_IN_QUEUE, render_latest, snapshot_gauges
+from app.profiling import SlowRequestProfiler
+from app.db import get_collection, get_client
+from app.models import BatchScoreRequest
+from app.gemini_client import http_client_started, GEMINI_COMBINED_MODE, gemini_singleflight
+from app.prompt_compaction import prompt_stats
+from app.cache import parse_cache, invalidate_stale_parse_cache, score_cache
+from app.scheduler import gemini_scheduler
+from app.batch import build_resume_query, create_batch_job, get_batch_job
+from app import ingest
+from app.embeddings import embedding_index, embed_job_description
+from app.lifecycle import start_services, stop_services
+from app.local_scorer import corpus_stats
+from app.skills import vocabulary
+from app import skill_index
+from app import scores
+from app import jobs
+from app import job_handlers  # noqa: F401  (registers job handlers)
+from app.workers import worker_pool, WorkerPoolBusy
+from app.pdf_utils import PDFExtractionError
+from app.storage import spool_upload, UploadTooLarge, gridfs_enabled, load_text
+from app.pipeline import process_upload
+from app.parser import nlp_loaded
+from app.progress import progress_broker, sse_format
 from dotenv import load_dotenv
-from bson import ObjectId
-import json
+from bson import ObjectId, json_util
+from typing import List, Optional
 
 load_dotenv()
 
-app = FastAPI(title="Smart Resume Screener")
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Run job workers inside the API process; set to 0 when using `python -m app.job_worker`
+JOB_WORKERS_IN_PROCESS = int(os.getenv("JOB_WORKERS_IN_PROCESS", str(jobs.JOB_CONCURRENCY)))
+# Load spaCy (in every worker process) in the background after startup; /readyz waits for it
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "0") in ("1", "true", "yes")
+READY_MONGO_TIMEOUT = float(os.getenv("READY_MONGO_TIMEOUT", "2"))
+
+app = FastAPI(title="Smart Resume Screener", default_response_class=ORJSONResponse)
+
+slow_request_profiler = SlowRequestProfiler()
+if slow_request_profiler.enabled:
+    app.middleware("http")(slow_request_profiler)
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw path, to keep the label set small
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route is not None else "unmatched", str(status)
+        ).observe(time.perf_counter() - start)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,107 +76,356 @@ app.add_middleware(
 )
 
 resumes_col = get_collection("resumes")
+upload_tasks = set()  # running async-mode uploads
+warmup_task: Optional[asyncio.Task] = None
+
+# Queue depths and in-flight work, read at scrape time
+snapshot_gauges.gauge("gemini_queue_depth", "Gemini requests waiting in the scheduler, by priority",
+                      lambda: gemini_scheduler.snapshot()["queue_depth"], label="priority")
+snapshot_gauges.gauge("gemini_in_flight", "Gemini requests in flight", lambda: gemini_scheduler.snapshot()["in_flight"])
+snapshot_gauges.gauge("worker_pool_waiting", "CPU jobs waiting for a worker pool slot", lambda: worker_pool.snapshot()["waiting"])
+snapshot_gauges.gauge("worker_pool_active", "CPU jobs running in the worker pool", lambda: worker_pool.snapshot()["active"])
+snapshot_gauges.gauge("async_uploads_running", "Async-mode uploads still in the pipeline", lambda: len(upload_tasks))
+snapshot_gauges.gauge("sse_subscribers", "Open upload event streams", lambda: progress_broker.snapshot()["subscribers"])
+
+@app.exception_handler(WorkerPoolBusy)
+async def worker_pool_busy_handler(request, exc: WorkerPoolBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+@app.on_event("startup")
+async def startup():
+    global warmup_task
+    await start_services()
+    if JOB_WORKERS_IN_PROCESS > 0:
+        jobs.job_workers.start(JOB_WORKERS_IN_PROCESS)
+    if STARTUP_WARMUP:
+        warmup_task = asyncio.create_task(_warm_up())
+
+async def _warm_up():
+    try:
+        await worker_pool.warm_up()
+    except Exception:
+        logger.exception("Warm-up failed")
+
+@app.on_event("shutdown")
+async def shutdown():
+    if warmup_task is not None:
+        warmup_task.cancel()
+    for task in list(upload_tasks):
+        task.cancel()
+    await asyncio.gather(*upload_tasks, return_exceptions=True)
+    await jobs.job_workers.stop()
+    await stop_services()
 
 @app.post("/upload-resume")
-async def upload_resume(file: UploadFile = File(...), job_description: str = Form(...)):
-    """Upload resume and job description together."""
+async def upload_resume(file: UploadFile = File(...), job_description: str = Form(...), mode: str = Form("sync"),
+                        combined: Optional[bool] = Form(None)):
+    """Upload resume and job description together.
+
+    ``mode=async`` returns 202 with an ``upload_id`` as soon as the file is
+    received; stage events are streamed from ``/uploads/{upload_id}/events``.
+    ``combined`` parses and scores with one Gemini prompt (default:
+    GEMINI_COMBINED_MODE).
+    """
+    if combined is None:
+        combined = GEMINI_COMBINED_MODE
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF uploads accepted.")
+    if mode not in ("sync", "async"):
+        raise HTTPException(status_code=400, detail="mode must be 'sync' or 'async'.")
 
-    content = await file.read()
+    try:
+        upload = await spool_upload(file, to_gridfs=gridfs_enabled())
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
+    if mode == "async":
+        upload_id = progress_broker.create()
+        progress_broker.publish(upload_id, "received", {"filename": upload.filename, "size": upload.size, "sha256": upload.sha256})
+        task = asyncio.create_task(_run_async_upload(upload_id, upload, job_description, combined))
+        upload_tasks.add(task)
+        task.add_done_callback(upload_tasks.discard)
+        return JSONResponse(status_code=202, content={
+            "upload_id": upload_id,
+            "events_url": f"/uploads/{upload_id}/events",
+            "status_url": f"/uploads/{upload_id}"
+        })
+
+    try:
+        result = await process_upload(upload, job_description, combined=combined)
+    except PDFExtractionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return result
+
+async def _run_async_upload(upload_id: str, upload, job_description: str, combined: bool):
+    async def report(stage, data):
+        progress_broker.publish(upload_id, stage, jsonable_encoder(data))
     try:
-        text = extract_text_from_pdf_bytes(content)
-        print("\n🧾 Extracted PDF text length:", len(text))
-        print("🧾 First 500 chars of text:", text[:500])
+        result = await process_upload(upload, job_description, report, combined)
+        progress_broker.publish(upload_id, "done", jsonable_encoder(result))
+    except PDFExtractionError as e:
+        progress_broker.publish(upload_id, "error", {"status_code": 422, "detail": str(e)})
+    except WorkerPoolBusy as e:
+        progress_broker.publish(upload_id, "error", {"status_code": 503, "detail": str(e)})
+    except asyncio.CancelledError:
+        progress_broker.publish(upload_id, "error", {"status_code": 503, "detail": "Server shutting down"})
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PDF parsing failed: {e}")
-
-    # This is now async - add await
-    parsed = await parse_resume_text(text)
-    
-    doc = {
-        "filename": file.filename,
-        "text": text,
-        "parsed": parsed,
-        "scores": []
+        logger.exception("Async upload failed", extra={"upload_id": upload_id})
+        progress_broker.publish(upload_id, "error", {"status_code": 500, "detail": str(e)})
+
+@app.get("/uploads/{upload_id}/events")
+async def upload_events(upload_id: str):
+    """Server-Sent Events: ``received``, ``extracted``, ``parsed``, ``stored``, ``scored``, then ``done`` or ``error``."""
+    if not progress_broker.exists(upload_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired upload id")
+
+    async def stream():
+        async for event in progress_broker.subscribe(upload_id):
+            yield sse_format(event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    """Stage events of an async upload so far (polling alternative to the SSE stream)."""
+    events = progress_broker.events(upload_id)
+    if events is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired upload id")
+    return {"upload_id": upload_id, "stage": events[-1]["stage"], "events": events}
+
+
+
+@app.post("/score/{resume_id}")
+async def score_resume(resume_id: str, job_description: str):
+    """Queue a scoring job; poll GET /jobs/{job_id} for the result."""
+    if not ObjectId.is_valid(resume_id):
+        raise HTTPException(status_code=400, detail="Invalid resume id")
+    if not await resumes_col.count_documents({"_id": ObjectId(resume_id)}, limit=1):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    job_id = await jobs.enqueue_job("score", {"resume_id": resume_id, "job_description": job_description})
+    return {
+        "status": "scoring_queued",
+        "job_id": job_id,
+        "resume_id": resume_id,
+        "jd_hash": scores.jd_hash(job_description)
     }
 
-    result = await resumes_col.insert_one(doc)
-    resume_id = str(result.inserted_id)
+@app.post("/batch-score")
+async def batch_score(request: BatchScoreRequest):
+    """Score many stored resumes (by id list and/or filter) against one job description."""
+    if not request.resume_ids and not request.filter and not request.prefilter_top_n:
+        raise HTTPException(status_code=400, detail="Provide resume_ids, a filter or prefilter_top_n.")
+    if request.ranker not in ("gemini", "local"):
+        raise HTTPException(status_code=400, detail="ranker must be 'gemini' or 'local'.")
+    candidate_ids = None
+    if request.prefilter_top_n:
+        matches = embedding_index.search(embed_job_description(request.job_description), request.prefilter_top_n)
+        candidate_ids = [rid for rid, _ in matches]
+    try:
+        query = build_resume_query(request.resume_ids, request.filter, candidate_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job_id = await create_batch_job(request.job_description, query, request.top_k)
+    queue_job_id = await jobs.enqueue_job("batch_score", {
+        "batch_job_id": job_id,
+        "job_description": request.job_description,
+        "query": json_util.dumps(query),
+        "top_k": request.top_k,
+        "concurrency": request.concurrency,
+        "ranker": request.ranker
+    })
+    return {"status": "batch_queued", "job_id": job_id, "queue_job_id": queue_job_id}
+
+@app.get("/batch-score/{job_id}")
+async def batch_score_status(job_id: str, top_k: Optional[int] = None):
+    """Progress of a batch scoring job and its ranked top-K so far."""
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid batch job id")
+    job = await get_batch_job(job_id, top_k)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job
 
-    # Try Gemini scoring
+@app.post("/ingest/zip")
+async def ingest_zip(file: UploadFile = File(...), use_gemini: bool = Form(False)):
+    """Queue bulk ingestion of a ZIP archive of PDF resumes; poll /ingest/{ingest_id}."""
     try:
-        gemini_response = await score_resume_with_gemini(parsed, job_description)
+        upload = await spool_upload(file, max_bytes=ingest.INGEST_MAX_ZIP_BYTES, suffix=".zip",
+                                    directory=ingest.INGEST_DIR)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if not zipfile.is_zipfile(upload.path):
+        upload.cleanup()
+        raise HTTPException(status_code=400, detail="Upload is not a ZIP archive.")
+    ingest_id = await ingest.create_ingest_job(upload.filename, upload.path)
+    queue_job_id = await jobs.enqueue_job("ingest", {
+        "ingest_id": ingest_id,
+        "path": upload.path,
+        "use_gemini": use_gemini
+    })
+    return {"status": "ingest_queued", "ingest_id": ingest_id, "queue_job_id": queue_job_id}
 
-        score_result = {
-            "score": gemini_response.get("score") or 0,
-            "matched_skills": gemini_response.get("matched_skills", []),
-            "missing_skills": gemini_response.get("missing_skills", []),
-            "justification": gemini_response.get("justification", []),
-            "evidence": gemini_response.get("evidence", []),
-            "raw_llm_response": gemini_response
-        }
+@app.get("/ingest/{ingest_id}")
+async def ingest_status(ingest_id: str):
+    """Progress of a bulk ingestion: counts so far and resumes/sec."""
+    if not ObjectId.is_valid(ingest_id):
+        raise HTTPException(status_code=400, detail="Invalid ingest id")
+    job = await ingest.get_ingest_job(ingest_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
 
-    except Exception as e:
-        jd_lower = job_description.lower()
-        resume_lower = text.lower()
+@app.post("/semantic-search")
+async def semantic_search(job_description: str = Form(...), top_k: int = Form(50)):
+    """Nearest resumes to a job description in the local embedding index (no LLM call)."""
+    matches = embedding_index.search(embed_job_description(job_description), top_k)
+    return {
+        "indexed": len(embedding_index),
+        "results": [{"resume_id": rid, "similarity": round(sim, 4)} for rid, sim in matches]
+    }
 
-        jd_keywords = [w for w in jd_lower.split() if len(w) > 3]  # filter out short words
-        matched = [word for word in jd_keywords if word in resume_lower]
-        missing = [word for word in jd_keywords if word not in resume_lower]
+@app.get("/skills/search")
+async def skills_search(skill: List[str] = Query(...), min_overlap: int = 1, limit: int = Query(50, le=1000)):
+    """Resumes having the given skills (aliases allowed), most overlapping first."""
+    return await skill_index.search_by_skills(skill, min_overlap, limit)
 
-        score_val = round((len(matched) / (len(jd_keywords) or 1)) * 100, 2)
-        score_result = {
-            "score": score_val,
-            "matched_skills": matched[:25],  # top matches
-            "missing_skills": missing[:25],
-            "justification": [f"Matched {len(matched)} of {len(jd_keywords)} relevant keywords."],
-            "evidence": [],
-            "error": f"Gemini scoring failed: {str(e)}"
-        }
+@app.post("/skills/aliases")
+async def add_skill_alias(alias: str = Form(...), canonical: str = Form(...)):
+    await skill_index.learn_alias(alias, canonical)
+    return {"alias": alias, "canonical": vocabulary.canonical(alias)}
 
-    await resumes_col.update_one(
-        {"_id": ObjectId(resume_id)},
-        {"$push": {"scores": score_result}}
-    )
-    print("DEBUG: Extracted PDF text length =", len(text))
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"parse": parse_cache.snapshot(), "score": score_cache.snapshot()}
 
-    return {"id": resume_id, "parsed": parsed, "score_result": score_result}
+@app.post("/cache/parse/invalidate")
+async def invalidate_parse_cache(all_versions: bool = False):
+    """Drop stale parse cache entries (or every entry with all_versions=true)."""
+    if all_versions:
+        removed = await parse_cache.invalidate({})
+    else:
+        removed = await invalidate_stale_parse_cache()
+    return {"removed": removed}
 
+@app.get("/jobs/stats")
+async def jobs_stats():
+    """Job counts by status and this process's worker counters."""
+    return {"counts": await jobs.job_counts(), "workers": jobs.job_workers.snapshot()}
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, attempts, errors and result of a queued job."""
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job id")
+    job = await jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return jsonable_encoder(job, custom_encoder={ObjectId: str})
 
-@app.post("/score/{resume_id}")
-async def score_resume(resume_id: str, job_description: str, background_tasks: BackgroundTasks):
-    # find resume
-    doc = await resumes_col.find_one({"_id": ObjectId(resume_id)})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Resume not found")
-    parsed = doc.get("parsed")
-    async def _do_score(rid, parsed_resume, job_desc):
-        try:
-            llm_resp = await score_resume_with_gemini(parsed_resume, job_desc)
-            score_result = ScoreResult(
-                score=llm_resp.get("score", 0),
-                justification=llm_resp.get("justification", []),
-                matched_skills=llm_resp.get("matched_skills", []),
-                missing_skills=llm_resp.get("missing_skills", []),
-                evidence=llm_resp.get("evidence", []),
-                raw_llm_response=llm_resp.get("raw_llm_response", llm_resp)
-            )
-            await resumes_col.update_one(
-                {"_id": ObjectId(rid)},
-                {"$push": {"scores": score_result.dict()}}
-            )
-        except Exception as e:
-            print("LLM scoring error:", e)
-    background_tasks.add_task(_do_score, resume_id, parsed, job_description)
-    return {"status": "scoring_started", "resume_id": resume_id}
+@app.get("/gemini/stats")
+async def gemini_stats():
+    """Queue depth, wait times and retry counters of the Gemini scheduler, request coalescing and prompt sizes."""
+    return {
+        **gemini_scheduler.snapshot(),
+        "coalescing": gemini_singleflight.snapshot(),
+        "prompts": prompt_stats.snapshot()
+    }
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: MongoDB answers a ping and, with STARTUP_WARMUP, spaCy is loaded.
+
+    Also reports which engines are loaded in this process; 503 until ready.
+    """
+    mongo = {"ok": False}
+    start = asyncio.get_running_loop().time()
+    try:
+        await asyncio.wait_for(get_client().admin.command("ping"), READY_MONGO_TIMEOUT)
+        mongo = {"ok": True, "ping_ms": round((asyncio.get_running_loop().time() - start) * 1000, 2)}
+    except Exception as e:
+        mongo["error"] = str(e) or type(e).__name__
+    engines = {
+        "mongo": mongo,
+        # In-process load (thread pool mode) or, with worker processes, the warm-up
+        "spacy": {"loaded": nlp_loaded(), "workers_warmed": worker_pool.warmed},
+        "worker_pool": {"started": worker_pool.started(), "processes": worker_pool.processes},
+        "gemini_http": {"started": http_client_started()},
+        "embedding_index": {"open": embedding_index.is_open, "writable": embedding_index.writable,
+                            "size": len(embedding_index)},
+        "job_workers": {"running": jobs.job_workers.running},
+        "local_scorer": corpus_stats.snapshot(),
+    }
+    ready = mongo["ok"] and (worker_pool.warmed or not STARTUP_WARMUP)
+    return ORJSONResponse(status_code=200 if ready else 503, content={"ready": ready, "engines": engines})
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage, Gemini, MongoDB and HTTP latency histograms and queue depths."""
+    try:
+        for status, count in (await jobs.pending_job_counts()).items():
+            JOBS_IN_QUEUE.labels(status).set(count)
+    except Exception as e:
+        logger.warning("Job counts for metrics failed", extra={"error": str(e)})
+    body, content_type = render_latest()
+    # Set the header as is: media_type would get a second charset appended
+    return Response(content=body, headers={"Content-Type": content_type})
+
+@app.get("/workers/stats")
+async def workers_stats():
+    """Active and queued jobs of the PDF/NER worker pool."""
+    return worker_pool.snapshot()
 
 @app.get("/resume/{resume_id}")
-async def get_resume(resume_id: str):
-    doc = await resumes_col.find_one({"_id": ObjectId(resume_id)})
+async def get_resume(resume_id: str, include_text: bool = False, scores_limit: int = Query(20, ge=0, le=100)):
+    """Stored resume with its most recent scores; the extracted text only on request."""
+    if not ObjectId.is_valid(resume_id):
+        raise HTTPException(status_code=400, detail="Invalid resume id")
+    projection = None if include_text else {"text": 0}
+    doc = await resumes_col.find_one({"_id": ObjectId(resume_id)}, projection)
     if not doc:
         raise HTTPException(status_code=404, detail="Resume not found")
-    doc["_id"] = str(doc["_id"])
+    if include_text and doc.get("text_file_id") is not None:
+        doc["text"] = await load_text(doc["text_file_id"])
+    for key in ("_id", "pdf_file_id", "text_file_id"):
+        if isinstance(doc.get(key), ObjectId):
+            doc[key] = str(doc[key])
+    doc["scores"] = await scores.latest_scores(resume_id, scores_limit)
     return doc
+
+@app.get("/resume/{resume_id}/scores")
+async def resume_scores(resume_id: str, jd_hash: Optional[str] = None,
+                        limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None):
+    """Score history of a resume, newest first. Pass ``next_cursor`` back as ``cursor`` for the next page."""
+    if not ObjectId.is_valid(resume_id):
+        raise HTTPException(status_code=400, detail="Invalid resume id")
+    if not await resumes_col.count_documents({"_id": ObjectId(resume_id)}, limit=1):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    try:
+        return await scores.score_history(resume_id, jd_hash, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/leaderboard/{jd_hash}")
+async def jd_leaderboard(jd_hash: str, limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None):
+    """Scores for one job description, highest first (cursor-paginated)."""
+    try:
+        return await scores.leaderboard(jd_hash, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/scores/{score_id}/raw")
+async def score_raw_response(score_id: str):
+    """The raw Gemini payload behind a score (stored compressed in ``llm_responses``)."""
+    if not ObjectId.is_valid(score_id):
+        raise HTTPException(status_code=400, detail="Invalid score id")
+    raw = await scores.get_raw_response(score_id)
+    if raw is None:
+        raise HTTPException(status_code=404, detail="No raw response stored for this score")
+    return raw
@@ -0,0 +1,117 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple, Union
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+
+# Seconds; spans a cached Mongo read up to a slow multi-page Gemini call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "HTTP request latency until the response starts",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+# stage: pdf_extract, ner, parse, store, score. outcome: ok/error, or for
+# parse the source (gemini, combined, fallback, cache) and for score how it
+# was produced (gemini, combined, cached, fallback)
+STAGE_SECONDS = Histogram(
+    "resume_stage_seconds", "Upload pipeline stage latency",
+    ["stage", "outcome"], buckets=LATENCY_BUCKETS
+)
+# kind: parse, score, combined. outcome: ok, invalid_json, error
+GEMINI_CALL_SECONDS = Histogram(
+    "gemini_call_seconds", "Gemini call latency including scheduler queueing and retries",
+    ["kind", "outcome"], buckets=LATENCY_BUCKETS
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_seconds", "MongoDB command latency (driver command monitoring)",
+    ["command", "outcome"], buckets=LATENCY_BUCKETS
+)
+WORKER_QUEUE_WAIT_SECONDS = Histogram(
+    "worker_queue_wait_seconds", "Wait for a CPU worker pool slot", buckets=LATENCY_BUCKETS
+)
+JOBS_IN_QUEUE = Gauge("jobs_in_queue", "Jobs in the jobs collection by status (refreshed per scrape)", ["status"])
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the block's duration. The yielded dict's ``outcome`` labels it.
+
+    ``outcome`` starts as "ok" and becomes "error" if the block raises
+    without having set it.
+    """
+    result = {"outcome": "ok"}
+    start = time.perf_counter()
+    try:
+        yield result
+    except BaseException:
+        if result["outcome"] == "ok":
+            result["outcome"] = "error"
+        raise
+    finally:
+        histogram.labels(**labels, outcome=result["outcome"]).observe(time.perf_counter() - start)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Feeds MONGO_COMMAND_SECONDS; passed to the client as an event listener."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.labels(event.command_name, "ok").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.labels(event.command_name, "error").observe(event.duration_micros / 1e6)
+
+
+GaugeValue = Union[float, Dict[str, float]]
+
+
+class SnapshotCollector:
+    """Gauges read from in-process snapshots (queue depths, in-flight work) at scrape time.
+
+    ``fn`` returns a number, or a dict of numbers keyed by the value of the
+    gauge's single label.
+    """
+
+    def __init__(self):
+        self._gauges: List[Tuple[str, str, str, Callable[[], GaugeValue]]] = []
+
+    def gauge(self, name: str, documentation: str, fn: Callable[[], GaugeValue], label: str = ""):
+        self._gauges.append((name, documentation, label, fn))
+
+    def collect(self):
+        for name, documentation, label, fn in self._gauges:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if label:
+                family = GaugeMetricFamily(name, documentation, labels=[label])
+                for key, v in value.items():
+                    family.add_metric([str(key)], v)
+            else:
+                family = GaugeMetricFamily(name, documentation, value=value)
+            yield family
+
+
+snapshot_gauges = SnapshotCollector()
+REGISTRY.register(snapshot_gauges)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """The exposition text and its content type.
+
+    With PROMETHEUS_MULTIPROC_DIR set (several uvicorn workers), the
+    histograms of all worker processes are merged; the snapshot gauges then
+    only cover the process that answers the scrape and are left out.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
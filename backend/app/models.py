@@ -1,8 +1,53 @@
 
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Any
+import re
+from email_validator import validate_email, EmailNotValidError
+from pydantic import BaseModel, Field, EmailStr, validator
+from typing import List, Optional, Any, Dict
 from datetime import datetime
 
+NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+
+def _first_number(value) -> Optional[float]:
+    """5, "5", "5.5 years", "approx. 3 yrs" -> float; anything else -> None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER_RE.search(str(value))
+    return float(match.group(0)) if match else None
+
+
+def _string_list(value) -> List[str]:
+    """Accept a list or a comma/semicolon separated string; drop blanks and non-strings."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[,;\n]", value)
+    if not isinstance(value, list):
+        return []
+    out = []
+    for item in value:
+        if isinstance(item, (int, float)) and not isinstance(item, bool):
+            item = str(item)
+        if isinstance(item, str) and item.strip():
+            out.append(item.strip())
+    return out
+
+
+def _entries(value, key: str) -> List[Dict]:
+    """Entry lists from the LLM may hold bare strings; wrap them as ``{key: text}``."""
+    if not isinstance(value, list):
+        return []
+    out = []
+    for item in value:
+        if isinstance(item, dict):
+            out.append(item)
+        elif isinstance(item, str) and item.strip():
+            out.append({key: item.strip()})
+    return out
+
 class ParsedExperience(BaseModel):
     title: Optional[str]
     company: Optional[str]
@@ -23,17 +68,81 @@ class ParsedResume(BaseModel):
     experience: List[ParsedExperience] = []
     total_experience_years: Optional[float] = None
 
+    class Config:
+        anystr_strip_whitespace = True
+
+    @validator("email", pre=True)
+    def _tolerant_email(cls, v):
+        # A malformed address should not reject the whole parse
+        if not isinstance(v, str):
+            return None
+        match = EMAIL_RE.search(v)
+        if not match:
+            return None
+        try:
+            validate_email(match.group(0), check_deliverability=False)
+        except EmailNotValidError:
+            return None
+        return match.group(0)
+
+    @validator("name", "phone", pre=True)
+    def _optional_text(cls, v):
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            return str(v)
+        return v if isinstance(v, str) and v.strip() else None
+
+    @validator("skills", pre=True)
+    def _skills(cls, v):
+        return _string_list(v)
+
+    @validator("education", pre=True)
+    def _education(cls, v):
+        return _entries(v, "degree")
+
+    @validator("experience", pre=True)
+    def _experience(cls, v):
+        return _entries(v, "title")
+
+    @validator("total_experience_years", pre=True)
+    def _years(cls, v):
+        return _first_number(v)
+
 class ScoreResult(BaseModel):
     score: float
     justification: List[str]
     matched_skills: List[str] = []
     missing_skills: List[str] = []
     evidence: List[str] = []
-    raw_llm_response: Optional[Any] = None
+    cached: bool = False
+
+    @validator("score", pre=True)
+    def _score(cls, v):
+        # "78", "78/100", "78%" -> 78.0, clamped to 0..100
+        number = _first_number(v)
+        return min(100.0, max(0.0, number)) if number is not None else 0.0
+
+    @validator("matched_skills", "missing_skills", pre=True)
+    def _skill_lists(cls, v):
+        return _string_list(v)
+
+    @validator("justification", "evidence", pre=True)
+    def _sentence_lists(cls, v):
+        # A lone string is one sentence, not a comma separated list
+        return _string_list([v] if isinstance(v, str) else v)
 
 class ResumeDocument(BaseModel):
     filename: str
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
     text: str
     parsed: ParsedResume
-    scores: List[ScoreResult] = []
+
+class BatchScoreRequest(BaseModel):
+    job_description: str
+    resume_ids: Optional[List[str]] = None
+    filter: Optional[Dict[str, Any]] = None
+    top_k: int = 20
+    concurrency: Optional[int] = None
+    # Only LLM-score the N resumes closest to the JD in the embedding index
+    prefilter_top_n: Optional[int] = None
+    # "gemini", or "local" to rank with the local BM25 scorer (no LLM calls)
+    ranker: str = "gemini"
@@ -1,31 +1,118 @@
+import os
 import re
-from typing import List, Dict
-import spacy
-from rapidfuzz import fuzz
-from .gemini_client import parse_resume_with_gemini
+import asyncio
+import logging
+import threading
+from typing import List, Dict, Optional, Tuple
+from dotenv import load_dotenv
+from .gemini_client import parse_resume_with_gemini, parse_and_score_with_gemini, GEMINI_API_KEY
+from .scheduler import PRIORITY_INTERACTIVE
+from .skills import skill_matcher
+from .workers import extract_person_name, WorkerPoolBusy
+from .models import ParsedResume
 
-nlp = spacy.load("en_core_web_sm")
+load_dotenv()
 
-BASE_SKILLS = [
-    "python", "fastapi", "flask", "django", "nlp", "machine learning",
-    "pytorch", "tensorflow", "scikit-learn", "sql", "mongodb", "docker", "aws",
-    "keras", "linux", "git", "javascript", "react", "java", "c++", "c#", "html",
-    "css", "typescript", "node.js", "vue", "angular", "spark", "hadoop"
-]
+logger = logging.getLogger(__name__)
+
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+# Only the NER component is used (extract_name). The trained English
+# pipelines give it its own tok2vec, so everything else can be left out.
+SPACY_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """The spaCy pipeline, loaded on first use.
+
+    spaCy is imported here too, so processes that never reach the fallback
+    parser or name extraction do not pay for it. Safe to call from the
+    thread pool: the first caller loads, concurrent callers wait for it.
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+    return _nlp
+
+def nlp_loaded() -> bool:
+    return _nlp is not None
+
+EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+PHONE_RE = re.compile(r"(\+?\d{1,3}[\s-]?)?(\d{10}|\d{3}[\s-]\d{3}[\s-]\d{4})")
+EDU_RE = re.compile(
+    r"\b(?:Bachelor|Master)\w*|\b(?:B\.Tech|BTech|BSc|BA|M\.Tech|MTech|MSc|MA|MBA|PhD|Doctorate)\b",
+    re.IGNORECASE
+)
+EXP_RE = re.compile(
+    r"\b(?:Engineer|Developer|Intern|Manager|Scientist|Analyst|Lead|Consultant|Specialist)\b",
+    re.IGNORECASE
+)
+YEAR_RE = re.compile(r"(?:20|19)\d{2}")
+MONTH_DATE_RE = re.compile(r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s*\d{4}")
+NAME_REJECT_RE = re.compile(r"[\d@]")
+
+def _phone_from_match(match) -> str:
+    return "".join(g or "" for g in match.groups()).strip()
 
 def extract_email(text: str) -> str:
-    matches = re.findall(r"[\w\.-]+@[\w\.-]+\.\w+", text)
-    return matches[0] if matches else None
+    match = EMAIL_RE.search(text)
+    return match.group(0) if match else None
 
 def extract_phone(text: str) -> str:
-    matches = re.findall(r"(\+?\d{1,3}[\s-]?)?(\d{10}|\d{3}[\s-]\d{3}[\s-]\d{4})", text)
-    if matches:
-        phone = "".join(matches[0])
-        return phone.strip()
-    return None
+    match = PHONE_RE.search(text)
+    return _phone_from_match(match) if match else None
+
+def scan_resume_lines(text: str) -> Dict:
+    """Single pass over the resume lines for the rule-based fields.
+
+    Returns email, phone (first occurrence), education and experience
+    entries. A line matching a degree/title keyword becomes an entry and
+    the following line is taken as its institution/company.
+    """
+    lines = text.splitlines()
+    last = len(lines) - 1
+    email = phone = None
+    education, experience = [], []
+    for i, line in enumerate(lines):
+        if email is None:
+            match = EMAIL_RE.search(line)
+            if match:
+                email = match.group(0)
+        if phone is None:
+            match = PHONE_RE.search(line)
+            if match:
+                phone = _phone_from_match(match)
+        is_edu = EDU_RE.search(line) is not None
+        is_exp = EXP_RE.search(line) is not None
+        if not (is_edu or is_exp):
+            continue
+        stripped = line.strip()
+        following = lines[i + 1].strip() if i < last else None
+        if is_edu:
+            year = YEAR_RE.search(line)
+            education.append({"degree": stripped, "institution": following, "year": year.group(0) if year else None})
+        if is_exp:
+            dates = MONTH_DATE_RE.findall(line)
+            experience.append({
+                "title": stripped,
+                "company": following,
+                "from_date": dates[0] if dates else None,
+                "to_date": dates[1] if len(dates) > 1 else None
+            })
+    return {"email": email, "phone": phone, "education": education, "experience": experience}
+
+def extract_education(text: str) -> List[Dict]:
+    return scan_resume_lines(text)["education"]
+
+def extract_experience(text: str) -> List[Dict]:
+    return scan_resume_lines(text)["experience"]
 
 def extract_name(text: str) -> str:
-    doc = nlp(text[:1000])
+    doc = get_nlp()(text[:1000])
     for ent in doc.ents:
         if ent.label_ == "PERSON":
             name = ent.text.strip()
@@ -33,92 +120,99 @@ def extract_name(text: str) -> str:
                 return name
     for line in text.splitlines():
         line = line.strip()
-        if line and not re.search(r"[\d@]", line) and len(line.split()) <= 4:
+        if line and not NAME_REJECT_RE.search(line) and len(line.split()) <= 4:
             return line
     return None
 
-async def parse_resume_text(text: str) -> Dict:
+async def parse_resume_text(text: str, priority: int = PRIORITY_INTERACTIVE) -> Dict:
     """Parse resume text using Gemini AI with fallback to rule-based parsing"""
-    
+    parsed, _ = await parse_resume_text_with_source(text, priority)
+    return parsed
+
+async def parse_resume_text_with_source(text: str, priority: int = PRIORITY_INTERACTIVE,
+                                        name_task: Optional[asyncio.Task] = None) -> Tuple[Dict, str]:
+    """Like parse_resume_text, but also returns which parser produced the result ("gemini" or "fallback").
+
+    ``name_task`` is an already running extract_person_name over the start of
+    the resume (see upload_resume); it is used instead of running NER again.
+    """
+    try:
+        return await _parse_resume_text(text, priority, name_task)
+    finally:
+        if name_task is not None and not name_task.done():
+            name_task.cancel()
+
+def _log_gemini_failure(message: str, error: Exception):
+    # Without an API key every upload takes the fallback; that is not worth a warning
+    if GEMINI_API_KEY:
+        logger.warning(message, extra={"error": str(error)})
+    else:
+        logger.debug(message, extra={"error": str(error), "sample": True})
+
+async def _person_name(text: str, name_task: Optional[asyncio.Task]) -> Optional[str]:
+    if name_task is not None:
+        return await name_task
+    return await extract_person_name(text)
+
+async def _parse_resume_text(text: str, priority: int, name_task: Optional[asyncio.Task]) -> Tuple[Dict, str]:
+
     # Try Gemini parsing first
     try:
-        print("🔄 Attempting to parse resume with Gemini...")
-        parsed = await parse_resume_with_gemini(text)
-        print("✅ Successfully parsed resume with Gemini")
-        
-        # Ensure all required fields are present
-        parsed.setdefault("name", extract_name(text))
-        parsed.setdefault("email", extract_email(text))
-        parsed.setdefault("phone", extract_phone(text))
-        parsed.setdefault("skills", [])
-        parsed.setdefault("education", [])
-        parsed.setdefault("experience", [])
-        parsed.setdefault("total_experience_years", None)
-        
-        return parsed
+        parsed = await parse_resume_with_gemini(text, priority)
+        return await _complete_gemini_parse(parsed, text, name_task), "gemini"
         
+    except WorkerPoolBusy:
+        raise
     except Exception as e:
-        print(f"❌ Gemini parsing failed, falling back to rule-based parser: {e}")
-        return await fallback_parse_resume_text(text)
+        _log_gemini_failure("Gemini parsing failed, falling back to rule-based parser", e)
+        return await fallback_parse_resume_text(text, name_task), "fallback"
 
-async def fallback_parse_resume_text(text: str) -> Dict:
+async def _complete_gemini_parse(parsed: Dict, text: str, name_task: Optional[asyncio.Task]) -> Dict:
+    # Gemini output is already validated into ParsedResume; fill what it left empty
+    if not parsed.get("name"):
+        parsed["name"] = await _person_name(text, name_task)
+    if not parsed.get("email"):
+        parsed["email"] = extract_email(text)
+    if not parsed.get("phone"):
+        parsed["phone"] = extract_phone(text)
+    return parsed
+
+async def parse_and_score_resume_text(text: str, job_description: str, priority: int = PRIORITY_INTERACTIVE,
+                                      name_task: Optional[asyncio.Task] = None) -> Tuple[Dict, str, Optional[Dict]]:
+    """Parse and score with the combined Gemini prompt: (parsed, "combined", score).
+
+    If the combined call fails, falls back to parse_resume_text_with_source
+    and returns (parsed, source, None); the caller then scores separately.
+    """
+    try:
+        try:
+            parsed, score = await parse_and_score_with_gemini(text, job_description, priority)
+            return await _complete_gemini_parse(parsed, text, name_task), "combined", score
+        except WorkerPoolBusy:
+            raise
+        except Exception as e:
+            _log_gemini_failure("Combined Gemini call failed, parsing and scoring separately", e)
+        parsed, source = await _parse_resume_text(text, priority, name_task)
+        return parsed, source, None
+    finally:
+        if name_task is not None and not name_task.done():
+            name_task.cancel()
+
+async def fallback_parse_resume_text(text: str, name_task: Optional[asyncio.Task] = None) -> Dict:
     """Fallback rule-based parser when Gemini fails"""
-    EDU_PATTERNS = [
-        r"(Bachelor|B\.Tech|BTech|BSc|BA)", 
-        r"(Master|M\.Tech|MTech|MSc|MA|MBA)", 
-        r"(PhD|Doctorate)"
-    ]
-
-    EXP_KEYWORDS = r"\b(Engineer|Developer|Intern|Manager|Scientist|Analyst|Lead|Consultant|Specialist)\b"
-
-    def extract_education(text: str) -> List[Dict]:
-        education = []
-        lines = text.splitlines()
-        for i, line in enumerate(lines):
-            for pattern in EDU_PATTERNS:
-                if re.search(pattern, line, re.IGNORECASE):
-                    degree = line.strip()
-                    institution = lines[i + 1].strip() if i + 1 < len(lines) else None
-                    year_match = re.search(r"(20\d{2}|19\d{2})", line)
-                    year = year_match.group(0) if year_match else None
-                    education.append({"degree": degree, "institution": institution, "year": year})
-                    break
-        return education
-
-    def extract_experience(text: str) -> List[Dict]:
-        experience = []
-        lines = text.splitlines()
-        for i, line in enumerate(lines):
-            if re.search(EXP_KEYWORDS, line, re.IGNORECASE):
-                title = line.strip()
-                company = lines[i + 1].strip() if i + 1 < len(lines) else None
-                from_date, to_date = None, None
-                date_match = re.findall(r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s*\d{4}", line)
-                if len(date_match) >= 1:
-                    from_date = date_match[0]
-                    if len(date_match) >= 2:
-                        to_date = date_match[1]
-                experience.append({"title": title, "company": company, "from_date": from_date, "to_date": to_date})
-        return experience
-
-    def extract_skills(text: str, top_k=15) -> List[str]:
-        text_lower = text.lower()
-        found = set()
-        for skill in BASE_SKILLS:
-            if skill.lower() in text_lower:
-                found.add(skill)
-            else:
-                for word in text_lower.split():
-                    if fuzz.ratio(skill.lower(), word) > 85:
-                        found.add(skill)
-        return list(found)[:top_k]
-
-    name = extract_name(text)
-    email = extract_email(text)
-    phone = extract_phone(text)
-    education = extract_education(text)
-    experience = extract_experience(text)
-    skills = extract_skills(text)
+    return _rule_based_fields(text, await _person_name(text, name_task))
+
+def rule_based_parse(text: str) -> Dict:
+    """fallback_parse_resume_text in the calling thread (for worker processes, e.g. bulk ingestion)."""
+    return _rule_based_fields(text, extract_name(text))
+
+def _rule_based_fields(text: str, name: Optional[str]) -> Dict:
+    scanned = scan_resume_lines(text)
+    email = scanned["email"]
+    phone = scanned["phone"]
+    education = scanned["education"]
+    experience = scanned["experience"]
+    skills = skill_matcher.extract(text, 15)
 
     parsed = {
         "name": name,
@@ -130,13 +224,10 @@ async def fallback_parse_resume_text(text: str) -> Dict:
         "total_experience_years": None
     }
 
-    print("---- DEBUG FALLBACK RESUME PARSER ----")
-    print("Name:", name)
-    print("Email:", email)
-    print("Phone:", phone)
-    print("Skills:", skills)
-    print("Education:", education[:2])
-    print("Experience:", experience[:2])
-    print("-----------------------------")
+    # Counts only, no personal data
+    logger.debug("Fallback parse", extra={
+        "skills": len(skills), "education": len(education), "experience": len(experience),
+        "has_name": bool(name), "has_email": bool(email), "has_phone": bool(phone), "sample": True
+    })
 
-    return parsed
\ No newline at end of file
+    return ParsedResume.parse_obj(parsed).dict()
\ No newline at end of file
@@ -1,13 +1,110 @@
-import fitz 
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Iterable, Iterator, List, Optional, Union
+import fitz
+from dotenv import load_dotenv
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
-    """Extract readable text from a PDF file."""
-    text = ""
+load_dotenv()
+
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "30"))
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", str(10 * 1024 * 1024)))
+PDF_SKIP_IMAGE_PAGES = os.getenv("PDF_SKIP_IMAGE_PAGES", "1") not in ("0", "false", "no")
+
+
+# Raw PDF bytes or the path of a spooled upload
+PDFSource = Union[bytes, str]
+
+
+class PDFExtractionError(Exception):
+    """The upload is not a readable PDF or has no extractable text."""
+
+
+@dataclass
+class PageText:
+    number: int
+    text: str
+    seconds: float
+    skipped: bool = False
+
+
+@dataclass
+class ExtractionResult:
+    text: str
+    pages: List[PageText]
+    total_pages: int
+
+    @property
+    def truncated(self) -> bool:
+        return self.total_pages > len(self.pages)
+
+    def summary(self) -> dict:
+        return {
+            "total_pages": self.total_pages,
+            "extracted_pages": len(self.pages),
+            "skipped_pages": [p.number for p in self.pages if p.skipped],
+            "truncated": self.truncated,
+            "seconds": round(sum(p.seconds for p in self.pages), 4),
+            "page_timings": [
+                {k: v for k, v in asdict(p).items() if k != "text"} for p in self.pages
+            ],
+        }
+
+
+def _open(source: PDFSource):
     try:
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text("text")
+        size = os.path.getsize(source) if isinstance(source, str) else len(source)
+        if size > MAX_PDF_BYTES:
+            raise PDFExtractionError(f"PDF is larger than {MAX_PDF_BYTES} bytes")
+        if isinstance(source, str):
+            return fitz.open(source, filetype="pdf")
+        return fitz.open(stream=source, filetype="pdf")
+    except PDFExtractionError:
+        raise
     except Exception as e:
-        print("PDF extraction error:", e)
-        return ""
-    return text.strip()
+        raise PDFExtractionError(f"Could not open PDF: {e}")
+
+
+def pdf_page_count(source: PDFSource) -> int:
+    """Total number of pages in the PDF (extraction stops at MAX_PDF_PAGES)."""
+    with _open(source) as doc:
+        return doc.page_count
+
+
+def _is_image_only(page) -> bool:
+    # No fonts but some images: a scanned page, nothing for get_text to find
+    return not page.get_fonts() and bool(page.get_images())
+
+
+def iter_pdf_pages(source: PDFSource, start: int = 0, stop: Optional[int] = None) -> Iterator[PageText]:
+    """Yield the text of pages ``start``..``stop`` (never beyond MAX_PDF_PAGES) one at a time."""
+    with _open(source) as doc:
+        stop = min(doc.page_count if stop is None else stop, doc.page_count, MAX_PDF_PAGES)
+        for number in range(start, stop):
+            began = time.perf_counter()
+            try:
+                page = doc.load_page(number)
+                if PDF_SKIP_IMAGE_PAGES and _is_image_only(page):
+                    yield PageText(number, "", time.perf_counter() - began, skipped=True)
+                    continue
+                text = page.get_text("text")
+            except Exception as e:
+                raise PDFExtractionError(f"Failed to read page {number + 1}: {e}")
+            yield PageText(number, text, time.perf_counter() - began)
+
+
+def extract_pages(source: PDFSource, start: int, stop: int) -> List[PageText]:
+    """A page range as a list (the unit of work handed to a worker process)."""
+    return list(iter_pdf_pages(source, start, stop))
+
+
+def join_pages(pages: Iterable[PageText]) -> str:
+    return "".join(page.text for page in pages).strip()
+
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    """Extract readable text from a PDF file (first MAX_PDF_PAGES pages)."""
+    text = join_pages(iter_pdf_pages(pdf_bytes))
+    if not text:
+        raise PDFExtractionError("PDF contains no extractable text (scanned or image-only?)")
+    return text
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+from bson import ObjectId
+from .db import get_collection
+from .parser import parse_resume_text_with_source, parse_and_score_resume_text
+from .gemini_client import PARSE_PROMPT_VERSION, COMBINED_PROMPT_VERSION, GEMINI_COMBINED_MODE
+from .cache import parse_cache, parse_cache_key, score_resume_cached
+from .embeddings import embedding_index
+from .local_scorer import corpus_stats, document_features, local_score
+from .skills import vocabulary
+from .workers import extract_pdf
+from .pdf_utils import PDFExtractionError
+from .storage import SpooledUpload, delete_file, gridfs_enabled, store_text
+from .metrics import STAGE_SECONDS, timed
+from . import scores
+
+logger = logging.getLogger(__name__)
+
+resumes_col = get_collection("resumes")
+
+# Called as ``await progress(stage, data)`` after each pipeline stage
+ProgressCallback = Callable[[str, Dict], Awaitable[None]]
+
+
+async def _no_progress(stage: str, data: Dict):
+    pass
+
+
+def keyword_score(text: str, job_description: str, error: Exception, parsed: Optional[Dict] = None) -> Dict:
+    """Score with the local BM25 scorer, used when scoring raised."""
+    result = local_score(job_description, parsed=parsed, text=text)
+    result.update({"cached": False, "error": f"Gemini scoring failed: {str(error)}"})
+    return result
+
+
+def resume_document(filename: str, sha256: str, size: int, parsed: Dict, text: str,
+                    pdf_file_id: Optional[ObjectId] = None) -> Dict:
+    """A ``resumes`` document; with GridFS storage the caller adds ``text_file_id`` (store_text)."""
+    doc = {
+        "filename": filename,
+        "sha256": sha256,
+        "size": size,
+        "parsed": parsed,
+        "skill_ids": vocabulary.canonical_ids(parsed.get("skills"))
+    }
+    if gridfs_enabled():
+        # Keep the resume document small: PDF and text live in GridFS
+        doc["pdf_file_id"] = pdf_file_id
+        doc["text_length"] = len(text)
+    else:
+        doc["text"] = text
+    return doc
+
+
+def score_outcome(result: Dict) -> str:
+    """How a score was produced, for metrics: cached, gemini or fallback."""
+    if result.get("cached"):
+        return "cached"
+    if "error" in result or result.get("raw_llm_response") is None or "raw_text" in result:
+        return "fallback"
+    return "gemini"
+
+
+async def _cached_parse(pdf_hash: str, combined: bool) -> Optional[Dict]:
+    # Any cached Gemini parse of the same file will do; try the current mode's first
+    versions = (COMBINED_PROMPT_VERSION, PARSE_PROMPT_VERSION)
+    for version in (versions if combined else reversed(versions)):
+        cached = await parse_cache.get(parse_cache_key(pdf_hash, version))
+        if cached is not None:
+            return cached
+    return None
+
+
+async def process_upload(upload: SpooledUpload, job_description: str,
+                         progress: Optional[ProgressCallback] = None,
+                         combined: bool = GEMINI_COMBINED_MODE) -> Dict:
+    """Extract, parse, store and score a spooled upload.
+
+    With ``combined`` a single Gemini prompt returns both the parse and the
+    score. The resume id is generated up front so the resume insert runs
+    concurrently with scoring; the score is recorded once the resume is
+    stored, so a failed insert leaves no score behind. Reports the
+    ``extracted``, ``parsed``, ``stored`` and ``scored`` stages through
+    ``progress``. Raises PDFExtractionError for unreadable PDFs and
+    always removes the spooled file. GridFS files written for the upload
+    are deleted again when it fails (or is cancelled) before the resume is
+    stored.
+    """
+    # GridFS files only this upload refers to, by bucket; emptied once the resume document does
+    files = {"resume_pdfs": upload.pdf_file_id}
+    try:
+        return await _process_upload(upload, job_description, progress or _no_progress, combined, files)
+    except BaseException:
+        for bucket, file_id in files.items():
+            await delete_file(bucket, file_id)
+        raise
+
+
+async def _process_upload(upload: SpooledUpload, job_description: str, progress: ProgressCallback,
+                          combined: bool, files: Dict[str, Optional[ObjectId]]) -> Dict:
+    extraction = None
+    score_result = None
+
+    try:
+        cached = await _cached_parse(upload.sha256, combined)
+        if cached is not None:
+            text, parsed = cached["text"], cached["parsed"]
+            await progress("extracted", {"cached": True, "text_length": len(text)})
+            source = "cache"
+        else:
+            with timed(STAGE_SECONDS, stage="pdf_extract") as stage:
+                try:
+                    extraction, name_task = await extract_pdf(upload.path)
+                except PDFExtractionError:
+                    stage["outcome"] = "unreadable"
+                    raise
+            text = extraction.text
+            logger.info("Extracted PDF text", extra={
+                "text_length": len(text), "pages": extraction.total_pages, "sample": True
+            })
+            await progress("extracted", {**extraction.summary(), "text_length": len(text)})
+
+            with timed(STAGE_SECONDS, stage="parse") as stage:
+                if combined:
+                    parsed, source, score_result = await parse_and_score_resume_text(
+                        text, job_description, name_task=name_task
+                    )
+                else:
+                    parsed, source = await parse_resume_text_with_source(text, name_task=name_task)
+                stage["outcome"] = source
+            # Only cache real Gemini parses; a fallback result would otherwise pin
+            # the worse parse for this file until the entry expires.
+            if source in ("gemini", "combined"):
+                version = COMBINED_PROMPT_VERSION if source == "combined" else PARSE_PROMPT_VERSION
+                await parse_cache.set(
+                    parse_cache_key(upload.sha256, version),
+                    {"text": text, "parsed": parsed},
+                    prompt_version=version
+                )
+    finally:
+        upload.cleanup()
+    await progress("parsed", {"parsed": parsed, "source": source})
+
+    resume_id = ObjectId()
+    pdf_file_id = upload.pdf_file_id
+    previous = None
+    if gridfs_enabled():
+        previous = await resumes_col.find_one({"sha256": upload.sha256, "pdf_file_id": {"$ne": None}},
+                                              {"pdf_file_id": 1, "text_file_id": 1})
+    if previous is not None:
+        # A repeat upload: share the stored files instead of keeping second copies
+        await delete_file("resume_pdfs", files.pop("resume_pdfs"))
+        pdf_file_id = previous["pdf_file_id"]
+    doc = resume_document(upload.filename, upload.sha256, upload.size, parsed, text, pdf_file_id)
+    if extraction is not None:
+        summary = extraction.summary()
+        summary.pop("page_timings")
+        doc["extraction"] = summary
+
+    async def store():
+        with timed(STAGE_SECONDS, stage="store"):
+            if previous is not None and previous.get("text_file_id") is not None:
+                doc["text_file_id"] = previous["text_file_id"]
+            elif gridfs_enabled():
+                doc["text_file_id"] = files["resume_texts"] = await store_text(text, upload.filename)
+            # Upsert on the pre-generated id: one write, safe to repeat
+            await resumes_col.replace_one({"_id": resume_id}, doc, upsert=True)
+            files.clear()
+            if embedding_index.writable:  # elsewhere the writer's sync embeds it
+                await asyncio.to_thread(embedding_index.add_resumes, [str(resume_id)], [parsed])
+            await corpus_stats.record([document_features(text, parsed)])
+        await progress("stored", {"id": str(resume_id)})
+
+    async def score():
+        result = score_result
+        if result is None:
+            with timed(STAGE_SECONDS, stage="score") as stage:
+                # Try Gemini scoring
+                try:
+                    result = await score_resume_cached(parsed, job_description, text=text)
+                except Exception as e:
+                    result = keyword_score(text, job_description, e, parsed)
+                stage["outcome"] = score_outcome(result)
+        return result
+
+    score_task = asyncio.create_task(score())
+    try:
+        await store()
+    except BaseException:
+        score_task.cancel()
+        raise
+    final_score = await scores.record_score(str(resume_id), job_description, await score_task)
+    await progress("scored", {"id": str(resume_id), "score_result": final_score})
+
+    return {
+        "id": str(resume_id),
+        "parsed": parsed,
+        "parse_source": source,
+        "score_result": final_score,
+        "extraction": extraction.summary() if extraction is not None else {"cached": True}
+    }
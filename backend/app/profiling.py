@@ -0,0 +1,106 @@
+import os
+import time
+import random
+import logging
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the hook; otherwise requests slower than this many ms have their profile saved
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+# Share of requests run under the profiler (profiling slows them down)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.05"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILER = os.getenv("PROFILER", "auto").lower()  # auto | pyinstrument | cprofile
+
+
+def _pyinstrument_available() -> bool:
+    try:
+        import pyinstrument  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class SlowRequestProfiler:
+    """HTTP middleware that profiles a sample of requests and keeps the slow ones.
+
+    pyinstrument (when installed) follows the request across awaits and is
+    saved as HTML. cProfile records everything the event loop thread runs
+    while it is enabled, including other requests, and is saved as a
+    ``.prof`` file for ``python -m pstats`` or snakeviz. Only one request is
+    profiled at a time.
+    """
+
+    def __init__(self, slow_ms: float = PROFILE_SLOW_MS, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 directory: str = PROFILE_DIR, profiler: str = PROFILER):
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.directory = directory
+        if profiler == "auto":
+            profiler = "pyinstrument" if _pyinstrument_available() else "cprofile"
+        self.profiler = profiler
+        self._busy = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.slow_ms > 0
+
+    def _start(self):
+        if self.profiler == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            return profiler
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop(self, profiler):
+        if self.profiler == "pyinstrument":
+            profiler.stop()
+        else:
+            profiler.disable()
+
+    def _save(self, profiler, request, elapsed_ms: float) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        route = request.url.path.strip("/").replace("/", "_") or "root"
+        base = os.path.join(self.directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{route}-{int(elapsed_ms)}ms")
+        if self.profiler == "pyinstrument":
+            path = base + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        else:
+            path = base + ".prof"
+            profiler.dump_stats(path)
+        return path
+
+    async def __call__(self, request, call_next):
+        if self._busy or random.random() >= self.sample_rate:
+            return await call_next(request)
+        try:
+            profiler = self._start()
+        except Exception as e:
+            # e.g. another profiler is already active in this thread
+            logger.warning("Could not start the request profiler", extra={"error": str(e)})
+            return await call_next(request)
+        self._busy = True
+        start = time.perf_counter()
+        try:
+            return await call_next(request)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._stop(profiler)
+            self._busy = False
+            if elapsed_ms >= self.slow_ms:
+                try:
+                    path = self._save(profiler, request, elapsed_ms)
+                    logger.warning("Slow request profiled", extra={
+                        "method": request.method, "path": request.url.path,
+                        "elapsed_ms": round(elapsed_ms, 1), "profile": path
+                    })
+                except Exception as e:
+                    logger.warning("Saving request profile failed", extra={"error": str(e)})
@@ -0,0 +1,108 @@
+import os
+import time
+import uuid
+import asyncio
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Set
+import orjson
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROGRESS_TTL_SECONDS = int(os.getenv("PROGRESS_TTL_SECONDS", "900"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+TERMINAL_STAGES = ("done", "error")
+
+
+@dataclass
+class _Channel:
+    events: List[Dict] = field(default_factory=list)
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+    finished_at: Optional[float] = None
+
+
+class ProgressBroker:
+    """In-process pub/sub of pipeline stage events, keyed by upload id.
+
+    Every event is kept until the channel expires (PROGRESS_TTL_SECONDS after
+    its terminal ``done``/``error`` event), so late subscribers get a full
+    replay. State lives in this process only: clients must stream from the
+    API instance that accepted the upload.
+    """
+
+    def __init__(self, ttl_seconds: int = PROGRESS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._channels: Dict[str, _Channel] = {}
+
+    def _purge(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        for key in [k for k, ch in self._channels.items() if ch.finished_at and ch.finished_at < cutoff]:
+            del self._channels[key]
+
+    def create(self) -> str:
+        self._purge()
+        channel_id = uuid.uuid4().hex
+        self._channels[channel_id] = _Channel()
+        return channel_id
+
+    def exists(self, channel_id: str) -> bool:
+        return channel_id in self._channels
+
+    def publish(self, channel_id: str, stage: str, data: Dict):
+        channel = self._channels.get(channel_id)
+        if channel is None or channel.finished_at is not None:
+            return
+        event = {"stage": stage, "data": data, "at": time.time()}
+        channel.events.append(event)
+        if stage in TERMINAL_STAGES:
+            channel.finished_at = time.monotonic()
+        for queue in channel.subscribers:
+            queue.put_nowait(event)
+
+    def events(self, channel_id: str) -> Optional[List[Dict]]:
+        channel = self._channels.get(channel_id)
+        return list(channel.events) if channel is not None else None
+
+    async def subscribe(self, channel_id: str, keepalive: float = SSE_KEEPALIVE_SECONDS) -> AsyncIterator[Optional[Dict]]:
+        """Replay past events, then yield new ones until a terminal event.
+
+        Yields None after ``keepalive`` seconds without events.
+        """
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in channel.events:
+            queue.put_nowait(event)
+        channel.subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event["stage"] in TERMINAL_STAGES:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+
+    def snapshot(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "active": sum(1 for ch in self._channels.values() if ch.finished_at is None),
+            "subscribers": sum(len(ch.subscribers) for ch in self._channels.values())
+        }
+
+
+def sse_format(event: Optional[Dict]) -> str:
+    """One Server-Sent Events frame (a comment line for keepalives)."""
+    if event is None:
+        return ": keepalive\n\n"
+    payload = orjson.dumps(event["data"], default=str).decode("utf-8")
+    return f"event: {event['stage']}\ndata: {payload}\n\n"
+
+
+progress_broker = ProgressBroker()
@@ -0,0 +1,243 @@
+import os
+import re
+import orjson
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+from dotenv import load_dotenv
+from .scheduler import estimate_tokens
+
+load_dotenv()
+
+# Token budgets (~4 characters per token, see scheduler.estimate_tokens)
+PROMPT_RESUME_MAX_TOKENS = int(os.getenv("PROMPT_RESUME_MAX_TOKENS", "4000"))
+PROMPT_JD_MAX_TOKENS = int(os.getenv("PROMPT_JD_MAX_TOKENS", "1500"))
+# Short lines seen at least this often (page headers/footers) are kept once
+BOILERPLATE_MIN_REPEATS = int(os.getenv("BOILERPLATE_MIN_REPEATS", "3"))
+BOILERPLATE_MAX_LENGTH = 80
+
+# Part of the prompt version hashes: changing how inputs are compacted must
+# invalidate parses cached from the old inputs.
+COMPACTION_VERSION = f"compact-v2:{PROMPT_RESUME_MAX_TOKENS}:{PROMPT_JD_MAX_TOKENS}"
+
+TRUNCATION_MARKER = "[...]"
+
+SPACE_RE = re.compile(r"[ \t\u00a0\u200b\f\v]+")
+# "Page 2", "Page 2 of 3", "2 of 3", "- 2 -"; a bare number could be a year
+PAGE_NUMBER_RE = re.compile(r"^(?:page\s*\d+(?:\s*(?:of|/)\s*\d+)?|\d{1,3}\s*of\s*\d{1,3}|-\s*\d{1,3}\s*-)$", re.IGNORECASE)
+
+# Lower value = kept first when the resume is over budget
+SECTION_PRIORITY = {
+    "header": 0,
+    "experience": 1,
+    "skills": 1,
+    "education": 1,
+    "summary": 2,
+    "projects": 3,
+    "certifications": 4,
+    "publications": 5,
+    "awards": 5,
+    "languages": 5,
+    "other": 6,
+    "volunteering": 7,
+    "interests": 9,
+    "references": 9,
+}
+SECTION_HEADINGS = {
+    "experience": ("experience", "work experience", "professional experience", "employment", "work history", "career history"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "technologies", "tech stack", "competencies"),
+    "education": ("education", "academic background", "qualifications", "academics"),
+    "summary": ("summary", "profile", "professional summary", "objective", "career objective", "about me"),
+    "projects": ("projects", "personal projects", "key projects", "academic projects"),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "publications": ("publications", "research", "papers"),
+    "awards": ("awards", "achievements", "honors", "honours", "accomplishments"),
+    "languages": ("languages",),
+    "volunteering": ("volunteering", "volunteer experience", "extracurricular activities", "activities"),
+    "interests": ("interests", "hobbies", "hobbies and interests"),
+    "references": ("references", "referees"),
+}
+HEADING_OF = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+
+def strip_empty(value: Any) -> Any:
+    """Drop None, empty strings and empty lists/dicts, recursively."""
+    if isinstance(value, dict):
+        cleaned = {k: strip_empty(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        cleaned = [strip_empty(v) for v in value]
+        return [v for v in cleaned if v not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(value: Any) -> str:
+    return orjson.dumps(strip_empty(value), default=str).decode("utf-8")
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces per line and of blank lines."""
+    lines, blank = [], False
+    for line in text.splitlines():
+        line = SPACE_RE.sub(" ", line).strip()
+        if not line:
+            if lines and not blank:
+                lines.append("")
+            blank = True
+            continue
+        lines.append(line)
+        blank = False
+    return "\n".join(lines).strip()
+
+
+def drop_boilerplate(text: str) -> str:
+    """Remove page numbers and keep repeated short lines (running headers/footers) once."""
+    lines = text.split("\n")
+    counts = Counter(line for line in lines if line and len(line) <= BOILERPLATE_MAX_LENGTH)
+    seen, kept = set(), []
+    for line in lines:
+        if line and PAGE_NUMBER_RE.match(line):
+            continue
+        if counts.get(line, 0) >= BOILERPLATE_MIN_REPEATS:
+            if line in seen:
+                continue
+            seen.add(line)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def _heading(line: str):
+    key = line.strip().rstrip(":").strip().lower()
+    if len(key) > 40:
+        return None
+    return HEADING_OF.get(key)
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """(section name, text) in document order; text before the first heading is the header."""
+    sections, name, current = [], "header", []
+    for line in text.split("\n"):
+        heading = _heading(line)
+        if heading is not None:
+            if current:
+                sections.append((name, "\n".join(current)))
+            name, current = heading, [line]
+        else:
+            current.append(line)
+    if current:
+        sections.append((name, "\n".join(current)))
+    return sections
+
+
+def _cut_line(line: str, max_tokens: int) -> str:
+    """The longest start of ``line`` that fits in ``max_tokens``, cut at a word boundary."""
+    max_chars = max_tokens * 4 - 1  # estimate_tokens counts ~4 characters per token, plus the newline
+    if max_chars <= 0:
+        return ""
+    head = line[:max_chars]
+    if len(line) > max_chars and not line[max_chars].isspace():
+        space = head.rfind(" ")
+        if space > 0:
+            head = head[:space]
+    return head.rstrip()
+
+
+def _cut_to_budget(text: str, max_tokens: int) -> str:
+    """The lines of ``text`` that fit in ``max_tokens``; the first line that does not is cut inside."""
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line + "\n")
+        if used + cost > max_tokens:
+            partial = _cut_line(line, max_tokens - used)
+            if partial:
+                kept.append(partial)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def truncate_by_section(text: str, max_tokens: int) -> Tuple[str, List[str]]:
+    """Fit ``text`` into ``max_tokens`` keeping the most useful sections.
+
+    Sections are admitted tier by tier (SECTION_PRIORITY). Within a tier the
+    smallest sections go in whole first, so a long experience section cannot
+    push out a short skills list; the rest are cut at a word boundary into
+    whatever budget is left. Kept sections stay in document order. Returns
+    the text and the names of truncated or dropped sections.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text, []
+    sections = split_sections(text)
+    tiers: Dict[int, List[int]] = {}
+    for i, (name, _) in enumerate(sections):
+        tiers.setdefault(SECTION_PRIORITY.get(name, SECTION_PRIORITY["other"]), []).append(i)
+    kept: Dict[int, str] = {}
+    affected, budget = [], max_tokens
+    marker_cost = estimate_tokens(TRUNCATION_MARKER + "\n")
+    for priority in sorted(tiers):
+        oversized = []
+        costs = {i: estimate_tokens(sections[i][1] + "\n") for i in tiers[priority]}
+        for i in sorted(tiers[priority], key=costs.get):
+            cost = costs[i]
+            if cost <= budget:
+                kept[i] = sections[i][1]
+                budget -= cost
+            else:
+                oversized.append(i)
+        for i in oversized:
+            affected.append(sections[i][0])
+            partial = _cut_to_budget(sections[i][1], budget - marker_cost) if budget > marker_cost else ""
+            if partial:
+                kept[i] = partial + "\n" + TRUNCATION_MARKER
+                budget -= estimate_tokens(kept[i] + "\n")
+    return "\n".join(kept[i] for i in sorted(kept)), affected
+
+
+def compact_resume_text(text: str, max_tokens: int = PROMPT_RESUME_MAX_TOKENS) -> Tuple[str, Dict]:
+    """Whitespace-normalized, de-boilerplated resume text within the token budget."""
+    cleaned = drop_boilerplate(normalize_whitespace(text))
+    compacted, affected = truncate_by_section(cleaned, max_tokens)
+    return compacted, {"truncated_sections": affected}
+
+
+def compact_job_description(job_description: str, max_tokens: int = PROMPT_JD_MAX_TOKENS) -> Tuple[str, bool]:
+    """Whitespace-normalized job description within the token budget, and whether it was truncated."""
+    text = normalize_whitespace(job_description)
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARKER + "\n")
+    return _cut_to_budget(text, budget) + "\n" + TRUNCATION_MARKER, True
+
+
+class PromptStats:
+    """Estimated tokens per prompt kind, before and after compaction."""
+
+    def __init__(self):
+        self._kinds: Dict[str, Dict] = {}
+
+    def record(self, kind: str, raw_tokens: int, sent_tokens: int, truncated: bool):
+        s = self._kinds.setdefault(kind, {
+            "requests": 0, "raw_tokens": 0, "sent_tokens": 0, "truncated": 0, "max_sent_tokens": 0, "last_sent_tokens": 0
+        })
+        s["requests"] += 1
+        s["raw_tokens"] += raw_tokens
+        s["sent_tokens"] += sent_tokens
+        s["truncated"] += int(truncated)
+        s["max_sent_tokens"] = max(s["max_sent_tokens"], sent_tokens)
+        s["last_sent_tokens"] = sent_tokens
+
+    def snapshot(self) -> dict:
+        out = {}
+        for kind, s in self._kinds.items():
+            n = s["requests"]
+            out[kind] = {
+                **s,
+                "avg_sent_tokens": round(s["sent_tokens"] / n, 1) if n else 0.0,
+                "saved_ratio": round(1 - s["sent_tokens"] / s["raw_tokens"], 4) if s["raw_tokens"] else 0.0,
+            }
+        return out
+
+
+prompt_stats = PromptStats()
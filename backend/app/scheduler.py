@@ -0,0 +1,221 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional, TypeVar
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "300"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "0.5"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "30"))
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BACKGROUND: "background"}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+T = TypeVar("T")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) used for TPM budgeting."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Continuously refilling bucket sized for one minute of budget."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+class GeminiScheduler:
+    """Admission control for outbound Gemini requests.
+
+    Requests wait in a priority queue until a concurrency slot is free and
+    both the requests-per-minute and tokens-per-minute buckets allow them.
+    Interactive requests are always dispatched before background ones.
+    Retryable failures (429/5xx/transport errors) are retried with jittered
+    exponential backoff, honoring Retry-After when the server sends it.
+    """
+
+    def __init__(self, max_concurrency: int, rpm: int, tpm: int,
+                 max_retries: int, backoff_base: float, backoff_max: float):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._rpm = TokenBucket(rpm)
+        self._tpm = TokenBucket(tpm)
+        self._waiters = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "rate_limited_waits": 0,
+            "wait_seconds": {name: {"count": 0, "total": 0.0, "max": 0.0} for name in PRIORITY_NAMES.values()},
+        }
+
+    def _wake(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def _dispatch(self):
+        while self._waiters:
+            if self._in_flight >= self.max_concurrency:
+                return  # _release wakes us again
+            priority, _, tokens, fut = self._waiters[0]
+            if fut.done():  # waiter was cancelled
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(self._rpm.delay_for(1), self._tpm.delay_for(tokens))
+            if delay > 0:
+                self.stats["rate_limited_waits"] += 1
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(self._waiters)
+            self._rpm.consume(1)
+            self._tpm.consume(tokens)
+            self._in_flight += 1
+            fut.set_result(None)
+
+    async def _acquire(self, priority: int, tokens: int):
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, fut))
+        self._wake()
+        start = time.monotonic()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._release()
+            else:
+                fut.cancel()
+            raise
+        waited = time.monotonic() - start
+        bucket = self.stats["wait_seconds"][PRIORITY_NAMES.get(priority, "background")]
+        bucket["count"] += 1
+        bucket["total"] += waited
+        bucket["max"] = max(bucket["max"], waited)
+
+    def _release(self):
+        self._in_flight -= 1
+        if self._waiters:
+            self._wake()
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        if isinstance(exc, httpx.HTTPStatusError):
+            retry_after = _retry_after_seconds(exc.response)
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        # Full jitter: uniform in [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def run(self, request: Callable[[], Awaitable[T]], priority: int = PRIORITY_INTERACTIVE,
+                  tokens: int = 1) -> T:
+        """Run ``request`` under the scheduler's limits, retrying transient failures."""
+        attempt = 0
+        while True:
+            await self._acquire(priority, tokens)
+            self.stats["requests"] += 1
+            try:
+                return await request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self.stats["failures"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self._release()
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def snapshot(self) -> dict:
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, fut in self._waiters:
+            if not fut.done():
+                depth[PRIORITY_NAMES.get(priority, "background")] += 1
+        waits = {
+            name: {
+                "count": w["count"],
+                "avg_seconds": round(w["total"] / w["count"], 4) if w["count"] else 0.0,
+                "max_seconds": round(w["max"], 4),
+            }
+            for name, w in self.stats["wait_seconds"].items()
+        }
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": depth,
+            "wait": waits,
+            "requests": self.stats["requests"],
+            "retries": self.stats["retries"],
+            "failures": self.stats["failures"],
+            "rate_limited_waits": self.stats["rate_limited_waits"],
+        }
+
+
+gemini_scheduler = GeminiScheduler(
+    max_concurrency=GEMINI_MAX_CONCURRENCY,
+    rpm=GEMINI_RPM,
+    tpm=GEMINI_TPM,
+    max_retries=GEMINI_MAX_RETRIES,
+    backoff_base=GEMINI_BACKOFF_BASE,
+    backoff_max=GEMINI_BACKOFF_MAX,
+)
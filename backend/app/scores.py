@@ -0,0 +1,178 @@
+import zlib
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import orjson
+from bson import Binary, ObjectId
+from .db import get_collection
+from .cache import normalize_job_description
+from .models import ScoreResult
+
+# One document per scoring call; the raw Gemini payload of a score lives in
+# llm_responses under the same _id so history/leaderboard reads stay small.
+scores_col = get_collection("scores")
+llm_responses_col = get_collection("llm_responses")
+
+RAW_KEYS = ("raw_llm_response", "raw_text")
+EPOCH = datetime(1970, 1, 1)
+
+
+def jd_hash(job_description: str) -> str:
+    """Stable id of a job description (whitespace-insensitive)."""
+    return hashlib.sha256(normalize_job_description(job_description).encode("utf-8")).hexdigest()
+
+
+async def ensure_indexes():
+    await scores_col.create_index([("resume_id", 1), ("jd_hash", 1), ("created_at", -1)])
+    await scores_col.create_index([("jd_hash", 1), ("score", -1)])
+
+
+def compress_payload(payload) -> Binary:
+    return Binary(zlib.compress(orjson.dumps(payload, default=str)))
+
+
+def decompress_payload(blob: bytes):
+    return orjson.loads(zlib.decompress(blob))
+
+
+def build_score_docs(resume_id: str, job_description: str, result: Dict,
+                     **fields) -> Tuple[Dict, Optional[Dict]]:
+    """Split a scoring result into a ``scores`` document and its raw payload document (or None).
+
+    ``fields`` (e.g. ``batch_job_id``) are stored on the score document.
+    """
+    score_id = ObjectId()
+    raw = {key: result[key] for key in RAW_KEYS if result.get(key) is not None}
+    doc = ScoreResult(
+        score=result.get("score") or 0,
+        justification=result.get("justification", []),
+        matched_skills=result.get("matched_skills", []),
+        missing_skills=result.get("missing_skills", []),
+        evidence=result.get("evidence", []),
+        cached=result.get("cached", False),
+    ).dict()
+    doc.update({
+        "_id": score_id,
+        "resume_id": ObjectId(resume_id),
+        "jd_hash": jd_hash(job_description),
+        "created_at": datetime.utcnow(),
+        "has_raw": bool(raw),
+        **fields
+    })
+    if "error" in result:
+        doc["error"] = result["error"]
+    raw_doc = {"_id": score_id, "payload": compress_payload(raw)} if raw else None
+    return doc, raw_doc
+
+
+async def record_score(resume_id: str, job_description: str, result: Dict, **fields) -> Dict:
+    """Store one score (and its compressed raw payload); returns it in API form."""
+    doc, raw_doc = build_score_docs(resume_id, job_description, result, **fields)
+    if raw_doc is not None:
+        await llm_responses_col.insert_one(raw_doc)
+    await scores_col.insert_one(doc)
+    return serialize_score(doc)
+
+
+async def record_scores(entries: Iterable[Tuple[Dict, Optional[Dict]]]):
+    """Bulk insert pairs produced by build_score_docs (used by batch scoring)."""
+    docs, raw_docs = [], []
+    for doc, raw_doc in entries:
+        docs.append(doc)
+        if raw_doc is not None:
+            raw_docs.append(raw_doc)
+    if raw_docs:
+        await llm_responses_col.insert_many(raw_docs, ordered=False)
+    if docs:
+        await scores_col.insert_many(docs, ordered=False)
+
+
+def serialize_score(doc: Dict) -> Dict:
+    doc = dict(doc)
+    doc["id"] = str(doc.pop("_id"))
+    doc["resume_id"] = str(doc["resume_id"])
+    return doc
+
+
+def _encode_cursor(value, oid: ObjectId) -> str:
+    if isinstance(value, datetime):
+        value = (value - EPOCH) // timedelta(milliseconds=1)
+    return f"{value}:{oid}"
+
+
+def _after_cursor(cursor: str, field: str, as_datetime: bool) -> Dict:
+    """Keyset condition for documents after ``cursor`` in ``field`` desc, ``_id`` desc order."""
+    try:
+        value, oid = cursor.split(":", 1)
+        value = EPOCH + timedelta(milliseconds=int(value)) if as_datetime else float(value)
+        oid = ObjectId(oid)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return {"$or": [{field: {"$lt": value}}, {field: value, "_id": {"$lt": oid}}]}
+
+
+async def _page(query: Dict, field: str, limit: int, cursor: Optional[str], as_datetime: bool) -> Dict:
+    if cursor:
+        query = {"$and": [query, _after_cursor(cursor, field, as_datetime)]}
+    docs = await scores_col.find(query).sort([(field, -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = _encode_cursor(docs[-1][field], docs[-1]["_id"])
+    return {"items": [serialize_score(d) for d in docs], "next_cursor": next_cursor}
+
+
+async def score_history(resume_id: str, job_hash: Optional[str] = None,
+                        limit: int = 20, cursor: Optional[str] = None) -> Dict:
+    """Scores of one resume, newest first, optionally for a single JD."""
+    query = {"resume_id": ObjectId(resume_id)}
+    if job_hash:
+        query["jd_hash"] = job_hash
+    return await _page(query, "created_at", limit, cursor, as_datetime=True)
+
+
+async def leaderboard(job_hash: str, limit: int = 20, cursor: Optional[str] = None) -> Dict:
+    """Scores for one JD, best first (one entry per scoring call)."""
+    return await _page({"jd_hash": job_hash}, "score", limit, cursor, as_datetime=False)
+
+
+async def latest_scores(resume_id: str, limit: int) -> List[Dict]:
+    if limit <= 0:
+        return []
+    return (await score_history(resume_id, limit=limit))["items"]
+
+
+async def get_raw_response(score_id: str) -> Optional[Dict]:
+    doc = await llm_responses_col.find_one({"_id": ObjectId(score_id)})
+    if not doc:
+        return None
+    return decompress_payload(doc["payload"])
+
+
+async def migrate_embedded_scores(batch_size: int = 500) -> int:
+    """Move legacy ``resumes.scores`` arrays into the scores collection."""
+    resumes_col = get_collection("resumes")
+    moved = 0
+    cursor = resumes_col.find({"scores.0": {"$exists": True}}, {"scores": 1}).batch_size(batch_size)
+    async for resume in cursor:
+        entries = []
+        for legacy in resume["scores"]:
+            doc, raw_doc = build_score_docs(str(resume["_id"]), "", legacy)
+            # The JD of embedded scores was never stored
+            doc["jd_hash"] = None
+            doc["created_at"] = resume["_id"].generation_time.replace(tzinfo=None)
+            entries.append((doc, raw_doc))
+        await record_scores(entries)
+        await resumes_col.update_one({"_id": resume["_id"]}, {"$unset": {"scores": ""}})
+        moved += len(entries)
+    return moved
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    async def _main():
+        await ensure_indexes()
+        print(f"Moved {await migrate_embedded_scores()} embedded scores into the scores collection")
+
+    asyncio.run(_main())
@@ -0,0 +1,64 @@
+import copy
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key starts ``fn`` as a task; callers arriving
+    while it runs await the same task and receive a deep copy of its result
+    (or the same exception). Nothing is kept once the task finishes, so this
+    only removes duplicate in-flight work, unlike a result cache. The task
+    is cancelled only when every waiting caller has been cancelled.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "max_waiters": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self.stats["calls"] += 1
+        flight = self._flights.get(key)
+        leader = flight is None
+        if leader:
+            self.stats["executions"] += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.stats["coalesced"] += 1
+        flight.waiters += 1
+        self.stats["max_waiters"] = max(self.stats["max_waiters"], flight.waiters)
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        # Callers may mutate what they get back; only the leader gets the original
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def snapshot(self) -> dict:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "in_flight": len(self._flights),
+            "coalesced_ratio": round(self.stats["coalesced"] / calls, 4) if calls else 0.0
+        }
@@ -0,0 +1,89 @@
+from typing import Dict, List
+from pymongo import UpdateOne
+from .db import get_collection
+from .skills import vocabulary, normalize_skill_text, learn_alias as apply_alias
+
+resumes_col = get_collection("resumes")
+aliases_col = get_collection("skill_aliases")
+
+
+async def ensure_indexes():
+    # multikey index: one entry per canonical skill id of every resume
+    await resumes_col.create_index("skill_ids")
+
+
+async def load_learned_aliases() -> int:
+    """Apply the aliases in ``skill_aliases`` to this process (called at startup)."""
+    count = 0
+    async for doc in aliases_col.find({}):
+        apply_alias(doc["_id"], doc["canonical"])
+        count += 1
+    return count
+
+
+async def learn_alias(alias: str, canonical: str):
+    """Persist an alias (e.g. "node" -> "node.js") and apply it immediately.
+
+    It applies to search and skill extraction in this process; other API and
+    job worker processes pick it up when they restart. Resumes indexed before
+    the alias existed keep their old ids until ``backfill_skill_ids(reindex=True)`` runs.
+    """
+    alias, canonical = normalize_skill_text(alias), normalize_skill_text(canonical)
+    await aliases_col.update_one({"_id": alias}, {"$set": {"canonical": canonical}}, upsert=True)
+    apply_alias(alias, canonical)
+
+
+async def search_by_skills(skills: List[str], min_overlap: int = 1, limit: int = 50) -> Dict:
+    """Resumes having any of ``skills``, sorted by how many they have."""
+    ids = vocabulary.canonical_ids(skills)
+    if not ids:
+        return {"skill_ids": [], "results": []}
+    min_overlap = max(1, min(min_overlap, len(ids)))
+    # Requiring every skill lets the index intersect postings directly
+    match = {"skill_ids": {"$all": ids}} if min_overlap == len(ids) else {"skill_ids": {"$in": ids}}
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "filename": 1,
+            "name": "$parsed.name",
+            "matched": {"$filter": {"input": "$skill_ids", "cond": {"$in": ["$$this", ids]}}}
+        }},
+        {"$addFields": {"overlap": {"$size": "$matched"}}},
+        {"$match": {"overlap": {"$gte": min_overlap}}},
+        {"$sort": {"overlap": -1, "_id": 1}},
+        {"$limit": limit}
+    ]
+    results = []
+    async for doc in resumes_col.aggregate(pipeline):
+        doc["id"] = str(doc.pop("_id"))
+        results.append(doc)
+    return {"skill_ids": ids, "results": results}
+
+
+async def backfill_skill_ids(reindex: bool = False, batch_size: int = 1000) -> int:
+    """Compute ``skill_ids`` for resumes missing it (or all resumes with reindex=True)."""
+    query = {} if reindex else {"skill_ids": {"$exists": False}}
+    ops, total = [], 0
+    async for doc in resumes_col.find(query, {"parsed.skills": 1}).batch_size(batch_size):
+        skill_ids = vocabulary.canonical_ids((doc.get("parsed") or {}).get("skills"))
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"skill_ids": skill_ids}}))
+        if len(ops) >= batch_size:
+            await resumes_col.bulk_write(ops, ordered=False)
+            total += len(ops)
+            ops = []
+    if ops:
+        await resumes_col.bulk_write(ops, ordered=False)
+        total += len(ops)
+    return total
+
+
+if __name__ == "__main__":
+    import sys
+    import asyncio
+
+    async def _main():
+        await load_learned_aliases()
+        await ensure_indexes()
+        return await backfill_skill_ids(reindex="--reindex" in sys.argv)
+
+    print(f"Updated skill_ids on {asyncio.run(_main())} resumes")
@@ -0,0 +1,282 @@
+import os
+import re
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process
+from dotenv import load_dotenv
+from .prompt_compaction import HEADING_OF
+
+load_dotenv()
+
+# Optional extra vocabulary: a .json file ({"skills": [...], "aliases": {...}}
+# or a plain list) or a text file with one skill per line.
+SKILLS_VOCAB_PATH = os.getenv("SKILLS_VOCAB_PATH")
+FUZZY_THRESHOLD = float(os.getenv("SKILL_FUZZY_THRESHOLD", "85"))
+
+BASE_SKILLS = [
+    "python", "fastapi", "flask", "django", "nlp", "machine learning",
+    "pytorch", "tensorflow", "scikit-learn", "sql", "mongodb", "docker", "aws",
+    "keras", "linux", "git", "javascript", "react", "java", "c++", "c#", "html",
+    "css", "typescript", "node.js", "vue", "angular", "spark", "hadoop"
+]
+
+# alias -> canonical skill id
+DEFAULT_SKILL_ALIASES = {
+    "node": "node.js",
+    "nodejs": "node.js",
+    "js": "javascript",
+    "ts": "typescript",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "ml": "machine learning",
+    "natural language processing": "nlp",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "tf": "tensorflow",
+    "torch": "pytorch",
+    "mongo": "mongodb",
+    "amazon web services": "aws",
+    "apache spark": "spark",
+    "pyspark": "spark",
+    "apache hadoop": "hadoop",
+    "cpp": "c++",
+    "csharp": "c#",
+    "html5": "html",
+    "css3": "css",
+    "golang": "go",
+    "postgres": "postgresql",
+}
+
+# Skill spellings that are also everyday words or units ("I go", "react quickly", "5 ml").
+# SkillMatcher only takes them from free text in context; explicit skill lists
+# (SkillVocabulary.canonical) resolve them as usual.
+AMBIGUOUS_SKILL_PHRASES = frozenset({"go", "node", "js", "ts", "ml", "tf", "react"})
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_skill_text(skill: str) -> str:
+    """Lowercase, collapse whitespace and trim surrounding punctuation."""
+    return _SPACE_RE.sub(" ", skill.lower()).strip(" \t,;:()[]{}'\"")
+
+
+def _squash(skill: str) -> str:
+    # "Node JS", "node-js" and "nodejs" should all find the same alias
+    return re.sub(r"[\s\-_.]", "", skill)
+
+
+class SkillVocabulary:
+    """Canonical skill ids plus an alias table.
+
+    ``canonical`` maps any raw skill string to a stable id: a known
+    canonical skill, the target of a known alias, or (for skills we have
+    never seen) its normalized text.
+    """
+
+    def __init__(self, skills: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.skills = set()
+        self._lookup: Dict[str, str] = {}
+        for skill in skills:
+            self.add_skill(skill)
+        for alias, canonical in (aliases or {}).items():
+            self.add_alias(alias, canonical)
+
+    def add_skill(self, skill: str):
+        canonical = normalize_skill_text(skill)
+        self.skills.add(canonical)
+        self._lookup.setdefault(canonical, canonical)
+        self._lookup.setdefault(_squash(canonical), canonical)
+
+    def add_alias(self, alias: str, canonical: str):
+        canonical = normalize_skill_text(canonical)
+        if canonical not in self.skills:
+            self.add_skill(canonical)
+        alias = normalize_skill_text(alias)
+        self._lookup[alias] = canonical
+        self._lookup[_squash(alias)] = canonical
+
+    def phrases(self) -> Dict[str, str]:
+        """Every known skill/alias spelling mapped to its canonical id."""
+        return {text: canonical for text, canonical in self._lookup.items()}
+
+    def canonical(self, raw: str) -> Optional[str]:
+        text = normalize_skill_text(raw)
+        if not text:
+            return None
+        return self._lookup.get(text) or self._lookup.get(_squash(text)) or text
+
+    def canonical_ids(self, raw_skills: Iterable) -> List[str]:
+        ids = {self.canonical(s) for s in raw_skills or [] if isinstance(s, str)}
+        ids.discard(None)
+        return sorted(ids)
+
+
+def load_vocabulary_file(path: str) -> Tuple[List[str], Dict[str, str]]:
+    """Read extra skills and aliases from ``path`` (see SKILLS_VOCAB_PATH)."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+            if isinstance(data, list):
+                return data, {}
+            return data.get("skills", []), data.get("aliases", {})
+        skills = [line.strip() for line in f]
+    return [s for s in skills if s and not s.startswith("#")], {}
+
+
+# Matcher tokens keep in-word punctuation used by skill names: node.js, c++, c#, scikit-learn
+MATCH_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*")
+
+
+CASED_TOKEN_RE = re.compile(MATCH_TOKEN_RE.pattern, re.IGNORECASE)
+# Items of a one-line skill list: "Python, Go, Docker", "Go | Kafka", "Skills: Go"
+LIST_SEPARATOR_RE = re.compile(r"[,;|/:\t\u2022\u00b7]|\s[-\u2013*]\s")
+SENTENCE_START = ".!?:;-*\u2022"
+
+
+def match_tokens(text: str) -> List[str]:
+    return MATCH_TOKEN_RE.findall(text.lower())
+
+
+def _section_heading(line: str) -> Optional[str]:
+    """The resume section a heading line opens ("Skills:", "Work Experience"), or None."""
+    return HEADING_OF.get(line.split(":", 1)[0].strip(" \t*#-\u2022").lower())
+
+
+class SkillMatcher:
+    """Finds vocabulary skills in free text.
+
+    Exact (including multi-word and alias) hits come from one pass over the
+    text tokens with a token trie. Misspellings of single-token skills are
+    caught by one ``rapidfuzz.process.cdist`` call between the distinct
+    unmatched text tokens and the single-token phrases.
+
+    Ambiguous phrases (AMBIGUOUS_SKILL_PHRASES) are left out of the trie and
+    the fuzzy pass. They count only when written capitalized mid-sentence or
+    in capitals ("built with React", "JS"), or as a whole item of a skill
+    list: a line under a skills heading, or a delimited line that names
+    another skill ("Python, Go, Docker").
+    """
+
+    _END = object()
+
+    def __init__(self, vocab: "SkillVocabulary", fuzzy_threshold: float = FUZZY_THRESHOLD,
+                 ambiguous: Iterable[str] = AMBIGUOUS_SKILL_PHRASES):
+        self.fuzzy_threshold = fuzzy_threshold
+        self._ambiguous_phrases = frozenset(ambiguous)
+        self._trie: Dict = {}
+        self._ambiguous: Dict[str, str] = {}  # token -> canonical
+        self._single: Dict[str, str] = {}
+        for phrase, canonical in vocab.phrases().items():
+            self._add(phrase, canonical)
+        self._update_fuzzy()
+
+    def _add(self, phrase: str, canonical: str):
+        tokens = match_tokens(phrase)
+        if not tokens:
+            return
+        if len(tokens) == 1 and tokens[0] in self._ambiguous_phrases:
+            self._ambiguous[tokens[0]] = canonical
+            return
+        node = self._trie
+        for tok in tokens:
+            node = node.setdefault(tok, {})
+        node[self._END] = canonical
+        if len(tokens) == 1:
+            self._single[tokens[0]] = canonical
+
+    def _update_fuzzy(self):
+        self._fuzzy_choices = list(self._single)
+        self._fuzzy_targets = [self._single[c] for c in self._fuzzy_choices]
+
+    def add_phrases(self, phrases: Dict[str, str]):
+        """Match more spellings (phrase -> canonical id), e.g. aliases learned at runtime."""
+        for phrase, canonical in phrases.items():
+            self._add(phrase, canonical)
+        self._update_fuzzy()
+
+    def _scan(self, tokens: List[str]):
+        """(start, stop, canonical) of every trie hit in ``tokens``."""
+        for i in range(len(tokens)):
+            node = self._trie.get(tokens[i])
+            j = i
+            while node is not None:
+                canonical = node.get(self._END)
+                if canonical is not None:
+                    yield i, j + 1, canonical
+                j += 1
+                node = node.get(tokens[j]) if j < len(tokens) else None
+
+    def _ambiguous_in_context(self, text: str) -> List[str]:
+        found = []
+        in_skills_section = False
+        for line in text.splitlines():
+            for m in CASED_TOKEN_RE.finditer(line):
+                word = m.group(0)
+                canonical = self._ambiguous.get(word.lower())
+                if canonical is None or word.islower():
+                    continue
+                before = line[:m.start()].rstrip()
+                if word.isupper() or (before and before[-1] not in SENTENCE_START):
+                    found.append(canonical)
+
+            section = _section_heading(line)
+            if section is not None:
+                # Everything up to the next heading is the skills list
+                in_skills_section = section == "skills"
+            items = [match_tokens(item) for item in LIST_SEPARATOR_RE.split(line)]
+            listed = [self._ambiguous[item[0]] for item in items if len(item) == 1 and item[0] in self._ambiguous]
+            if listed and (in_skills_section or any(next(self._scan(item), None) for item in items)):
+                found.extend(listed)
+        return found
+
+    def extract(self, text: str, top_k: Optional[int] = None) -> List[str]:
+        tokens = match_tokens(text)
+        found: Dict[str, None] = {}  # insertion-ordered set
+        matched_tokens = set()
+        for i, j, canonical in self._scan(tokens):
+            found.setdefault(canonical)
+            matched_tokens.update(tokens[i:j])
+        if not self._ambiguous.keys().isdisjoint(tokens):
+            for canonical in self._ambiguous_in_context(text):
+                found.setdefault(canonical)
+            matched_tokens.update(self._ambiguous)
+
+        candidates = [t for t in dict.fromkeys(tokens) if t not in matched_tokens]
+        if candidates and self._fuzzy_choices:
+            scores = process.cdist(candidates, self._fuzzy_choices, scorer=fuzz.ratio,
+                                   score_cutoff=self.fuzzy_threshold)
+            for col in np.nonzero((scores > self.fuzzy_threshold).any(axis=0))[0]:
+                found.setdefault(self._fuzzy_targets[col])
+
+        skills = list(found)
+        return skills[:top_k] if top_k else skills
+
+
+_extra_skills, _extra_aliases = load_vocabulary_file(SKILLS_VOCAB_PATH) if SKILLS_VOCAB_PATH else ([], {})
+
+vocabulary = SkillVocabulary(BASE_SKILLS + list(_extra_skills), {**DEFAULT_SKILL_ALIASES, **_extra_aliases})
+skill_matcher = SkillMatcher(vocabulary)
+
+# Aliases added at runtime (skill_index.learn_alias / load_learned_aliases); worker
+# processes receive them with each job, see workers.extract_and_parse.
+learned_aliases: Dict[str, str] = {}
+
+
+def learn_alias(alias: str, canonical: str):
+    """Apply an alias to ``vocabulary`` and ``skill_matcher`` in this process."""
+    alias, canonical = normalize_skill_text(alias), normalize_skill_text(canonical)
+    if learned_aliases.get(alias) == canonical:
+        return
+    vocabulary.add_alias(alias, canonical)
+    target = vocabulary.canonical(canonical)
+    skill_matcher.add_phrases({text: target for text in (canonical, alias, _squash(alias))})
+    learned_aliases[alias] = canonical
+
+
+def learn_aliases(aliases: Dict[str, str]):
+    for alias, canonical in aliases.items():
+        learn_alias(alias, canonical)
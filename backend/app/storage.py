@@ -0,0 +1,136 @@
+import os
+import zlib
+import logging
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Optional
+from bson import ObjectId
+from fastapi import UploadFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from dotenv import load_dotenv
+from .db import get_database
+from .pdf_utils import MAX_PDF_BYTES
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "inline": extracted text lives in the resume document (original layout)
+# "gridfs": the PDF and a zlib-compressed copy of the text live in GridFS
+RESUME_STORAGE = os.getenv("RESUME_STORAGE", "inline").lower()
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None  # None = system temp dir
+
+_buckets = {}
+
+
+def get_bucket(name: str) -> AsyncIOMotorGridFSBucket:
+    """GridFS bucket ``resume_pdfs`` or ``resume_texts``, created on first use."""
+    if name not in _buckets:
+        _buckets[name] = AsyncIOMotorGridFSBucket(get_database(), bucket_name=name)
+    return _buckets[name]
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+@dataclass
+class SpooledUpload:
+    """An upload written to a local temp file (and optionally GridFS) chunk by chunk."""
+    filename: str
+    path: str
+    sha256: str
+    size: int
+    pdf_file_id: Optional[ObjectId] = None
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def gridfs_enabled() -> bool:
+    return RESUME_STORAGE == "gridfs"
+
+
+async def spool_upload(file: UploadFile, to_gridfs: bool = False, max_bytes: int = MAX_PDF_BYTES,
+                       suffix: str = ".pdf", directory: Optional[str] = UPLOAD_SPOOL_DIR) -> SpooledUpload:
+    """Stream ``file`` to a temp file, hashing as it goes, without holding it in memory.
+
+    The worker pool reads the PDF back from ``path``. With ``to_gridfs`` the
+    same chunks are also streamed into the ``resume_pdfs`` bucket. Also
+    spools ZIP archives for bulk ingestion (``suffix``/``max_bytes``/``directory``).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    grid_in = get_bucket("resume_pdfs").open_upload_stream(file.filename, metadata={"content_type": "application/pdf"}) if to_gridfs else None
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"{suffix.lstrip('.').upper()} larger than {max_bytes} bytes.")
+                digest.update(chunk)
+                out.write(chunk)
+                if grid_in is not None:
+                    await grid_in.write(chunk)
+        if grid_in is not None:
+            await grid_in.set("sha256", digest.hexdigest())
+            await grid_in.close()
+    except BaseException:
+        if grid_in is not None:
+            await grid_in.abort()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        raise
+    return SpooledUpload(
+        filename=file.filename,
+        path=path,
+        sha256=digest.hexdigest(),
+        size=size,
+        pdf_file_id=grid_in._id if grid_in is not None else None
+    )
+
+
+async def store_text(text: str, filename: str) -> ObjectId:
+    """Save extracted text as a compressed GridFS blob and return its id."""
+    data = zlib.compress(text.encode("utf-8"), 6)
+    return await get_bucket("resume_texts").upload_from_stream(
+        filename + ".txt.z",
+        data,
+        metadata={"encoding": "zlib", "length": len(text)}
+    )
+
+
+async def delete_file(bucket: str, file_id: Optional[ObjectId]):
+    """Delete a GridFS file; failures are logged, not raised (used on cleanup paths)."""
+    if file_id is None:
+        return
+    try:
+        await get_bucket(bucket).delete(file_id)
+    except Exception as e:
+        logger.warning("Could not delete GridFS file", extra={"bucket": bucket, "file_id": str(file_id), "error": str(e)})
+
+
+async def load_text(file_id: ObjectId) -> str:
+    stream = await get_bucket("resume_texts").open_download_stream(file_id)
+    return zlib.decompress(await stream.read()).decode("utf-8")
+
+
+async def resume_text(doc: Dict) -> str:
+    """Extracted text of a ``resumes`` document (projected with ``text`` and ``text_file_id``)."""
+    # Inline text is on the document; with GridFS storage it is read back
+    if doc.get("text"):
+        return doc["text"]
+    return await load_text(doc["text_file_id"]) if doc.get("text_file_id") else ""
@@ -0,0 +1,230 @@
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from .metrics import STAGE_SECONDS, WORKER_QUEUE_WAIT_SECONDS, timed
+from .pdf_utils import (
+    PageText, PDFSource, ExtractionResult, PDFExtractionError, MAX_PDF_PAGES,
+    extract_pages, pdf_page_count, join_pages
+)
+
+load_dotenv()
+
+# 0 runs the CPU-bound stages in a thread pool inside the API process instead
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "64"))
+WORKER_QUEUE_TIMEOUT = float(os.getenv("WORKER_QUEUE_TIMEOUT", "30"))
+# PDFs with at least this many pages are split into chunks extracted in parallel
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "6"))
+PDF_PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", "3"))
+
+
+class WorkerPoolBusy(Exception):
+    """Raised when a job waited longer than WORKER_QUEUE_TIMEOUT for a queue slot."""
+
+
+def _init_worker():
+    # Import fitz and load the spaCy pipeline once per worker process
+    from . import pdf_utils  # noqa: F401  (preloads fitz)
+    from . import parser
+    parser.get_nlp()
+
+
+def _warm_up() -> bool:
+    from .parser import get_nlp
+    get_nlp()
+    return True
+
+
+def _extract_pages(source: PDFSource, start: int, stop: int) -> List[PageText]:
+    return extract_pages(source, start, stop)
+
+
+def _open_pdf(source: PDFSource, min_parallel_pages: int) -> Tuple[int, Optional[List[PageText]]]:
+    """Page count, and every page when the PDF is too short to be split into chunks."""
+    total_pages = pdf_page_count(source)
+    if min(total_pages, MAX_PDF_PAGES) >= min_parallel_pages:
+        return total_pages, None
+    return total_pages, extract_pages(source, 0, total_pages)
+
+
+def _extract_name(text: str) -> Optional[str]:
+    from .parser import extract_name
+    return extract_name(text)
+
+
+def _extract_and_parse(data: bytes, parse: bool, aliases: Dict[str, str]) -> Tuple[str, Optional[dict]]:
+    from .pdf_utils import extract_text_from_pdf_bytes
+    from .parser import rule_based_parse
+    from .skills import learn_aliases
+    learn_aliases(aliases)
+    text = extract_text_from_pdf_bytes(data)
+    return text, rule_based_parse(text) if parse else None
+
+
+class WorkerPool:
+    """Executor for CPU-bound stages (PDF extraction, spaCy NER).
+
+    At most ``queue_size`` jobs may be submitted or running at once; callers
+    beyond that wait for a slot (backpressure) and get WorkerPoolBusy if none
+    frees up within ``queue_timeout`` seconds.
+    """
+
+    def __init__(self, processes: int, queue_size: int, queue_timeout: float):
+        self.processes = processes
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[Executor] = None
+        self._slots = asyncio.Semaphore(queue_size)
+        self._waiting = 0
+        self._active = 0
+        self._rejected = 0
+        self.warmed = False
+
+    def start(self):
+        if self._executor is not None:
+            return
+        if self.processes > 0:
+            # spawn: never fork the API process with its event loop and driver threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        else:
+            self._executor = ThreadPoolExecutor(thread_name_prefix="cpu-stage")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable, *args):
+        self.start()
+        self._waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise WorkerPoolBusy("CPU worker queue is full, try again later")
+        finally:
+            self._waiting -= 1
+            WORKER_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - start)
+        self._active += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    async def warm_up(self):
+        """Load the spaCy pipeline ahead of the first request.
+
+        With worker processes, one job per process is submitted at once so
+        the executor spawns all of them (each loads spaCy in _init_worker).
+        """
+        await asyncio.gather(*(self.run(_warm_up) for _ in range(max(1, self.processes))))
+        self.warmed = True
+
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def snapshot(self) -> dict:
+        return {
+            "processes": self.processes,
+            "queue_size": self.queue_size,
+            "active": self._active,
+            "waiting": self._waiting,
+            "rejected": self._rejected,
+            "warmed": self.warmed
+        }
+
+
+worker_pool = WorkerPool(WORKER_PROCESSES, WORKER_QUEUE_SIZE, WORKER_QUEUE_TIMEOUT)
+
+
+async def extract_person_name(text: str) -> Optional[str]:
+    with timed(STAGE_SECONDS, stage="ner"):
+        return await worker_pool.run(_extract_name, text)
+
+
+async def extract_and_parse(data: bytes, parse: bool = True) -> Tuple[str, Optional[dict]]:
+    """Text of a whole PDF and, with ``parse``, its rule-based parse, in one worker job (bulk ingestion).
+
+    The learned skill aliases go along, so worker processes started before an
+    alias was learned still extract it.
+    """
+    from .skills import learned_aliases
+    with timed(STAGE_SECONDS, stage="ingest_extract"):
+        return await worker_pool.run(_extract_and_parse, data, parse, dict(learned_aliases) if parse else {})
+
+
+async def open_pdf(source: PDFSource) -> Tuple[int, Optional[List[PageText]]]:
+    """Page count of the PDF, counted in the worker pool; short PDFs are extracted by the same job."""
+    return await worker_pool.run(_open_pdf, source, PDF_PARALLEL_MIN_PAGES)
+
+
+async def stream_pdf_pages(source: PDFSource, total_pages: Optional[int] = None,
+                           extracted: Optional[List[PageText]] = None) -> AsyncIterator[PageText]:
+    """Yield extracted pages in order as soon as each one is available.
+
+    Long documents are split into PDF_PAGES_PER_CHUNK-page ranges that are
+    extracted concurrently by the worker pool; pages still come out in
+    document order, so callers can start on the first pages early. Pass a
+    file path rather than bytes to avoid copying the PDF to every worker.
+    ``total_pages`` and ``extracted`` are what ``open_pdf`` returned, if the
+    caller already has them.
+    """
+    if total_pages is None:
+        total_pages, extracted = await open_pdf(source)
+    if extracted is not None:
+        for page in extracted:
+            yield page
+        return
+    pages = min(total_pages, MAX_PDF_PAGES)
+    if pages >= PDF_PARALLEL_MIN_PAGES:
+        step = max(1, PDF_PAGES_PER_CHUNK)
+        ranges = [(lo, min(lo + step, pages)) for lo in range(0, pages, step)]
+    else:
+        ranges = [(0, pages)]
+    tasks = [asyncio.ensure_future(worker_pool.run(_extract_pages, source, lo, hi)) for lo, hi in ranges]
+    try:
+        for task in tasks:
+            for page in await task:
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+NAME_HEAD_CHARS = 1000  # extract_name only runs NER over the first 1000 characters
+
+
+async def extract_pdf(source: PDFSource) -> Tuple[ExtractionResult, Optional[asyncio.Task]]:
+    """Extract the whole document through stream_pdf_pages.
+
+    Name NER is started as soon as the first NAME_HEAD_CHARS characters are
+    available, overlapping the extraction of the remaining pages. Returns the
+    extraction result and that (possibly still running) NER task, or None
+    for documents too short to start it early.
+    """
+    total_pages, extracted = await open_pdf(source)
+    pages, head_chars, name_task = [], 0, None
+    try:
+        async for page in stream_pdf_pages(source, total_pages, extracted):
+            pages.append(page)
+            head_chars += len(page.text)
+            if name_task is None and head_chars >= NAME_HEAD_CHARS:
+                name_task = asyncio.ensure_future(extract_person_name(join_pages(pages)))
+        text = join_pages(pages)
+        if not text:
+            raise PDFExtractionError("PDF contains no extractable text (scanned or image-only?)")
+    except BaseException:
+        if name_task is not None:
+            name_task.cancel()
+        raise
+    return ExtractionResult(text=text, pages=pages, total_pages=total_pages), name_task
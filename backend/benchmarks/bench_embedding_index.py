@@ -0,0 +1,73 @@
+"""Embedding pre-filter on a synthetic corpus: build time and top-K query latency.
+
+    cd backend
+    python -m benchmarks.bench_embedding_index --resumes 100000 --top-k 50
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+from app.embeddings import EmbeddingIndex, embedder, embed_resume, embed_job_description
+from benchmarks.common import summarize, print_summary
+
+SKILLS = [
+    "python", "fastapi", "flask", "django", "nlp", "machine learning", "pytorch", "tensorflow",
+    "scikit-learn", "sql", "mongodb", "docker", "aws", "keras", "linux", "git", "javascript",
+    "react", "java", "c++", "c#", "html", "css", "typescript", "node.js", "vue", "angular",
+    "spark", "hadoop", "kubernetes", "terraform", "golang", "rust", "postgresql", "redis",
+    "kafka", "airflow", "pandas", "numpy", "graphql", "azure", "gcp", "jenkins", "ansible",
+]
+TITLES = [
+    "Backend Engineer", "Data Scientist", "Frontend Developer", "ML Engineer", "DevOps Engineer",
+    "Software Engineer", "Data Analyst", "Full Stack Developer", "Platform Engineer", "Intern",
+]
+
+
+def synthetic_parsed(rng: random.Random) -> dict:
+    return {
+        "skills": rng.sample(SKILLS, rng.randint(4, 15)),
+        "experience": [{"title": rng.choice(TITLES)} for _ in range(rng.randint(1, 4))],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=50)
+    args = ap.parse_args()
+    rng = random.Random(42)
+
+    start = time.perf_counter()
+    vectors = np.stack([embed_resume(synthetic_parsed(rng)) for _ in range(args.resumes)])
+    embed_s = time.perf_counter() - start
+    print(f"embedded {args.resumes} resumes with {embedder.name} in {embed_s:.1f}s "
+          f"({args.resumes / embed_s:.0f}/s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = EmbeddingIndex(os.path.join(tmp, "idx"), embedder.dim, embedder.name)
+        index.open()
+        start = time.perf_counter()
+        ids = [f"{i:024x}" for i in range(args.resumes)]
+        for lo in range(0, args.resumes, 10_000):
+            index.add_many(ids[lo:lo + 10_000], vectors[lo:lo + 10_000])
+        print(f"indexed in {time.perf_counter() - start:.2f}s")
+
+        jds = [
+            " ".join(rng.sample(SKILLS, 6)) + " " + rng.choice(TITLES)
+            for _ in range(args.queries)
+        ]
+        samples = []
+        for jd in jds:
+            t = time.perf_counter()
+            index.search(embed_job_description(jd), args.top_k)
+            samples.append(time.perf_counter() - t)
+        print_summary(f"query top-{args.top_k}", summarize(samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Throughput of the rule-based line extraction (email, phone, education, experience).
+
+Compares the previous per-field implementation (several splitlines/findall
+passes with patterns rebuilt per call) with scan_resume_lines.
+
+    cd backend
+    python -m benchmarks.bench_fallback_parser --resumes 500
+"""
+import re
+import time
+import random
+import argparse
+
+from app.parser import scan_resume_lines
+from benchmarks.common import summarize, print_summary
+
+SECTIONS = [
+    "Jane Doe", "jane.doe{n}@example.com | +91 9876543210", "SUMMARY",
+    "Backend developer focused on APIs and data platforms.", "EXPERIENCE",
+]
+EXPERIENCE = [
+    "Senior Software Engineer Jan 2020 - Mar 2023", "Acme Corp",
+    "Built FastAPI services and MongoDB pipelines processing millions of events.",
+    "Data Analyst Intern Jun 2018 - Dec 2019", "Globex",
+    "Reported weekly metrics and automated dashboards.",
+]
+EDUCATION = [
+    "B.Tech Computer Science 2018", "Example Institute of Technology",
+    "MSc Data Science 2020", "University of Somewhere",
+]
+FILLER = "Collaborated with product and design to ship features used by customers every day."
+
+
+def legacy_extract(text: str):
+    """The pre-scanner implementation, kept here for comparison."""
+    EDU_PATTERNS = [
+        r"(Bachelor|B\.Tech|BTech|BSc|BA)",
+        r"(Master|M\.Tech|MTech|MSc|MA|MBA)",
+        r"(PhD|Doctorate)"
+    ]
+    EXP_KEYWORDS = r"\b(Engineer|Developer|Intern|Manager|Scientist|Analyst|Lead|Consultant|Specialist)\b"
+
+    emails = re.findall(r"[\w\.-]+@[\w\.-]+\.\w+", text)
+    phones = re.findall(r"(\+?\d{1,3}[\s-]?)?(\d{10}|\d{3}[\s-]\d{3}[\s-]\d{4})", text)
+    education = []
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        for pattern in EDU_PATTERNS:
+            if re.search(pattern, line, re.IGNORECASE):
+                year_match = re.search(r"(20\d{2}|19\d{2})", line)
+                education.append((line.strip(), lines[i + 1].strip() if i + 1 < len(lines) else None,
+                                  year_match.group(0) if year_match else None))
+                break
+    experience = []
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if re.search(EXP_KEYWORDS, line, re.IGNORECASE):
+            dates = re.findall(r"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s*\d{4}", line)
+            experience.append((line.strip(), lines[i + 1].strip() if i + 1 < len(lines) else None, dates[:2]))
+    return emails[:1], phones[:1], education, experience
+
+
+def synthetic_resume(rng: random.Random, n: int) -> str:
+    lines = [line.format(n=n) for line in SECTIONS]
+    for _ in range(rng.randint(2, 8)):
+        lines += EXPERIENCE
+        lines += [FILLER] * rng.randint(3, 15)
+    lines.append("EDUCATION")
+    lines += EDUCATION
+    return "\n".join(lines)
+
+
+def bench(label, fn, texts):
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    summary = summarize(samples, sum(samples))
+    summary["resumes_per_s"] = summary.pop("throughput_per_s")
+    print_summary(label, summary)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=500)
+    args = ap.parse_args()
+    rng = random.Random(3)
+    texts = [synthetic_resume(rng, i) for i in range(args.resumes)]
+    bench("legacy per-field passes", legacy_extract, texts)
+    bench("scan_resume_lines", scan_resume_lines, texts)
+
+
+if __name__ == "__main__":
+    main()
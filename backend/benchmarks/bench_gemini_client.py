@@ -0,0 +1,78 @@
+"""p50/p99 of Gemini round trips: fresh AsyncClient per call vs the shared pool.
+
+Start the stub first (see benchmarks/gemini_stub.py), then from backend/:
+
+    python -m benchmarks.bench_gemini_client --requests 500 --concurrency 50
+
+Both sides post the same payloads straight to the stub, bypassing the
+scheduler and request coalescing. Every request sends a distinct prompt, so
+each call is one round trip and only the client differs.
+"""
+import os
+import time
+import asyncio
+import argparse
+
+os.environ.setdefault("GEMINI_API_KEY", "stub")
+os.environ.setdefault(
+    "GEMINI_API_ENDPOINT", "http://127.0.0.1:8090/v1beta/models/gemini-pro:generateContent"
+)
+
+import httpx  # noqa: E402
+from app import gemini_client  # noqa: E402
+from benchmarks.common import summarize, print_summary  # noqa: E402
+
+PROMPT = gemini_client.SCORE_PROMPT_TEMPLATE
+
+
+async def post(client: httpx.AsyncClient, i: int):
+    payload = {"contents": [{"role": "user", "parts": [{"text": f"{PROMPT}\nRequest {i}"}]}]}
+    resp = await client.post(
+        gemini_client.GEMINI_ENDPOINT, json=payload, params={"key": gemini_client.GEMINI_API_KEY}
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def per_call_request(i: int):
+    """What every Gemini call used to do: open and tear down its own client."""
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        return await post(client, i)
+
+
+async def pooled_request(i: int):
+    return await post(gemini_client.get_http_client(), i)
+
+
+async def run(label, fn, total, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            await fn(i)
+            samples.append(time.perf_counter() - start)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    print_summary(label, summarize(samples, time.perf_counter() - wall))
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=50)
+    args = ap.parse_args()
+
+    await run("per-call AsyncClient", per_call_request, args.requests, args.concurrency)
+    await gemini_client.start_http_client()
+    try:
+        await pooled_request(-1)  # warm the pool, as the app does after startup
+        await run("shared pooled client", pooled_request, args.requests, args.concurrency)
+    finally:
+        await gemini_client.close_http_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
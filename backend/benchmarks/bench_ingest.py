@@ -0,0 +1,110 @@
+"""Bulk ingestion throughput: one resume at a time vs app.ingest.
+
+Builds a ZIP of --resumes synthetic PDFs (plus --duplicates repeated files)
+and ingests it twice into an empty database: first file by file (hash
+lookup, extraction and rule-based parse in the worker pool, insert_one and
+the corpus statistics update), as a loop over /upload-resume would, then with ``ingest()`` (batched hash lookups,
+concurrent extraction across the pool, insert_many). Reports resumes/sec.
+
+Uses an in-memory MongoDB (mongomock-motor) unless --mongo is given, in which
+case it writes to a throwaway database on MONGODB_URI. In-memory round trips
+are nearly free, so --mongo shows more of the insert batching.
+
+    cd backend
+    python -m benchmarks.bench_ingest --resumes 500 --pages 1,2,5
+"""
+import os
+import time
+import asyncio
+import hashlib
+import zipfile
+import argparse
+import tempfile
+from typing import List
+
+from benchmarks.synthetic import corpus, parse_pages, resume_pdf
+
+os.environ["RESUME_STORAGE"] = "inline"
+
+
+def build_zip(path: str, count: int, pages: List[int], duplicates: int):
+    with zipfile.ZipFile(path, "w") as zf:
+        for item in corpus(count, pages, seed=7):
+            pdf = resume_pdf(item["text"])
+            zf.writestr(f"resumes/{item['n']}.pdf", pdf)
+            if item["n"] < duplicates:
+                zf.writestr(f"copies/{item['n']}.pdf", pdf)
+
+
+async def one_by_one(path: str) -> int:
+    from app.ingest import iter_zip
+    from app.local_scorer import corpus_stats, document_features
+    from app.pipeline import resume_document
+    from app.workers import extract_and_parse
+    from app.db import get_collection
+    resumes_col = get_collection("resumes")
+    inserted = 0
+    for item in iter_zip(path):
+        with item.open() as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        if await resumes_col.find_one({"sha256": sha256}, {"_id": 1}):
+            continue
+        text, parsed = await extract_and_parse(data)
+        await resumes_col.insert_one(resume_document(os.path.basename(item.name), sha256, len(data), parsed, text))
+        await corpus_stats.record([document_features(text, parsed)])
+        inserted += 1
+    return inserted
+
+
+async def run(args, path: str):
+    from app import ingest
+    from app.db import get_client, get_database
+    from app.workers import worker_pool
+    worker_pool.start()
+    await worker_pool.warm_up()
+    try:
+        await ingest.ensure_indexes()
+        start = time.perf_counter()
+        inserted = await one_by_one(path)
+        elapsed = time.perf_counter() - start
+        print(f"one by one: {inserted} inserted in {elapsed:.2f} s, {inserted / elapsed:.1f} resumes/sec")
+
+        for name in ("resumes", "corpus_stats"):
+            await get_database()[name].delete_many({})
+        report = await ingest.ingest(ingest.iter_zip(path), batch_size=args.batch_size, concurrency=args.concurrency)
+        print(f"app.ingest: {report['inserted']} inserted, {report['duplicates']} duplicates in {report['seconds']} s, "
+              f"{report['inserted'] / report['seconds']:.1f} resumes/sec")
+    finally:
+        worker_pool.shutdown()
+        if args.mongo:
+            await get_client().drop_database(get_database().name)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=500)
+    ap.add_argument("--pages", default="1,2,5")
+    ap.add_argument("--duplicates", type=int, default=50)
+    ap.add_argument("--batch-size", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=None)
+    ap.add_argument("--mongo", action="store_true", help="use MONGODB_URI instead of an in-memory database")
+    args = ap.parse_args()
+
+    os.environ["MONGO_DB"] = f"bench_ingest_{os.getpid()}"
+    from app import db
+    if not args.mongo:
+        from mongomock_motor import AsyncMongoMockClient
+        db.set_client(AsyncMongoMockClient())
+    from app.ingest import INGEST_CONCURRENCY
+    args.concurrency = args.concurrency or INGEST_CONCURRENCY
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "resumes.zip")
+        build_zip(path, args.resumes, parse_pages(args.pages), args.duplicates)
+        print(f"{args.resumes} resumes + {args.duplicates} duplicates, {os.path.getsize(path) / 1e6:.1f} MB zipped")
+        asyncio.run(run(args, path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Decoding cost of Gemini answers: the old replace + json.loads path vs llm_decode.
+
+Builds generateContent-shaped responses (some fenced, some with chatter
+around the JSON) and times, per response:
+  legacy     strip ``` fences, json.loads, setdefault missing keys
+  orjson     response_text + orjson/find_json decode only
+  validated  full decode_parsed_resume / decode_score (orjson + pydantic)
+
+    cd backend
+    python -m benchmarks.bench_llm_decode --responses 2000
+"""
+import json
+import time
+import random
+import argparse
+
+from app.llm_decode import response_text, decode_json, decode_parsed_resume, decode_score
+from benchmarks.common import summarize, print_summary
+
+SKILLS = ["python", "fastapi", "mongodb", "docker", "aws", "redis", "kafka", "react", "spark", "airflow"]
+
+
+def parsed_payload(rng: random.Random, n: int) -> dict:
+    return {
+        "name": f"Jane Doe {n}",
+        "email": f"jane.doe{n}@example.com",
+        "phone": f"+1 555 000 {n:04d}",
+        "skills": rng.sample(SKILLS, rng.randint(3, 8)),
+        "education": [{"degree": "B.Tech", "institution": "State University", "year": str(2010 + n % 10)}],
+        "experience": [
+            {"title": "Software Engineer", "company": f"Company {i}", "from_date": f"{2012 + i}-01",
+             "to_date": f"{2013 + i}-06", "description": "Built data-heavy APIs. " * rng.randint(1, 8)}
+            for i in range(rng.randint(1, 6))
+        ],
+        "total_experience_years": rng.choice([3, 4.5, "6 years", None]),
+    }
+
+
+def score_payload(rng: random.Random) -> dict:
+    matched = rng.sample(SKILLS, 4)
+    return {
+        "score": rng.choice([72, "85", 91.5]),
+        "justification": ["Strong backend experience", "Relevant cloud work", "Some gaps in data tooling"],
+        "matched_skills": matched,
+        "missing_skills": [s for s in SKILLS if s not in matched][:3],
+        "evidence": ["Built FastAPI services on AWS", "Ran Kafka pipelines"],
+    }
+
+
+def wrap(rng: random.Random, payload: dict) -> dict:
+    text = json.dumps(payload, indent=rng.choice([None, 2]))
+    style = rng.random()
+    if style < 0.5:
+        text = f"```json\n{text}\n```"
+    elif style < 0.7:
+        text = f"Here is the JSON you asked for:\n{text}\nLet me know if you need anything else."
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+def legacy_decode(data: dict, defaults) -> dict:
+    text_output = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+    text_output = text_output.replace("```json", "").replace("```", "").strip()
+    parsed = json.loads(text_output)
+    for key, value in defaults.items():
+        parsed.setdefault(key, value)
+    return parsed
+
+
+def timed(label, responses, fn):
+    samples, failures = [], 0
+    wall = time.perf_counter()
+    for data in responses:
+        start = time.perf_counter()
+        try:
+            fn(data)
+        except Exception:
+            failures += 1
+        samples.append(time.perf_counter() - start)
+    summary = summarize(samples, time.perf_counter() - wall)
+    summary["failures"] = failures
+    print_summary(label, summary)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--responses", type=int, default=2000)
+    args = ap.parse_args()
+
+    rng = random.Random(42)
+    parses = [wrap(rng, parsed_payload(rng, n)) for n in range(args.responses)]
+    scores = [wrap(rng, score_payload(rng)) for _ in range(args.responses)]
+    parse_defaults = {"skills": [], "education": [], "experience": []}
+    score_defaults = {"score": 0, "justification": [], "matched_skills": [], "missing_skills": [], "evidence": []}
+
+    # Legacy failures are answers with text around the JSON (lost to the fallback parser before)
+    print(f"{args.responses} parse and {args.responses} score responses")
+    timed("parse legacy", parses, lambda d: legacy_decode(d, parse_defaults))
+    timed("parse orjson", parses, lambda d: decode_json(response_text(d)))
+    timed("parse validated", parses, decode_parsed_resume)
+    timed("score legacy", scores, lambda d: legacy_decode(d, score_defaults))
+    timed("score orjson", scores, lambda d: decode_json(response_text(d)))
+    timed("score validated", scores, decode_score)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Load test of /upload-resume and /score with synthetic resumes.
+
+Uploads --requests distinct synthetic PDFs (a mix of page counts, so the
+parse cache never answers) at --concurrency, then queues a score for each
+stored resume and polls /jobs/{job_id} until it is done. Reports throughput,
+p50/p95/p99 and failures per phase, saves them under benchmarks/results/
+(or --out) and diffs against an earlier run with --compare.
+
+Against the in-memory stand-in (see benchmarks/local_server.py and
+benchmarks/gemini_stub.py), from backend/:
+
+    python -m benchmarks.bench_load --requests 200 --concurrency 20 --pages 1,2,5
+"""
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+
+from benchmarks.common import print_comparison, print_summary, save_results, summarize
+from benchmarks.synthetic import corpus, parse_pages, resume_pdf
+
+FINISHED = ("done", "dead")
+
+
+def _report(label: str, samples, wall: float, failures: Counter) -> dict:
+    summary = summarize(samples, wall)
+    summary["errors"] = sum(failures.values())
+    if failures:
+        summary["error_kinds"] = dict(failures)
+    print_summary(label, summary)
+    return summary
+
+
+async def upload_phase(client, pdfs, concurrency: int, job_description: str, mode: str):
+    sem = asyncio.Semaphore(concurrency)
+    samples, failures, resume_ids = [], Counter(), []
+
+    async def one(i, pdf):
+        async with sem:
+            start = time.perf_counter()
+            try:
+                resp = await client.post(
+                    "/upload-resume",
+                    files={"file": (f"synthetic-{i}.pdf", pdf, "application/pdf")},
+                    data={"job_description": job_description, "mode": mode},
+                )
+            except httpx.HTTPError as e:
+                failures[type(e).__name__] += 1
+                return
+            samples.append(time.perf_counter() - start)
+            if resp.status_code not in (200, 202):
+                failures[str(resp.status_code)] += 1
+            elif mode == "sync":
+                resume_ids.append(resp.json()["id"])
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(i, pdf) for i, pdf in enumerate(pdfs)))
+    return _report("upload", samples, time.perf_counter() - wall, failures), resume_ids
+
+
+async def score_phase(client, resume_ids, concurrency: int, job_description: str, poll_interval: float, timeout: float):
+    sem = asyncio.Semaphore(concurrency)
+    enqueue, completion, failures = [], [], Counter()
+
+    async def one(resume_id):
+        async with sem:
+            start = time.perf_counter()
+            try:
+                resp = await client.post(f"/score/{resume_id}", params={"job_description": job_description})
+            except httpx.HTTPError as e:
+                failures[type(e).__name__] += 1
+                return
+            enqueue.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                failures[str(resp.status_code)] += 1
+                return
+            job_id = resp.json()["job_id"]
+        # Polling happens outside the semaphore so it does not throttle enqueueing
+        while time.perf_counter() - start < timeout:
+            await asyncio.sleep(poll_interval)
+            job = (await client.get(f"/jobs/{job_id}")).json()
+            if job["status"] in FINISHED:
+                if job["status"] == "done":
+                    completion.append(time.perf_counter() - start)
+                else:
+                    failures["job_dead"] += 1
+                return
+        failures["job_timeout"] += 1
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one(resume_id) for resume_id in resume_ids))
+    wall = time.perf_counter() - wall
+    return {
+        "score enqueue": _report("score enqueue", enqueue, wall, Counter()),
+        "score completion": _report("score completion", completion, wall, failures),
+    }
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--requests", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--pages", default="1,2,5", help="comma-separated page counts of the synthetic resumes")
+    ap.add_argument("--mode", choices=["sync", "async"], default="sync",
+                    help="upload mode; the score phase needs the ids returned by sync uploads")
+    ap.add_argument("--job-description", default="Senior Python backend engineer with FastAPI, MongoDB and Docker")
+    # Differs from --job-description so the score cache filled by the uploads does not answer
+    ap.add_argument("--score-job-description", default="Data engineer with Spark, Airflow, Kafka and AWS")
+    ap.add_argument("--poll-interval", type=float, default=0.05)
+    ap.add_argument("--job-timeout", type=float, default=120)
+    ap.add_argument("--seed", type=int, default=None, help="corpus seed (default: time-based, so reruns miss the parse cache)")
+    ap.add_argument("--out", help="results file (default benchmarks/results/bench_load-<timestamp>.json)")
+    ap.add_argument("--compare", help="earlier results file to diff against")
+    args = ap.parse_args()
+
+    seed = args.seed if args.seed is not None else time.time_ns()
+    pdfs = [resume_pdf(item["text"]) for item in corpus(args.requests, parse_pages(args.pages), seed)]
+    results = {}
+    async with httpx.AsyncClient(base_url=args.url, timeout=300,
+                                 limits=httpx.Limits(max_connections=args.concurrency * 2)) as client:
+        results["upload"], resume_ids = await upload_phase(client, pdfs, args.concurrency, args.job_description, args.mode)
+        if resume_ids:
+            results.update(await score_phase(client, resume_ids, args.concurrency, args.score_job_description,
+                                             args.poll_interval, args.job_timeout))
+
+    path = save_results("bench_load", results, {**vars(args), "seed": seed}, args.out)
+    print(f"\nSaved {path}")
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+"""Scoring one job description against many resumes without Gemini.
+
+Compares the previous keyword fallback (every JD word tested with ``in``
+against the lowercased resume, one resume at a time) with the local BM25
+scorer: feature extraction per resume (done once, at ingestion) and one
+vectorized score_many call per JD.
+
+    cd backend
+    python -m benchmarks.bench_local_scorer --resumes 5000
+"""
+import time
+import argparse
+
+from app.local_scorer import corpus_stats, document_features, local_scorer
+from benchmarks.common import summarize, print_summary
+from benchmarks.synthetic import corpus
+
+JOB_DESCRIPTIONS = [
+    "Senior Java backend engineer. Must know Spring, Kafka, Docker and AWS; microservices experience required.",
+    "Data engineer with Spark, Airflow, Kafka and PostgreSQL. Python and AWS a plus.",
+    "Frontend developer: React, TypeScript, GraphQL and Node.js. Experience with design systems.",
+]
+
+
+def legacy_score(text: str, job_description: str) -> float:
+    """The substring fallback this replaces, kept here for comparison."""
+    jd_keywords = [w for w in job_description.lower().split() if len(w) > 3]
+    resume_lower = text.lower()
+    matched = [word for word in jd_keywords if word in resume_lower]
+    return round((len(matched) / (len(jd_keywords) or 1)) * 100, 2)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=5000)
+    ap.add_argument("--pages", default="1,2")
+    args = ap.parse_args()
+
+    texts = [item["text"] for item in corpus(args.resumes, [int(p) for p in args.pages.split(",")])]
+
+    start = time.perf_counter()
+    documents = [document_features(text) for text in texts]
+    corpus_stats._add(documents)
+    ingest = time.perf_counter() - start
+    print(f"feature extraction: {ingest / len(texts) * 1000:.3f} ms/resume (once per resume, at ingestion)")
+
+    legacy, local = [], []
+    for jd in JOB_DESCRIPTIONS:
+        start = time.perf_counter()
+        for text in texts:
+            legacy_score(text, jd)
+        legacy.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        local_scorer.score_many(jd, documents)
+        local.append(time.perf_counter() - start)
+
+    print_summary("legacy substring (per JD)", summarize(legacy))
+    print_summary("bm25 score_many (per JD)", summarize(local))
+
+    # Whole-word matching: a JavaScript resume no longer matches a Java JD
+    js = document_features("JavaScript developer building React and Node.js apps.")
+    jd = "Java developer"
+    print(f"'Java developer' vs a JavaScript resume: legacy {legacy_score('JavaScript developer building React and Node.js apps.', jd)}, "
+          f"bm25 {local_scorer.score_many(jd, [js])[0]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Microbenchmarks of each parsing step on synthetic resumes of 1-10 pages.
+
+Times every step of the upload path separately, per resume length:
+PDF text extraction, the rule-based line scan, spaCy NER, skill matching,
+prompt compaction, LLM output decoding, the full fallback parse and the
+keyword score. Gemini is not called. Results are saved under
+benchmarks/results/ (or --out) and can be diffed against an earlier run
+with --compare.
+
+    cd backend
+    python -m benchmarks.bench_parser --resumes 40 --pages 1,2,5,10
+    python -m benchmarks.bench_parser --compare benchmarks/results/bench_parser-<timestamp>.json
+"""
+import os
+import time
+import asyncio
+import argparse
+
+os.environ.setdefault("WORKER_PROCESSES", "0")  # time the NER call itself, not the process hop
+
+from app.llm_decode import decode_parsed_resume
+from app.parser import extract_name, fallback_parse_resume_text, scan_resume_lines
+from app.pdf_utils import extract_text_from_pdf_bytes
+from app.pipeline import keyword_score
+from app.prompt_compaction import compact_resume_text
+from app.skills import skill_matcher
+from benchmarks.common import print_comparison, print_summary, save_results, summarize
+from benchmarks.gemini_stub import PARSED_RESUME, _wrap
+from benchmarks.synthetic import corpus, parse_pages, resume_pdf
+
+JOB_DESCRIPTION = "Backend engineer with Python, FastAPI, MongoDB, Docker and Kubernetes; AWS a plus."
+
+STEPS = {
+    "pdf_extract": lambda item: extract_text_from_pdf_bytes(item["pdf"]),
+    "scan_lines": lambda item: scan_resume_lines(item["text"]),
+    "extract_name": lambda item: extract_name(item["text"]),
+    "skills": lambda item: skill_matcher.extract(item["text"]),
+    "compact_prompt": lambda item: compact_resume_text(item["text"]),
+    "decode_parsed": lambda item: decode_parsed_resume(item["answer"]),
+    "keyword_score": lambda item: keyword_score(item["text"], JOB_DESCRIPTION, RuntimeError("benchmark")),
+}
+
+
+def time_step(fn, items, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def time_fallback_parse(items, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            await fallback_parse_resume_text(item["text"])
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=40)
+    ap.add_argument("--pages", default="1,2,5,10", help="comma-separated page counts")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", help="results file (default benchmarks/results/bench_parser-<timestamp>.json)")
+    ap.add_argument("--compare", help="earlier results file to diff against")
+    args = ap.parse_args()
+
+    pages = parse_pages(args.pages)
+    items = corpus(args.resumes, pages)
+    answer = _wrap(PARSED_RESUME)
+    for item in items:
+        item["pdf"] = resume_pdf(item["text"])
+        item["answer"] = answer
+    extract_name("warm up spaCy")  # model load is measured by bench_startup
+
+    results = {}
+    for n_pages in pages:
+        bucket = [item for item in items if item["pages"] == n_pages]
+        for step, fn in STEPS.items():
+            samples = time_step(fn, bucket, args.repeat)
+            results[f"{step}/{n_pages}p"] = summarize(samples, sum(samples))
+        samples = asyncio.run(time_fallback_parse(bucket, args.repeat))
+        results[f"fallback_parse/{n_pages}p"] = summarize(samples, sum(samples))
+
+    for label, summary in results.items():
+        print_summary(label, summary)
+    path = save_results("bench_parser", results, vars(args), args.out)
+    print(f"\nSaved {path}")
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
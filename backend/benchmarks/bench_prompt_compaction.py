@@ -0,0 +1,120 @@
+"""Prompt payload size before/after compaction on a resume corpus.
+
+Uses synthetic multi-page resumes (running headers/footers, page numbers,
+ragged whitespace, long project lists) unless --dir points at a folder of
+extracted .txt resumes.
+
+    cd backend
+    python -m benchmarks.bench_prompt_compaction --resumes 300
+"""
+import os
+import json
+import time
+import random
+import argparse
+
+from app.scheduler import estimate_tokens
+from app.prompt_compaction import compact_resume_text, compact_json, compact_job_description
+from app.gemini_client import PARSE_PROMPT_TEMPLATE, SCORE_PROMPT_TEMPLATE
+from benchmarks.common import summarize, print_summary
+
+JOB_DESCRIPTION = """
+    We are hiring a   Senior Backend Engineer.
+
+    Requirements:
+      - 5+ years of Python      (FastAPI, Django)
+      - MongoDB, Redis, Kafka
+
+
+      - Docker / Kubernetes on AWS
+"""
+
+PROJECT = "    Built   a  {tech} service   handling {n}k requests/day;   reduced p99 latency by {p}%.   "
+
+
+def synthetic_resume(rng: random.Random, n: int) -> str:
+    pages = []
+    techs = ["FastAPI", "Django", "Kafka", "Redis", "MongoDB", "React", "Spark", "Airflow"]
+    body = [
+        "SUMMARY", "Backend engineer   with a focus on   data-heavy APIs.", "",
+        "EXPERIENCE",
+    ]
+    for job in range(rng.randint(2, 6)):
+        body += [f"Senior Software Engineer   Jan {2010 + job} - Mar {2012 + job}", f"Company {job}", ""]
+        body += [PROJECT.format(tech=rng.choice(techs), n=rng.randint(1, 900), p=rng.randint(5, 60))
+                 for _ in range(rng.randint(3, 12))]
+    body += ["", "SKILLS", ", ".join(rng.sample(techs, 5)), "", "EDUCATION", "B.Tech Computer Science", "2015", ""]
+    body += ["PROJECTS"] + [PROJECT.format(tech=rng.choice(techs), n=rng.randint(1, 900), p=rng.randint(5, 60))
+                            for _ in range(rng.randint(0, 300))]
+    body += ["", "HOBBIES", "Chess, hiking, photography", "REFERENCES", "Available on request"]
+    per_page = 35
+    chunks = [body[i:i + per_page] for i in range(0, len(body), per_page)]
+    for number, chunk in enumerate(chunks, 1):
+        header = [f"Jane Doe {n}", f"jane.doe{n}@example.com  |  +1 555 000 {n:04d}", "CONFIDENTIAL - Resume"]
+        footer = ["", f"Page {number} of {len(chunks)}", "\f"]
+        pages.append("\n".join(header + chunk + footer))
+    return "\n".join(pages)
+
+
+def parsed_for(rng: random.Random, n: int) -> dict:
+    return {
+        "name": f"Jane Doe {n}", "email": None, "phone": "",
+        "skills": rng.sample(["python", "fastapi", "mongodb", "docker", "aws", "redis", "kafka"], 5),
+        "education": [{"degree": "B.Tech", "institution": None, "year": "2015"}],
+        "experience": [{"title": "Senior Software Engineer", "company": f"Company {i}", "from_date": None, "to_date": ""}
+                       for i in range(rng.randint(2, 6))],
+        "total_experience_years": None,
+    }
+
+
+def load_corpus(args):
+    if args.dir:
+        texts = []
+        for name in sorted(os.listdir(args.dir)):
+            if name.endswith(".txt"):
+                with open(os.path.join(args.dir, name), encoding="utf-8", errors="ignore") as f:
+                    texts.append(f.read())
+        return texts
+    rng = random.Random(42)
+    return [synthetic_resume(rng, n) for n in range(args.resumes)]
+
+
+def report(label, raw, sent):
+    raw_total, sent_total = sum(raw), sum(sent)
+    print(f"{label:<24} avg_raw_tokens={raw_total / len(raw):.0f}  avg_sent_tokens={sent_total / len(sent):.0f}  "
+          f"max_sent_tokens={max(sent)}  reduction={100 * (1 - sent_total / raw_total):.1f}%")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=300)
+    ap.add_argument("--dir", help="folder of extracted resume .txt files")
+    args = ap.parse_args()
+
+    texts = load_corpus(args)
+    rng = random.Random(7)
+    parse_raw, parse_sent, score_raw, score_sent, samples = [], [], [], [], []
+    truncated = 0
+    template_tokens = estimate_tokens(PARSE_PROMPT_TEMPLATE)
+    for n, text in enumerate(texts):
+        start = time.perf_counter()
+        compacted, info = compact_resume_text(text)
+        samples.append(time.perf_counter() - start)
+        truncated += bool(info["truncated_sections"])
+        parse_raw.append(template_tokens + estimate_tokens(text))
+        parse_sent.append(template_tokens + estimate_tokens(compacted))
+
+        parsed = parsed_for(rng, n)
+        score_tokens = estimate_tokens(SCORE_PROMPT_TEMPLATE)
+        score_raw.append(score_tokens + estimate_tokens(json.dumps(parsed, indent=2)) + estimate_tokens(JOB_DESCRIPTION))
+        score_sent.append(score_tokens + estimate_tokens(compact_json(parsed))
+                          + estimate_tokens(compact_job_description(JOB_DESCRIPTION)[0]))
+
+    print(f"{len(texts)} resumes, {truncated} over the token budget")
+    report("parse prompt", parse_raw, parse_sent)
+    report("score prompt", score_raw, score_sent)
+    print_summary("compaction time", summarize(samples))
+
+
+if __name__ == "__main__":
+    main()
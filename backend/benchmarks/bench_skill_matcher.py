@@ -0,0 +1,70 @@
+"""Fallback skill extraction: legacy nested fuzz loop vs SkillMatcher.
+
+    cd backend
+    python -m benchmarks.bench_skill_matcher --words 3000 --runs 20
+"""
+import time
+import random
+import argparse
+
+from rapidfuzz import fuzz
+
+from app.skills import BASE_SKILLS, skill_matcher
+from benchmarks.common import summarize, print_summary
+
+FILLER = (
+    "designed built maintained services team delivered production systems customers "
+    "improved latency reduced costs collaborated stakeholders requirements architecture "
+    "deployed monitored pipelines data platform reporting dashboards ownership mentoring"
+).split()
+
+
+def legacy_extract_skills(text: str, top_k=15):
+    """The pre-SkillMatcher implementation, kept here for comparison."""
+    text_lower = text.lower()
+    found = set()
+    for skill in BASE_SKILLS:
+        if skill.lower() in text_lower:
+            found.add(skill)
+        else:
+            for word in text_lower.split():
+                if fuzz.ratio(skill.lower(), word) > 85:
+                    found.add(skill)
+    return list(found)[:top_k]
+
+
+def synthetic_resume(rng: random.Random, words: int) -> str:
+    # A real resume mentions a handful of skills; every absent skill is what
+    # drives the legacy implementation into its per-word fuzzy loop.
+    skills = rng.sample(BASE_SKILLS, 6)
+    out = []
+    for _ in range(words):
+        out.append(rng.choice(skills) if rng.random() < 0.03 else rng.choice(FILLER))
+    return " ".join(out)
+
+
+def bench(label, fn, texts, runs):
+    samples = []
+    for _ in range(runs):
+        for text in texts:
+            start = time.perf_counter()
+            fn(text, 15)
+            samples.append(time.perf_counter() - start)
+    print_summary(label, summarize(samples, sum(samples)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--words", type=int, default=3000, help="words per synthetic resume")
+    ap.add_argument("--resumes", type=int, default=10)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+    rng = random.Random(7)
+    texts = [synthetic_resume(rng, args.words) for _ in range(args.resumes)]
+
+    bench("legacy nested loop", legacy_extract_skills, texts, args.runs)
+    bench("SkillMatcher", skill_matcher.extract, texts, args.runs)
+
+
+if __name__ == "__main__":
+    main()
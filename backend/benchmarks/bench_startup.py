@@ -0,0 +1,122 @@
+"""Cold-start cost of an API worker: import time, time to live/ready and the first request.
+
+Each measurement runs in a fresh interpreter, as a new uvicorn worker would:
+
+  import            ``import app.main``
+  first name NER    first and second ``extract_name`` call (the first loads spaCy)
+  --serve           starts ``uvicorn app.main:app`` and times /healthz and /readyz
+                    answering 200, then the first and second upload of --pdf
+                    (needs MongoDB; set STARTUP_WARMUP=1 to include the warm-up)
+
+    cd backend
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --runs 3 --serve --pdf sample.pdf
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import httpx
+
+from benchmarks.common import summarize, print_summary
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import app.main
+print("T", time.perf_counter() - start)
+"""
+
+NER_SNIPPET = """
+import time
+from app.parser import extract_name
+text = "Jane Doe\\nSenior Backend Engineer at Acme\\njane@example.com"
+for _ in range(2):
+    start = time.perf_counter()
+    extract_name(text)
+    print("T", time.perf_counter() - start)
+"""
+
+
+def run_snippet(snippet: str):
+    env = {**os.environ, "WORKER_PROCESSES": "0"}
+    out = subprocess.run([sys.executable, "-c", snippet], capture_output=True, text=True, env=env, check=True)
+    # Timings are the lines starting with "T "; anything else the app prints is ignored
+    return [float(line[2:]) for line in out.stdout.splitlines() if line.startswith("T ")]
+
+
+def wait_for(client: httpx.Client, path: str, deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return True
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    return False
+
+
+def serve_once(args, pdf):
+    port = args.port
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    timings = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+            deadline = start + args.timeout
+            if wait_for(client, "/healthz", deadline):
+                timings["healthz"] = time.perf_counter() - start
+            if wait_for(client, "/readyz", deadline):
+                timings["readyz"] = time.perf_counter() - start
+            if pdf is not None:
+                for key in ("first_upload", "second_upload"):
+                    # A unique trailing comment keeps the parse cache from answering
+                    body = pdf + f"\n% startup {time.time_ns()}\n".encode()
+                    t = time.perf_counter()
+                    client.post("/upload-resume", files={"file": ("bench.pdf", body, "application/pdf")},
+                                data={"job_description": f"Python backend engineer {time.time_ns()}"})
+                    timings[key] = time.perf_counter() - t
+    finally:
+        proc.terminate()
+        proc.wait()
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--serve", action="store_true", help="also start uvicorn and time /healthz, /readyz")
+    ap.add_argument("--pdf", help="upload this PDF twice after /readyz (with --serve)")
+    ap.add_argument("--port", type=int, default=8077)
+    ap.add_argument("--timeout", type=float, default=120)
+    args = ap.parse_args()
+
+    imports, first, second = [], [], []
+    for _ in range(args.runs):
+        imports += run_snippet(IMPORT_SNIPPET)
+        cold, warm = run_snippet(NER_SNIPPET)
+        first.append(cold)
+        second.append(warm)
+    print_summary("import app.main", summarize(imports))
+    print_summary("first extract_name", summarize(first))
+    print_summary("second extract_name", summarize(second))
+
+    if args.serve:
+        pdf = None
+        if args.pdf:
+            with open(args.pdf, "rb") as f:
+                pdf = f.read()
+        results = [serve_once(args, pdf) for _ in range(args.runs)]
+        for key in ("healthz", "readyz", "first_upload", "second_upload"):
+            samples = [r[key] for r in results if key in r]
+            if samples:
+                print_summary(f"time to {key}" if key.endswith("z") else key, summarize(samples))
+
+
+if __name__ == "__main__":
+    main()
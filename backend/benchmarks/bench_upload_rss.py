@@ -0,0 +1,87 @@
+"""Peak server RSS while N large PDFs are uploaded concurrently (Linux only).
+
+Start the API (and the Gemini stub) first, e.g. once with RESUME_STORAGE=inline
+and once with RESUME_STORAGE=gridfs, then from backend/:
+
+    python -m benchmarks.bench_upload_rss --pid <uvicorn pid> --uploads 50 --size-mb 9.5
+"""
+import os
+import time
+import asyncio
+import argparse
+import threading
+
+import fitz
+import httpx
+
+from benchmarks.common import summarize, print_summary
+
+
+def make_large_pdf(size_mb: float) -> bytes:
+    """One text page followed by pages of incompressible noise images."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Jane Doe\njane@example.com\nSenior Python Engineer Jan 2019 - Mar 2023\nAcme")
+    target = int(size_mb * 1024 * 1024)
+    while len(doc.tobytes()) < target:
+        side = 600
+        pix = fitz.Pixmap(fitz.csRGB, side, side, os.urandom(side * side * 3), 0)
+        doc.new_page().insert_image(fitz.Rect(0, 0, 400, 400), pixmap=pix)
+    return doc.tobytes()
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def sample_rss(pid: int, stop: threading.Event, out: list):
+    while not stop.is_set():
+        out.append(rss_mb(pid))
+        time.sleep(0.05)
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--pid", type=int, required=True, help="pid of the API server process")
+    ap.add_argument("--uploads", type=int, default=50)
+    ap.add_argument("--size-mb", type=float, default=9.5)
+    args = ap.parse_args()
+
+    pdf = make_large_pdf(args.size_mb)
+    print(f"payload: {len(pdf) / 1024 / 1024:.1f} MB x {args.uploads} concurrent uploads")
+    baseline = rss_mb(args.pid)
+
+    samples, stop = [], threading.Event()
+    sampler = threading.Thread(target=sample_rss, args=(args.pid, stop, samples), daemon=True)
+    sampler.start()
+
+    latencies, statuses = [], {}
+    async with httpx.AsyncClient(base_url=args.url, timeout=600) as client:
+        async def one(i):
+            start = time.perf_counter()
+            resp = await client.post(
+                "/upload-resume",
+                files={"file": (f"large-{i}.pdf", pdf, "application/pdf")},
+                data={"job_description": "Senior Python engineer"},
+            )
+            latencies.append(time.perf_counter() - start)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+        wall = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.uploads)))
+        wall = time.perf_counter() - wall
+
+    stop.set()
+    sampler.join()
+    print(f"status codes: {statuses}")
+    print(f"RSS baseline {baseline:.0f} MB, peak {max(samples):.0f} MB, growth {max(samples) - baseline:.0f} MB")
+    print_summary("upload latency", summarize(latencies, wall))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Small helpers shared by the benchmark scripts."""
+import os
+import sys
+import json
+import time
+import platform
+import statistics
+import subprocess
+from typing import Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples: List[float], wall_seconds: float = None) -> Dict[str, float]:
+    """Latency summary in milliseconds (samples are seconds)."""
+    ms = [s * 1000 for s in samples]
+    summary = {
+        "count": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+    if wall_seconds:
+        summary["throughput_per_s"] = round(len(ms) / wall_seconds, 2)
+    return summary
+
+
+def print_summary(label: str, summary: Dict[str, float]):
+    fields = "  ".join(f"{k}={v}" for k, v in summary.items())
+    print(f"{label:<24} {fields}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def save_results(name: str, results: Dict[str, Dict], params: Dict, path: Optional[str] = None) -> str:
+    """Write ``{label: summary}`` with the run's parameters and git commit; returns the path.
+
+    Defaults to benchmarks/results/<name>-<timestamp>.json.
+    """
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    doc = {
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    return path
+
+
+def print_comparison(baseline_path: str, results: Dict[str, Dict],
+                     keys=("p50_ms", "p95_ms", "p99_ms", "throughput_per_s")):
+    """Print each label's change against a file written by save_results."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} (commit {baseline.get('commit')}, {baseline.get('timestamp')})")
+    for label, summary in results.items():
+        old = baseline["results"].get(label)
+        if not old:
+            print(f"{label:<24} (not in baseline)")
+            continue
+        fields = []
+        for key in keys:
+            if key in summary and old.get(key):
+                change = (summary[key] - old[key]) / old[key] * 100
+                fields.append(f"{key}={old[key]}->{summary[key]} ({change:+.1f}%)")
+        print(f"{label:<24} " + "  ".join(fields))
@@ -0,0 +1,108 @@
+"""Local stand-in for the Gemini generateContent endpoint.
+
+Returns canned parse/score JSON after a configurable delay so client-side
+overhead (connection setup, pooling, scheduling) can be measured without
+calling Google. Failures can be injected at configurable rates:
+
+    STUB_LATENCY_MS         mean delay per call (default 200)
+    STUB_JITTER_MS          uniform +/- jitter around the mean (default 0)
+    STUB_ERROR_RATE         share of calls answered with HTTP 500 (default 0)
+    STUB_RATE_LIMIT_RATE    share answered with HTTP 429 and Retry-After (default 0)
+    STUB_INVALID_JSON_RATE  share answered with prose instead of JSON (default 0)
+    STUB_SEED               seed for the failure draws
+
+    cd backend
+    STUB_LATENCY_MS=200 STUB_ERROR_RATE=0.02 python -m uvicorn benchmarks.gemini_stub:app --port 8090
+
+GET /stats returns the number of answers of each kind since start.
+
+Point the app at it with
+GEMINI_API_ENDPOINT=http://127.0.0.1:8090/v1beta/models/gemini-pro:generateContent
+and any non-empty GEMINI_API_KEY.
+"""
+import os
+import re
+import json
+import random
+import asyncio
+from collections import Counter
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "200"))
+STUB_JITTER_MS = float(os.getenv("STUB_JITTER_MS", "0"))
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+STUB_RATE_LIMIT_RATE = float(os.getenv("STUB_RATE_LIMIT_RATE", "0"))
+STUB_INVALID_JSON_RATE = float(os.getenv("STUB_INVALID_JSON_RATE", "0"))
+
+_rng = random.Random(os.getenv("STUB_SEED"))
+stats = Counter()
+
+PARSED_RESUME = {
+    "name": "Jane Doe",
+    "email": "jane.doe@example.com",
+    "phone": "+1 555 123 4567",
+    "skills": ["python", "fastapi", "mongodb", "docker", "aws"],
+    "education": [{"degree": "B.Tech Computer Science", "institution": "Example University", "year": "2018"}],
+    "experience": [{"title": "Backend Engineer", "company": "Acme", "from_date": "Jan 2019", "to_date": "Present"}],
+    "total_experience_years": 5,
+}
+
+SCORE = {
+    "score": 78,
+    "justification": ["Strong backend experience", "Matches most required skills"],
+    "matched_skills": ["python", "fastapi", "mongodb"],
+    "missing_skills": ["kubernetes"],
+    "evidence": ["Built FastAPI services backed by MongoDB"],
+}
+
+app = FastAPI(title="Gemini stub")
+
+
+def _text(text: str) -> dict:
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+
+def _wrap(payload: dict) -> dict:
+    return _text("```json\n" + json.dumps(payload) + "\n```")
+
+
+def _parsed_for(prompt: str) -> dict:
+    # Echo the resume's email so distinct resumes get distinct parses (and score prompts)
+    match = re.search(r"[\w.+-]+@[\w-]+\.[\w.]+", prompt)
+    return {**PARSED_RESUME, "email": match.group(0)} if match else PARSED_RESUME
+
+
+def _delay() -> float:
+    return max(0.0, STUB_LATENCY_MS + _rng.uniform(-STUB_JITTER_MS, STUB_JITTER_MS)) / 1000.0
+
+
+@app.post("/v1beta/models/{model_action}")
+async def generate_content(model_action: str, request: Request):
+    body = await request.json()
+    prompt = body["contents"][0]["parts"][0]["text"]
+    await asyncio.sleep(_delay())
+    draw = _rng.random()
+    if draw < STUB_RATE_LIMIT_RATE:
+        stats["rate_limited"] += 1
+        return JSONResponse({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                            status_code=429, headers={"Retry-After": "1"})
+    draw -= STUB_RATE_LIMIT_RATE
+    if draw < STUB_ERROR_RATE:
+        stats["error"] += 1
+        return JSONResponse({"error": {"code": 500, "status": "INTERNAL"}}, status_code=500)
+    draw -= STUB_ERROR_RATE
+    if draw < STUB_INVALID_JSON_RATE:
+        stats["invalid_json"] += 1
+        return _text("I'm sorry, I can't produce structured output for this resume.")
+    stats["ok"] += 1
+    if "expert resume screener" in prompt:
+        return _wrap({"parsed": _parsed_for(prompt), "score": SCORE})
+    if "expert resume parser" in prompt:
+        return _wrap(_parsed_for(prompt))
+    return _wrap(SCORE)
+
+
+@app.get("/stats")
+async def get_stats():
+    return dict(stats)
@@ -0,0 +1,45 @@
+"""Run the API against an in-memory MongoDB (mongomock_motor) for load tests.
+
+Nothing is persisted and no MongoDB server is needed. Resume text is stored
+inline (GridFS is not emulated) and job workers poll every 50 ms so queued
+scores are picked up promptly. Combine with the Gemini stub to load-test
+without network calls:
+
+    cd backend
+    pip install mongomock-motor
+    STUB_LATENCY_MS=300 python -m uvicorn benchmarks.gemini_stub:app --port 8090 &
+    GEMINI_API_KEY=stub GEMINI_API_ENDPOINT=http://127.0.0.1:8090/v1beta/models/gemini-pro:generateContent \
+        python -m benchmarks.local_server --port 8000
+
+Without GEMINI_API_KEY the app uses its local fallback parser and scorer.
+The in-memory database lives in this one process, so --workers is not offered.
+"""
+import os
+import argparse
+import tempfile
+
+os.environ["RESUME_STORAGE"] = "inline"
+os.environ.setdefault("JOB_POLL_INTERVAL", "0.05")
+# the index must not outlive the in-memory resumes it points at
+os.environ.setdefault("EMBEDDING_INDEX_DIR", tempfile.mkdtemp(prefix="resume-bench-embeddings-"))
+
+import uvicorn
+from mongomock_motor import AsyncMongoMockClient
+
+from app import db
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--log-level", default="warning")
+    args = ap.parse_args()
+
+    db.set_client(AsyncMongoMockClient())
+    from app.main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Synthetic resumes as text and as PDFs, with a controllable length.
+
+Used by bench_parser and bench_load; can also write a folder of PDFs:
+
+    cd backend
+    python -m benchmarks.synthetic --out /tmp/resumes --count 100 --pages 1,2,5,10
+"""
+import os
+import random
+import argparse
+from typing import List
+
+import fitz
+
+LINES_PER_PAGE = 50
+
+FIRST_NAMES = ["Jane", "Arjun", "Maria", "Wei", "Fatima", "Lucas", "Priya", "Tom", "Aiko", "Omar"]
+LAST_NAMES = ["Doe", "Sharma", "Garcia", "Chen", "Khan", "Silva", "Iyer", "Smith", "Tanaka", "Haddad"]
+TITLES = ["Software Engineer", "Senior Backend Engineer", "Data Scientist", "DevOps Engineer",
+          "Frontend Developer", "Machine Learning Engineer", "Data Analyst Intern", "Tech Lead"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Tech"]
+SKILLS = ["Python", "FastAPI", "Django", "Flask", "MongoDB", "PostgreSQL", "Redis", "Kafka", "Docker",
+          "Kubernetes", "AWS", "GCP", "React", "TypeScript", "Node.js", "Spark", "Airflow", "PyTorch",
+          "TensorFlow", "scikit-learn", "Pandas", "Git", "Linux", "Terraform", "GraphQL"]
+DEGREES = ["B.Tech Computer Science", "BSc Mathematics", "MSc Data Science", "M.Tech Software Systems", "MBA"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+BULLETS = [
+    "Built {skill} services handling {n}k requests per day with p99 latency under {p} ms.",
+    "Migrated the {skill} pipeline to {other}, cutting infrastructure cost by {p}%.",
+    "Led a team of {small} engineers delivering the {skill} platform rewrite.",
+    "Automated {skill} deployments and monitoring, reducing incidents by {p}%.",
+    "Designed data models in {skill} and {other} for analytics used by {n} customers.",
+]
+
+
+def resume_text(rng: random.Random, n: int, pages: int = 1) -> str:
+    """A plausible resume of roughly ``pages`` PDF pages (LINES_PER_PAGE lines each)."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}{n}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience building backend and data systems.",
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, rng.randint(6, 14))),
+        "",
+        "EDUCATION",
+    ]
+    year = rng.randint(2005, 2020)
+    for degree in rng.sample(DEGREES, rng.randint(1, 2)):
+        lines += [f"{degree} {year}", "Example Institute of Technology"]
+        year += 2
+    lines += ["", "EXPERIENCE"]
+    target = pages * LINES_PER_PAGE
+    start_year = year
+    while len(lines) < target:
+        end_year = start_year + rng.randint(1, 4)
+        lines += [
+            "",
+            f"{rng.choice(TITLES)} {rng.choice(MONTHS)} {start_year} - {rng.choice(MONTHS)} {end_year}",
+            rng.choice(COMPANIES),
+        ]
+        for _ in range(rng.randint(3, 8)):
+            lines.append("- " + rng.choice(BULLETS).format(
+                skill=rng.choice(SKILLS), other=rng.choice(SKILLS), n=rng.randint(1, 900),
+                p=rng.randint(5, 80), small=rng.randint(2, 12)
+            ))
+        start_year = end_year
+    return "\n".join(lines[:max(target, 20)])
+
+
+def resume_pdf(text: str) -> bytes:
+    """Render ``text`` onto A4 pages, LINES_PER_PAGE lines per page."""
+    doc = fitz.open()
+    lines = text.split("\n")
+    for i in range(0, len(lines), LINES_PER_PAGE):
+        page = doc.new_page()
+        page.insert_text((50, 50), "\n".join(lines[i:i + LINES_PER_PAGE]), fontsize=9)
+    return doc.tobytes(garbage=3, deflate=True)
+
+
+def corpus(count: int, pages: List[int], seed: int = 42) -> List[dict]:
+    """``count`` resumes cycling through the page counts: [{"n", "pages", "text"}]."""
+    rng = random.Random(seed)
+    return [{"n": n, "pages": pages[n % len(pages)], "text": resume_text(rng, n, pages[n % len(pages)])}
+            for n in range(count)]
+
+
+def parse_pages(value: str) -> List[int]:
+    return [int(p) for p in value.split(",") if p.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--count", type=int, default=100)
+    ap.add_argument("--pages", default="1,2,5,10", help="comma-separated page counts to cycle through")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for item in corpus(args.count, parse_pages(args.pages), args.seed):
+        with open(os.path.join(args.out, f"resume-{item['n']:05d}-{item['pages']}p.pdf"), "wb") as f:
+            f.write(resume_pdf(item["text"]))
+    print(f"Wrote {args.count} PDFs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
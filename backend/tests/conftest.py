@@ -0,0 +1,46 @@
+"""Shared fixtures: an in-memory MongoDB (mongomock-motor) and the Gemini stub, no servers needed."""
+import os
+import tempfile
+
+# Read at import by the app modules: no GridFS emulation, CPU stages in threads, no real Gemini
+os.environ["RESUME_STORAGE"] = "inline"
+os.environ["WORKER_PROCESSES"] = "0"
+os.environ["JOB_WORKERS_IN_PROCESS"] = "0"
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["STUB_LATENCY_MS"] = "0"
+os.environ["LOG_LEVEL"] = "WARNING"
+# No trained model download needed: names come out as None
+os.environ.setdefault("SPACY_MODEL", "blank:en")
+os.environ["EMBEDDING_INDEX_DIR"] = tempfile.mkdtemp(prefix="resume-test-embeddings-")
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app import db
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def mongo():
+    """A fresh in-memory database for every test."""
+    client = AsyncMongoMockClient()
+    db.set_client(client)
+    yield client
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Send Gemini calls to benchmarks.gemini_stub in-process; yields the stub's answer counts."""
+    from app import gemini_client, parser
+    from benchmarks import gemini_stub
+    monkeypatch.setattr(gemini_client, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(parser, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(gemini_client, "GEMINI_ENDPOINT", "http://gemini.test/v1beta/models/gemini-pro:generateContent")
+    monkeypatch.setattr(gemini_client, "_http_client", httpx.AsyncClient(app=gemini_stub.app))
+    gemini_stub.stats.clear()
+    yield gemini_stub.stats
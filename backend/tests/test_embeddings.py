@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app import embeddings
+from app.embeddings import EmbeddingIndex, embed_job_description, embed_resume
+from app.db import get_collection
+
+pytestmark = pytest.mark.anyio
+
+PARSED = {
+    "a": {"skills": ["python", "django", "postgresql"], "experience": [{"title": "Backend Engineer"}]},
+    "b": {"skills": ["react", "typescript", "css"], "experience": [{"title": "Frontend Developer"}]},
+}
+
+
+@pytest.fixture
+def index_pair(tmp_path):
+    writer = EmbeddingIndex(str(tmp_path), embeddings.embedder.dim, embeddings.embedder.name, initial_capacity=2)
+    reader = EmbeddingIndex(str(tmp_path), embeddings.embedder.dim, embeddings.embedder.name)
+    writer.open()
+    reader.open()
+    yield writer, reader
+    reader.close()
+    writer.close()
+
+
+def test_second_process_opens_read_only(index_pair):
+    writer, reader = index_pair
+    assert writer.writable and reader.is_open and not reader.writable
+
+
+def test_read_only_add_is_a_no_op(index_pair):
+    writer, reader = index_pair
+    reader.add("r1", embed_resume(PARSED["a"]))
+    assert len(reader) == 0 and len(writer) == 0
+    assert writer.search(embed_job_description("python django"), 5) == []
+
+
+def test_reader_sees_writer_commits_including_growth(index_pair):
+    writer, reader = index_pair
+    assert reader.search(embed_job_description("python"), 5) == []
+    for n in range(5):  # past the initial capacity of 2
+        writer.add(f"{n}-a", embed_resume(PARSED["a"]))
+    writer.add("b", embed_resume(PARSED["b"]))
+    top = reader.search(embed_job_description("Frontend developer with React and TypeScript"), 3)
+    assert len(reader) == 6 and top[0][0] == "b"
+
+
+def test_lock_is_released_on_close(tmp_path):
+    first = EmbeddingIndex(str(tmp_path), 8, "hashing")
+    first.open()
+    first.close()
+    second = EmbeddingIndex(str(tmp_path), 8, "hashing")
+    second.open()
+    assert second.writable
+    second.close()
+
+
+async def test_sync_embeds_resumes_stored_elsewhere(index_pair):
+    writer, _ = index_pair
+    resumes = get_collection("resumes")
+    known, stored = ObjectId(), ObjectId()
+    writer.add(str(known), embed_resume(PARSED["a"]))
+    await resumes.insert_many([{"_id": known, "parsed": PARSED["a"]}, {"_id": stored, "parsed": PARSED["b"]}])
+    assert await embeddings.sync_from_mongo(writer) == 1
+    assert str(stored) in writer
+    assert await embeddings.sync_from_mongo(writer) == 0
+
+
+async def test_first_sync_of_a_new_index_embeds_existing_resumes(tmp_path, monkeypatch):
+    resumes = get_collection("resumes")
+    stored = ObjectId.from_datetime(datetime(2024, 5, 1))
+    await resumes.insert_one({"_id": stored, "parsed": PARSED["a"]})
+    index = EmbeddingIndex(str(tmp_path), embeddings.embedder.dim, embeddings.embedder.name)
+    index.open()
+    monkeypatch.setattr(embeddings, "embedding_index", index)
+    task = asyncio.create_task(embeddings.sync_loop(interval=3600))
+    try:
+        while index.synced_at is None:
+            await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+    assert str(stored) in index
+    synced_at = index.synced_at
+    index.close()
+
+    # The next process resumes from the recorded sync, not from the meta.json mtime
+    reopened = EmbeddingIndex(str(tmp_path), embeddings.embedder.dim, embeddings.embedder.name)
+    reopened.open()
+    assert reopened.synced_at == synced_at and str(stored) in reopened
+    reopened.close()
@@ -0,0 +1,22 @@
+import pytest
+
+from app import gemini_client
+from app.prompt_compaction import prompt_stats
+
+pytestmark = pytest.mark.anyio
+
+
+def test_build_prompt_does_not_rescan_inserted_text():
+    prompt = gemini_client._build_prompt(
+        "combined", "R: {resume_text}\nJD: {job_description}", 0,
+        resume_text="I wrote {job_description} templates", job_description="Python engineer"
+    )
+    assert prompt == "R: I wrote {job_description} templates\nJD: Python engineer"
+
+
+async def test_score_prompt_records_job_description_truncation(gemini):
+    before = prompt_stats.snapshot().get("score", {}).get("truncated", 0)
+    result = await gemini_client.score_resume_with_gemini({"skills": ["python"]}, "python developer " * 5000)
+    assert result["score"] == 78
+    assert prompt_stats.snapshot()["score"]["truncated"] == before + 1
+    assert gemini["ok"] == 1
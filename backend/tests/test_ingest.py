@@ -0,0 +1,129 @@
+import random
+import hashlib
+import zipfile
+
+import orjson
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app import ingest, pipeline, storage
+from benchmarks.synthetic import resume_pdf, resume_text
+
+pytestmark = pytest.mark.anyio
+
+
+# Built once: PyMuPDF stamps every PDF it writes differently
+PDFS = [resume_pdf(resume_text(random.Random(n), n)) for n in range(6)]
+
+
+class FakeBucket:
+    def __init__(self):
+        self.uploaded, self.deleted = [], []
+
+    async def upload_from_stream(self, filename, data, metadata=None):
+        self.uploaded.append(ObjectId())
+        return self.uploaded[-1]
+
+    async def delete(self, file_id):
+        self.deleted.append(file_id)
+
+
+class RejectSecond:
+    """The resumes collection with the second document of each insert_many rejected."""
+
+    def __init__(self, col):
+        self.col = col
+
+    def __getattr__(self, name):
+        return getattr(self.col, name)
+
+    async def insert_many(self, docs, ordered=True):
+        await self.col.insert_many(docs[:1] + docs[2:], ordered=ordered)
+        raise BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"}]})
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "resumes.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for n in range(6):
+            zf.writestr(f"batch/r{n}.pdf", PDFS[n])
+        zf.writestr("copies/r0.pdf", PDFS[0])
+        zf.writestr("broken.pdf", b"not a pdf")
+        zf.writestr("__MACOSX/batch/._r1.pdf", b"resource fork")
+        zf.writestr("notes.txt", b"not a resume")
+    return str(path)
+
+
+async def test_ingests_pdfs_and_skips_duplicates(archive):
+    report = await ingest.ingest(ingest.iter_zip(archive), batch_size=3)
+    assert (report["inserted"], report["duplicates"], report["failed"]) == (6, 1, 1)
+    assert report["failures"][0]["name"] == "broken.pdf"
+    doc = await ingest.resumes_col.find_one({"ingest.path": "batch/r2.pdf"})
+    assert doc["filename"] == "r2.pdf" and doc["parsed"]["email"] and doc["text"]
+
+    # A second run finds every file by hash
+    again = await ingest.ingest(ingest.iter_zip(archive))
+    assert (again["inserted"], again["duplicates"], again["failed"]) == (0, 7, 1)
+    assert await ingest.resumes_col.count_documents({}) == 6
+
+
+async def test_checkpoint_resumes_where_the_last_run_stopped(archive, tmp_path):
+    checkpoint = str(tmp_path / "run.jsonl")
+    items = [item.name for item in ingest.iter_source(archive)]
+    first = await ingest.ingest((item for item in ingest.iter_zip(archive) if item.name < "batch/r3"),
+                                checkpoint, batch_size=2)
+    assert first["inserted"] == 3
+    with open(checkpoint, "rb") as f:
+        entries = [orjson.loads(line) for line in f]
+    assert [e["name"] for e in entries] == ["batch/r0.pdf", "batch/r1.pdf", "batch/r2.pdf"]
+    assert all(e["status"] == "inserted" and len(e["sha256"]) == 64 for e in entries)
+
+    rest = await ingest.ingest(ingest.iter_zip(archive), checkpoint, batch_size=2)
+    assert rest["skipped_from_checkpoint"] == 3 and rest["inserted"] == 3 and rest["handled"] == len(items) - 3
+    assert ingest.Checkpoint(checkpoint).counts == {"inserted": 6, "duplicate": 1, "failed": 1}
+
+
+async def test_batches_are_bounded_by_bytes(archive, monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_BATCH_BYTES", len(PDFS[0]) * 2)
+    flushes = []
+
+    async def progress(report):
+        flushes.append(report["handled"])
+
+    await ingest.ingest(ingest.iter_zip(archive), batch_size=100, progress=progress)
+    assert len(flushes) >= 3
+
+
+def test_oversized_member_is_rejected_while_reading(archive, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_PDF_BYTES", 100)
+    items = ingest.iter_zip(archive)  # the archive stays open while the generator does
+    item = next(items)
+    # Trust the bytes read, not the archive's declared size
+    loaded = ingest._load(item._replace(size=10))
+    assert loaded.data is None and "larger than 100 bytes" in loaded.error
+
+
+def test_members_are_hashed_while_read(archive):
+    items = ingest.iter_zip(archive)
+    loaded = ingest._load(next(items))
+    assert loaded.sha256 == hashlib.sha256(PDFS[0]).hexdigest() and loaded.data == PDFS[0]
+
+
+async def test_rejected_rows_leave_no_gridfs_files(archive, monkeypatch):
+    buckets = {"resume_pdfs": FakeBucket(), "resume_texts": FakeBucket()}
+    monkeypatch.setattr(ingest, "gridfs_enabled", lambda: True)
+    monkeypatch.setattr(pipeline, "gridfs_enabled", lambda: True)
+    monkeypatch.setattr(ingest, "get_bucket", buckets.__getitem__)
+    monkeypatch.setattr(storage, "get_bucket", buckets.__getitem__)
+    monkeypatch.setattr(ingest, "store_text", lambda text, filename: buckets["resume_texts"].upload_from_stream(filename, text))
+    monkeypatch.setattr(ingest, "resumes_col", RejectSecond(ingest.resumes_col))
+
+    report = await ingest.ingest((item for item in ingest.iter_zip(archive) if item.name.startswith("batch/")),
+                                 batch_size=3)
+    assert (report["inserted"], report["failed"]) == (4, 2)
+    pdfs, texts = buckets["resume_pdfs"], buckets["resume_texts"]
+    assert pdfs.deleted == pdfs.uploaded[1::3] and texts.deleted == texts.uploaded[1::3]
+    async for doc in ingest.resumes_col.find({}, {"pdf_file_id": 1, "text_file_id": 1}):
+        assert doc["pdf_file_id"] not in pdfs.deleted and doc["text_file_id"] not in texts.deleted
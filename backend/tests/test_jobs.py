@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId, json_util
+
+from app import batch, jobs
+from app import job_handlers  # noqa: F401  (registers the handlers)
+from app.jobs import JobWorkerPool, claim_job, enqueue_job, get_job, job_handler
+
+pytestmark = pytest.mark.anyio
+
+calls = []
+
+
+@job_handler("test_ok")
+async def ok_job(payload):
+    calls.append(payload)
+    return {"echo": payload["n"]}
+
+
+@job_handler("test_fail", max_attempts=2)
+async def failing_job(payload):
+    raise ValueError("boom")
+
+
+@job_handler("test_slow")
+async def slow_job(payload):
+    await asyncio.sleep(60)
+
+
+async def run_next(pool: JobWorkerPool):
+    job = await claim_job(pool.worker_id, pool.visibility_timeout)
+    assert job is not None
+    await pool._run(job)
+    return job["_id"]
+
+
+async def test_claims_oldest_due_job_once():
+    later = await enqueue_job("test_ok", {"n": 2}, delay_seconds=60)
+    first = await enqueue_job("test_ok", {"n": 1})
+    job = await claim_job("w1")
+    assert str(job["_id"]) == first and job["attempts"] == 1 and job["worker_id"] == "w1"
+    # Locked, and the other job is not due yet
+    assert await claim_job("w2") is None
+    assert (await get_job(later))["status"] == jobs.STATUS_QUEUED
+
+
+async def test_expired_lock_is_reclaimed():
+    job_id = await enqueue_job("test_ok", {"n": 1})
+    await claim_job("w1")
+    await jobs.jobs_col.update_one({"_id": ObjectId(job_id)},
+                                   {"$set": {"locked_until": datetime.utcnow() - timedelta(seconds=1)}})
+    job = await claim_job("w2")
+    assert job["worker_id"] == "w2" and job["attempts"] == 2
+
+
+async def test_success_stores_result():
+    pool = JobWorkerPool()
+    job_id = await enqueue_job("test_ok", {"n": 7})
+    await run_next(pool)
+    job = await get_job(job_id)
+    assert job["status"] == jobs.STATUS_DONE and job["result"] == {"echo": 7} and job["locked_until"] is None
+
+
+async def test_failures_retry_with_backoff_then_dead_letter(monkeypatch):
+    monkeypatch.setattr(jobs, "_retry_delay", lambda attempts: 0)
+    pool = JobWorkerPool()
+    job_id = await enqueue_job("test_fail", {})
+    await run_next(pool)
+    job = await get_job(job_id)
+    assert job["status"] == jobs.STATUS_QUEUED and job["errors"] == ["attempt 1: boom"]
+    await run_next(pool)
+    job = await get_job(job_id)
+    assert job["status"] == jobs.STATUS_DEAD and len(job["errors"]) == 2
+    assert await claim_job(pool.worker_id) is None
+    assert pool.stats["retried"] == 1 and pool.stats["dead"] == 1
+
+
+async def test_missing_resume_dead_letters_without_retrying():
+    pool = JobWorkerPool()
+    job_id = await enqueue_job("score", {"resume_id": str(ObjectId()), "job_description": "Python developer"})
+    await run_next(pool)
+    job = await get_job(job_id)
+    assert job["status"] == jobs.STATUS_DEAD and job["attempts"] == 1 and "not found" in job["errors"][0]
+    assert pool.stats["retried"] == 0 and pool.stats["dead"] == 1
+
+
+async def test_crash_on_last_attempt_dead_letters():
+    pool = JobWorkerPool()
+    job_id = await enqueue_job("test_ok", {"n": 99}, max_attempts=1)
+    await jobs.jobs_col.update_one({"_id": ObjectId(job_id)}, {"$set": {
+        "status": jobs.STATUS_RUNNING, "attempts": 1, "locked_until": datetime.utcnow() - timedelta(seconds=1)}})
+    await run_next(pool)
+    job = await get_job(job_id)
+    assert job["status"] == jobs.STATUS_DEAD and job["errors"] == ["visibility timeout expired"]
+    assert {"n": 99} not in calls
+
+
+async def test_cancelled_job_is_released_without_spending_an_attempt():
+    pool = JobWorkerPool()
+    job_id = await enqueue_job("test_slow", {})
+    job = await claim_job(pool.worker_id)
+    task = asyncio.create_task(pool._run(job))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    job = await get_job(job_id)
+    assert job["status"] == jobs.STATUS_QUEUED and job["attempts"] == 0
+
+
+async def test_heartbeat_survives_a_failed_update(monkeypatch, caplog):
+    beats = []
+    real_update = jobs.jobs_col.update_one
+
+    async def flaky_update(*args, **kwargs):
+        beats.append(1)
+        if len(beats) == 1:
+            raise ConnectionError("mongo went away")
+        return await real_update(*args, **kwargs)
+
+    monkeypatch.setattr(jobs, "jobs_col", type("Col", (), {"update_one": staticmethod(flaky_update)})())
+    pool = JobWorkerPool(visibility_timeout=0.03)
+    with caplog.at_level(logging.WARNING, logger="app.jobs"):
+        task = asyncio.create_task(pool._heartbeat(ObjectId()))
+        await asyncio.sleep(0.06)
+        task.cancel()
+    assert len(beats) >= 2
+    assert "Job heartbeat failed" in caplog.text
+
+
+async def test_failed_batch_dead_letters_its_job(monkeypatch):
+    async def broken():
+        raise RuntimeError("corpus statistics unavailable")
+
+    monkeypatch.setattr(batch.corpus_stats, "ensure_fresh", broken)
+    batch_job_id = await batch.create_batch_job("Python developer", {}, 5)
+    job_id = await enqueue_job("batch_score", {
+        "batch_job_id": batch_job_id, "job_description": "Python developer",
+        "query": json_util.dumps({}), "top_k": 5, "ranker": "local",
+    })
+    await run_next(JobWorkerPool())
+    assert (await get_job(job_id))["status"] == jobs.STATUS_DEAD
+    assert (await batch.get_batch_job(batch_job_id))["status"] == "failed"
@@ -0,0 +1,62 @@
+import pytest
+
+from app.llm_decode import (
+    LLMDecodeError, decode_combined, decode_json, decode_object, decode_parsed_resume, decode_score,
+    iter_json_candidates, response_text
+)
+
+
+def answer(text: str) -> dict:
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+SCORE = '{"score": 82, "justification": ["Strong Python"], "matched_skills": ["python"], "missing_skills": []}'
+
+
+@pytest.mark.parametrize("text", [
+    SCORE,
+    f"```json\n{SCORE}\n```",
+    f"Here is the JSON:\n{SCORE}\nLet me know if you need more.",
+])
+def test_decodes_score_around_fences_and_chatter(text):
+    score = decode_score(answer(text))
+    assert score["score"] == 82 and score["matched_skills"] == ["python"] and score["evidence"] == []
+
+
+def test_braces_inside_strings_do_not_end_the_value():
+    text = 'Note {draft} -> {"justification": ["uses } and { in prose", "\\"quoted\\""], "score": 5}'
+    assert list(iter_json_candidates(text)) == ["{draft}", text[text.index('{"'):]]
+    assert decode_object(answer(text))["justification"][0] == "uses } and { in prose"
+
+
+def test_object_after_an_array_is_found():
+    assert decode_json('x [1,2] y {"z":3}') == [1, 2]
+    assert decode_object(answer('x [1,2] y {"z":3}')) == {"z": 3}
+
+
+def test_no_json_or_no_object_raises():
+    with pytest.raises(LLMDecodeError, match="No valid JSON"):
+        decode_object(answer("I cannot score this resume."))
+    with pytest.raises(LLMDecodeError, match="not a JSON object"):
+        decode_object(answer("[1, 2, 3]"))
+
+
+def test_loose_fields_are_coerced_and_wrong_shapes_rejected():
+    score = decode_score(answer('{"score": "78/100", "justification": "One sentence, with a comma."}'))
+    assert score["score"] == 78 and score["justification"] == ["One sentence, with a comma."]
+    parsed = decode_parsed_resume(answer('{"name": " Jane Doe ", "email": "jane at example"}'))
+    assert parsed["name"] == "Jane Doe" and parsed["email"] is None and parsed["skills"] == []
+    with pytest.raises(LLMDecodeError, match="Parsed resume is not a JSON object"):
+        decode_combined(answer(f'{{"parsed": ["Jane"], "score": {SCORE}}}'))
+
+
+def test_combined_needs_both_parts():
+    parsed, score = decode_combined(answer(f'{{"parsed": {{"name": "Jane Doe", "skills": ["Python"]}}, "score": {SCORE}}}'))
+    assert parsed["name"] == "Jane Doe" and score["score"] == 82
+    with pytest.raises(LLMDecodeError, match="needs"):
+        decode_combined(answer(SCORE))
+
+
+def test_response_text_joins_parts_and_tolerates_odd_shapes():
+    assert response_text({"candidates": [{"content": {"parts": [{"text": "a"}, "x", {"text": "b"}]}}]}) == "ab"
+    assert response_text({"candidates": []}) == "" and response_text({}) == ""
@@ -0,0 +1,79 @@
+import pytest
+from bson import ObjectId
+
+from app import batch, job_handlers
+from app.local_scorer import CorpusStats, LocalScorer, corpus_stats, document_features, local_score
+from app.pipeline import keyword_score
+
+pytestmark = pytest.mark.anyio
+
+JD = "Senior Python developer: Django, PostgreSQL, Docker and AWS. Kubernetes is a plus."
+RESUMES = {
+    "backend": ("Backend engineer. Built Django REST services in Python on PostgreSQL, shipped with Docker to AWS.",
+                {"skills": ["Python", "Django"], "experience": [{"title": "Backend Engineer"}]}),
+    "frontend": ("Frontend developer. React, TypeScript and CSS for e-commerce sites.",
+                 {"skills": ["React", "TypeScript"], "experience": [{"title": "Frontend Developer"}]}),
+    "chef": ("Head chef. Menu planning, kitchen staff, food safety.",
+             {"skills": [], "experience": [{"title": "Head Chef"}]}),
+}
+
+
+@pytest.fixture
+def stats():
+    stats = CorpusStats()
+    stats._add(document_features(text, parsed) for text, parsed in RESUMES.values())
+    return stats
+
+
+def test_ranks_by_relevance(stats):
+    scorer = LocalScorer(stats)
+    scores = scorer.score_many(JD, [document_features(*RESUMES[name]) for name in ("chef", "frontend", "backend")])
+    assert scores[2] > scores[1] >= scores[0] == 0
+    assert all(0 <= s < 100 for s in scores)
+
+
+def test_results_name_matched_and_missing_skills(stats):
+    [result] = LocalScorer(stats).results(JD, [document_features(*RESUMES["backend"])])
+    assert {"python", "django", "postgresql", "docker", "aws"} <= set(result["matched_skills"])
+    assert "kubernetes" in result["missing_skills"]
+    assert result["raw_llm_response"] is None
+
+
+def test_rare_terms_weigh_more(stats):
+    idf = stats.idf(["python", "menu", "unseen"])
+    assert idf[2] > idf[0] > 0 and idf[1] == idf[0]
+
+
+def test_text_without_parsed_fields_and_parsed_without_text():
+    assert document_features("", {"skills": ["Python"]}).tf["skill:python"] == 1
+    doc = document_features("Python and Go developer", None)
+    assert doc.tf["python"] == 1 and doc.length == 3  # "and" is a stopword
+
+
+async def test_corpus_stats_persist_and_reload():
+    await corpus_stats.rebuild()
+    await corpus_stats.record([document_features(*RESUMES["backend"]), document_features(*RESUMES["chef"])])
+    reloaded = CorpusStats()
+    await reloaded.load()
+    assert reloaded.docs == 2 and reloaded.df["python"] == 1 and reloaded.df["skill:python"] == 1
+    assert reloaded.avgdl == corpus_stats.avgdl
+
+
+async def test_every_fallback_gives_the_same_local_score():
+    """ranker="local", the pipeline's fallback and Gemini's fallback share one score (Gemini is not configured here)."""
+    text, parsed = RESUMES["backend"]
+    resume_id = ObjectId()
+    await batch.resumes_col.insert_one({"_id": resume_id, "filename": "a.pdf", "parsed": parsed, "text": text})
+    await corpus_stats.rebuild()
+
+    local_job = await batch.create_batch_job(JD, {}, 5)
+    await batch.run_batch_job(local_job, JD, {}, 5, ranker="local")
+    gemini_job = await batch.create_batch_job(JD, {}, 5)
+    await batch.run_batch_job(gemini_job, JD, {}, 5, ranker="gemini")
+    queued = await job_handlers.score_job({"resume_id": str(resume_id), "job_description": JD})
+
+    expected = local_score(JD, parsed=parsed, text=text)["score"]
+    assert (await batch.get_batch_job(local_job))["top"][0]["score"] == expected
+    assert (await batch.get_batch_job(gemini_job))["top"][0]["score"] == expected
+    assert queued["score"] == expected
+    assert keyword_score(text, JD, RuntimeError("down"), parsed)["score"] == expected
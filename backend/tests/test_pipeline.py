@@ -0,0 +1,122 @@
+import random
+import asyncio
+import hashlib
+
+import pytest
+from bson import ObjectId
+
+from app import pipeline, scores, storage
+from app.pdf_utils import PDFExtractionError
+from app.storage import SpooledUpload
+from benchmarks.synthetic import resume_pdf, resume_text
+
+pytestmark = pytest.mark.anyio
+
+JD = "Python backend engineer with Django and PostgreSQL"
+PDF = resume_pdf(resume_text(random.Random(3), 3))
+
+
+class FakeBucket:
+    def __init__(self):
+        self.deleted = []
+
+    async def delete(self, file_id):
+        self.deleted.append(file_id)
+
+
+class FailingReplace:
+    """The resumes collection with a failing upsert."""
+
+    def __init__(self, col):
+        self.col = col
+
+    def __getattr__(self, name):
+        return getattr(self.col, name)
+
+    async def replace_one(self, *args, **kwargs):
+        raise ConnectionError("primary stepped down")
+
+
+@pytest.fixture
+def gridfs(monkeypatch):
+    """GridFS storage with the buckets replaced by recorders (mongomock has no GridFS)."""
+    buckets = {"resume_pdfs": FakeBucket(), "resume_texts": FakeBucket()}
+    texts = []
+
+    async def store_text(text, filename):
+        texts.append(ObjectId())
+        return texts[-1]
+
+    monkeypatch.setattr(pipeline, "gridfs_enabled", lambda: True)
+    monkeypatch.setattr(storage, "get_bucket", buckets.__getitem__)
+    monkeypatch.setattr(pipeline, "store_text", store_text)
+    return buckets, texts
+
+
+def spooled(tmp_path, data: bytes = PDF) -> SpooledUpload:
+    path = tmp_path / "upload.pdf"
+    path.write_bytes(data)
+    return SpooledUpload("resume.pdf", str(path), hashlib.sha256(data).hexdigest(), len(data), ObjectId())
+
+
+async def test_stored_upload_keeps_its_files(tmp_path, gridfs):
+    buckets, texts = gridfs
+    upload = spooled(tmp_path)
+    result = await pipeline.process_upload(upload, JD)
+    doc = await pipeline.resumes_col.find_one({"_id": ObjectId(result["id"])})
+    assert doc["pdf_file_id"] == upload.pdf_file_id and doc["text_file_id"] == texts[0]
+    assert buckets["resume_pdfs"].deleted == [] and buckets["resume_texts"].deleted == []
+
+
+async def test_unreadable_pdf_is_deleted(tmp_path, gridfs):
+    buckets, _ = gridfs
+    upload = spooled(tmp_path, b"not a pdf")
+    with pytest.raises(PDFExtractionError):
+        await pipeline.process_upload(upload, JD)
+    assert buckets["resume_pdfs"].deleted == [upload.pdf_file_id]
+
+
+async def test_failed_store_deletes_pdf_and_text(tmp_path, gridfs, monkeypatch):
+    buckets, texts = gridfs
+    monkeypatch.setattr(pipeline, "resumes_col", FailingReplace(pipeline.resumes_col))
+    upload = spooled(tmp_path)
+    with pytest.raises(ConnectionError):
+        await pipeline.process_upload(upload, JD)
+    assert buckets["resume_pdfs"].deleted == [upload.pdf_file_id]
+    assert buckets["resume_texts"].deleted == texts
+
+
+async def test_parse_failure_deletes_pdf(tmp_path, gridfs, monkeypatch):
+    buckets, _ = gridfs
+
+    async def broken_parse(*args, **kwargs):
+        raise RuntimeError("parser crashed")
+
+    monkeypatch.setattr(pipeline, "parse_resume_text_with_source", broken_parse)
+    upload = spooled(tmp_path)
+    with pytest.raises(RuntimeError):
+        await pipeline.process_upload(upload, JD, combined=False)
+    assert buckets["resume_pdfs"].deleted == [upload.pdf_file_id]
+
+
+async def test_repeat_upload_shares_the_stored_files(tmp_path, gridfs):
+    buckets, texts = gridfs
+    first = await pipeline.process_upload(spooled(tmp_path), JD)
+    stored = await pipeline.resumes_col.find_one({"_id": ObjectId(first["id"])})
+
+    again = spooled(tmp_path)
+    second = await pipeline.process_upload(again, JD)
+    doc = await pipeline.resumes_col.find_one({"_id": ObjectId(second["id"])})
+    assert doc["pdf_file_id"] == stored["pdf_file_id"] and doc["text_file_id"] == stored["text_file_id"]
+    assert buckets["resume_pdfs"].deleted == [again.pdf_file_id] and len(texts) == 1
+
+
+async def test_score_is_recorded_only_for_a_stored_resume(tmp_path, monkeypatch):
+    result = await pipeline.process_upload(spooled(tmp_path), JD)
+    assert await scores.scores_col.count_documents({"resume_id": ObjectId(result["id"])}) == 1
+
+    monkeypatch.setattr(pipeline, "resumes_col", FailingReplace(pipeline.resumes_col))
+    with pytest.raises(ConnectionError):
+        await pipeline.process_upload(spooled(tmp_path), JD)
+    await asyncio.sleep(0.05)  # a still-running score would land here
+    assert await scores.scores_col.count_documents({}) == 1
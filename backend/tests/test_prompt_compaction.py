@@ -0,0 +1,63 @@
+from app.prompt_compaction import (
+    TRUNCATION_MARKER, compact_job_description, compact_resume_text, drop_boilerplate, normalize_whitespace,
+    truncate_by_section
+)
+from app.scheduler import estimate_tokens
+
+WORDS = "designs builds and operates distributed data pipelines on kafka spark and aws ".split()
+
+
+def paragraph(chars: int) -> str:
+    words, size = [], 0
+    while size < chars:
+        word = WORDS[len(words) % len(WORDS)]
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def test_job_description_within_budget_is_only_normalized():
+    text, truncated = compact_job_description("Senior   Python engineer\n\n\n\nFastAPI and MongoDB ", max_tokens=100)
+    assert text == "Senior Python engineer\n\nFastAPI and MongoDB"
+    assert not truncated
+
+
+def test_single_paragraph_job_description_is_cut_inside_the_line():
+    jd = paragraph(7560)
+    text, truncated = compact_job_description(jd, max_tokens=200)
+    assert truncated
+    body, marker = text.rsplit("\n", 1)
+    assert marker == TRUNCATION_MARKER
+    assert len(body) > 600
+    assert estimate_tokens(text) <= 200
+    # Cut at a word boundary
+    assert jd.startswith(body) and jd[len(body)] == " "
+
+
+def test_single_line_section_over_budget_keeps_its_start():
+    experience = "Experience\n" + paragraph(23000)
+    text, affected = truncate_by_section("Jane Doe\njane@example.com\n" + experience, max_tokens=500)
+    assert affected == ["experience"]
+    assert text.startswith("Jane Doe\njane@example.com\nExperience\ndesigns builds")
+    assert text.endswith("\n" + TRUNCATION_MARKER)
+    assert estimate_tokens(text) <= 500
+
+
+def test_over_budget_resume_keeps_skills_over_interests():
+    resume = "\n".join([
+        "Jane Doe", "Skills", "Python, FastAPI, MongoDB",
+        "Interests", paragraph(3000),
+        "Experience", paragraph(3000),
+    ])
+    text, info = compact_resume_text(resume, max_tokens=500)
+    assert "Python, FastAPI, MongoDB" in text
+    assert "Interests" not in text
+    assert set(info["truncated_sections"]) == {"experience", "interests"}
+
+
+def test_boilerplate_and_page_numbers_are_dropped():
+    page = "ACME Resume\nline one\nPage 1 of 3"
+    text = drop_boilerplate(normalize_whitespace("\n".join([page, page.replace("one", "two"), page.replace("one", "three")])))
+    assert text.count("ACME Resume") == 1
+    assert "Page" not in text
+    assert "line three" in text
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from bson import ObjectId
+
+from app import scores
+from app.db import get_collection
+
+pytestmark = pytest.mark.anyio
+
+JD = "Data engineer: Spark, Airflow, Python"
+
+
+async def insert_scores(resume_id: ObjectId, values, start: datetime = datetime(2026, 1, 1, 9, 30, 0, 456789)):
+    docs = []
+    for n, value in enumerate(values):
+        doc, _ = scores.build_score_docs(str(resume_id), JD, {"score": value, "justification": []})
+        # Several scores per millisecond (MongoDB keeps milliseconds), so the _id tie-break is exercised
+        doc["created_at"] = start + timedelta(milliseconds=n // 3)
+        docs.append(doc)
+    await scores.scores_col.insert_many(docs)
+    return docs
+
+
+async def all_pages(fetch, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        page = await fetch(limit=limit, cursor=cursor)
+        items += page["items"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+async def test_leaderboard_pages_through_tied_scores_once():
+    docs = await insert_scores(ObjectId(), [70, 85, 85, 85, 60, 85, 92, 70, 85, 60, 100, 0, 85])
+    job_hash = scores.jd_hash(JD)
+    items, pages = await all_pages(lambda **kw: scores.leaderboard(job_hash, **kw), limit=4)
+    assert pages == 4
+    assert sorted(item["id"] for item in items) == sorted(str(d["_id"]) for d in docs)
+    keys = [(item["score"], item["id"]) for item in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+async def test_history_is_newest_first_and_filters_by_jd():
+    resume_id = ObjectId()
+    docs = await insert_scores(resume_id, range(10))
+    other, _ = scores.build_score_docs(str(resume_id), "Another JD", {"score": 50, "justification": []})
+    await scores.scores_col.insert_one(other)
+
+    items, _ = await all_pages(lambda **kw: scores.score_history(str(resume_id), scores.jd_hash(JD), **kw), limit=3)
+    assert [item["id"] for item in items] == [str(d["_id"]) for d in reversed(docs)]
+    assert len((await scores.score_history(str(resume_id), limit=20))["items"]) == 11
+    assert await scores.latest_scores(str(resume_id), 2) == (await scores.score_history(str(resume_id), limit=2))["items"]
+
+
+async def test_last_full_page_has_no_next_cursor():
+    await insert_scores(ObjectId(), [10, 20, 30, 40])
+    page = await scores.leaderboard(scores.jd_hash(JD), limit=4)
+    assert len(page["items"]) == 4 and page["next_cursor"] is None
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "12:not-an-oid", "abc:" + str(ObjectId())])
+async def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await scores.leaderboard(scores.jd_hash(JD), cursor=cursor)
+
+
+async def test_api_returns_400_for_an_invalid_cursor():
+    from app.main import app
+    async with httpx.AsyncClient(app=app, base_url="http://api.test") as client:
+        response = await client.get(f"/leaderboard/{scores.jd_hash(JD)}", params={"cursor": "garbage"})
+        assert response.status_code == 400
+        resume_id = (await get_collection("resumes").insert_one({"filename": "cv.pdf"})).inserted_id
+        response = await client.get(f"/resume/{resume_id}/scores", params={"limit": 5})
+        assert response.status_code == 200 and response.json() == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.parametrize("method, path", [
+    ("GET", "/resume/{}"), ("GET", "/resume/{}/scores"), ("POST", "/score/{}?job_description=x"),
+    ("GET", "/scores/{}/raw"), ("GET", "/jobs/{}"), ("GET", "/batch-score/{}"), ("GET", "/ingest/{}"),
+])
+async def test_api_rejects_malformed_ids_and_reports_unknown_ones(method, path):
+    from app.main import app
+    async with httpx.AsyncClient(app=app, base_url="http://api.test") as client:
+        assert (await client.request(method, path.format("not-an-id"))).status_code == 400
+        assert (await client.request(method, path.format(ObjectId()))).status_code == 404
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from app import skill_index
+from app.skills import skill_matcher, vocabulary
+from app.workers import _extract_and_parse
+from benchmarks.synthetic import resume_pdf, resume_text
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_learned_alias_is_extracted_from_new_text():
+    assert "kubernetes" not in skill_matcher.extract("Deployed services on k8s and EKS")
+    await skill_index.learn_alias("K8s", "Kubernetes")
+    assert vocabulary.canonical("k8s") == "kubernetes"
+    assert "kubernetes" in skill_matcher.extract("Deployed services on k8s and EKS")
+    assert await skill_index.aliases_col.find_one({"_id": "k8s"}) == {"_id": "k8s", "canonical": "kubernetes"}
+
+
+async def test_aliases_are_loaded_at_startup():
+    await skill_index.aliases_col.insert_one({"_id": "rust lang", "canonical": "rust"})
+    assert await skill_index.load_learned_aliases() == 1
+    assert skill_matcher.extract("Five years of Rust-lang and Python") == ["python", "rust"]
+
+
+def test_worker_jobs_apply_learned_aliases():
+    pdf = resume_pdf(resume_text(random.Random(1), 0) + "\nTooling: terraform-cloud")
+    text, parsed = _extract_and_parse(pdf, True, {"terraform-cloud": "terraform"})
+    assert "terraform" in parsed["skills"]
+
+
+async def test_search_by_skills_ranks_by_overlap():
+    await skill_index.resumes_col.insert_many([
+        {"filename": "a.pdf", "skill_ids": ["python"], "parsed": {"name": "A"}},
+        {"filename": "b.pdf", "skill_ids": ["docker", "node.js", "python"], "parsed": {"name": "B"}},
+        {"filename": "c.pdf", "skill_ids": ["java"], "parsed": {"name": "C"}},
+    ])
+    result = await skill_index.search_by_skills(["Python", "node"])
+    assert result["skill_ids"] == ["node.js", "python"]
+    assert [(r["name"], r["overlap"]) for r in result["results"]] == [("B", 2), ("A", 1)]
+    result = await skill_index.search_by_skills(["python", "nodejs"], min_overlap=2)
+    assert [r["name"] for r in result["results"]] == ["B"]
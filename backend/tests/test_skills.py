@@ -0,0 +1,43 @@
+import pytest
+
+from app.skills import SkillMatcher, SkillVocabulary, skill_matcher, vocabulary
+
+
+def test_aliases_resolve_to_canonical_ids():
+    assert vocabulary.canonical_ids(["Node", "nodejs", "JS", "golang", "Go", "ML", None, ""]) == [
+        "go", "javascript", "machine learning", "node.js"
+    ]
+    assert vocabulary.canonical("Scikit Learn") == "scikit-learn"
+    assert vocabulary.canonical("erlang") == "erlang"
+
+
+def test_multi_word_and_misspelled_skills_are_found():
+    skills = skill_matcher.extract("Worked on natural language processing with pytorh and Amazon Web Services")
+    assert skills == ["nlp", "aws", "pytorch"]
+
+
+def test_ambiguous_words_in_prose_are_not_skills():
+    assert skill_matcher.extract("I go to the gym and like to react quickly; 5 ml of water; tf") == []
+    assert skill_matcher.extract("React to incidents. Go the extra mile.") == []
+
+
+@pytest.mark.parametrize("text, skill", [
+    ("Python, Go, Docker", "go"),
+    ("Skills: Node", "node.js"),
+    ("Technical Skills\nKafka\nGo", "go"),
+    ("Built the UI with React and Redux", "react"),
+    ("Strong JS fundamentals", "javascript"),
+    ("node.js, reactjs", "react"),
+])
+def test_ambiguous_skills_in_context_are_found(text, skill):
+    assert skill in skill_matcher.extract(text)
+
+
+def test_skills_section_ends_at_the_next_heading():
+    text = "Skills\nPython\nKafka\nExperience\nGo-live planning; go"
+    assert skill_matcher.extract(text) == ["python"]
+
+
+def test_ambiguous_set_is_configurable():
+    matcher = SkillMatcher(SkillVocabulary(["go"]), ambiguous=[])
+    assert matcher.extract("we go live") == ["go"]
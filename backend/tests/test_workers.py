@@ -0,0 +1,45 @@
+import random
+import threading
+
+import pytest
+
+from app import workers
+from benchmarks.synthetic import resume_pdf, resume_text
+
+pytestmark = pytest.mark.anyio
+
+SHORT = resume_pdf(resume_text(random.Random(1), 1, pages=1))
+LONG = resume_pdf(resume_text(random.Random(2), 2, pages=8))
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Threads that counted pages and the page ranges handed to chunk jobs."""
+    counted, ranges = [], []
+    page_count, extract_pages = workers.pdf_page_count, workers._extract_pages
+
+    def counting(source):
+        counted.append(threading.current_thread())
+        return page_count(source)
+
+    def extracting(source, start, stop):
+        ranges.append((start, stop))
+        return extract_pages(source, start, stop)
+
+    monkeypatch.setattr(workers, "pdf_page_count", counting)
+    monkeypatch.setattr(workers, "_extract_pages", extracting)
+    return counted, ranges
+
+
+@pytest.mark.parametrize("pdf", [SHORT, LONG])
+async def test_pages_are_counted_in_the_worker_pool(pdf, calls):
+    counted, ranges = calls
+    result, name_task = await workers.extract_pdf(pdf)
+    if name_task is not None:
+        await name_task
+    assert counted and threading.main_thread() not in counted
+    assert [page.number for page in result.pages] == list(range(result.total_pages))
+    if result.total_pages < workers.PDF_PARALLEL_MIN_PAGES:
+        assert ranges == []  # the counting job extracted the pages too
+    else:
+        assert len(ranges) > 1 and ranges[0] == (0, workers.PDF_PAGES_PER_CHUNK)
@@ -2,64 +2,130 @@ import streamlit as st
 import requests
 import json
 BACKEND_URL = "http://127.0.0.1:8000"
+# (connect, read) timeouts in seconds
+UPLOAD_TIMEOUT = (5, 180)
+EVENTS_TIMEOUT = (5, 60)  # read timeout per SSE line; the backend sends keepalives every 15s
 
 st.set_page_config(page_title="Smart Resume Screener", layout="wide")
 
+
+def render_parsed(parsed):
+    st.subheader("📊 Parsed Resume Data")
+    if parsed:
+        st.json(parsed)
+    else:
+        st.warning("Parsed data not available — check backend response.")
+
+
+def render_score(score_data):
+    st.subheader("🎯 Screening Score")
+
+    if "score" in score_data:
+        st.write(f"**Score:** {score_data['score']} / 100")
+    else:
+        st.warning("Score not available — check backend scoring logic.")
+
+    if score_data.get("justification"):
+        st.write("**Justification:**")
+        for j in score_data["justification"]:
+            st.write(f"- {j}")
+    if score_data.get("matched_skills"):
+        st.write("**✅ Matched Skills:**", ", ".join(score_data["matched_skills"]))
+
+    if score_data.get("missing_skills"):
+        st.write("**⚠️ Missing Skills:**", ", ".join(score_data["missing_skills"]))
+
+
+def iter_sse(response):
+    """Yield (event, data) pairs from a text/event-stream response."""
+    event, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if event:
+                yield event, json.loads("\n".join(data)) if data else {}
+            event, data = None, []
+        elif line.startswith(":"):
+            continue  # keepalive
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+def analyze_blocking(files, data):
+    with st.spinner("Analyzing your resume... Please wait ⏳"):
+        response = requests.post(f"{BACKEND_URL}/upload-resume", files=files, data=data, timeout=UPLOAD_TIMEOUT)
+
+    if response.status_code == 200:
+        result = response.json()
+        st.success("✅ Resume analyzed successfully!")
+        render_parsed(result.get("parsed", {}))
+        render_score(result.get("score_result", {}))
+    else:
+        st.error(f"❌ Backend error: {response.text}")
+
+
+def analyze_streaming(files, data):
+    response = requests.post(
+        f"{BACKEND_URL}/upload-resume", files=files, data={**data, "mode": "async"}, timeout=UPLOAD_TIMEOUT
+    )
+    if response.status_code != 202:
+        st.error(f"❌ Backend error: {response.text}")
+        return
+    events_url = BACKEND_URL + response.json()["events_url"]
+
+    status = st.empty()
+    parsed_area = st.container()
+    score_area = st.container()
+    stage_labels = {
+        "received": "📥 Upload received, extracting text...",
+        "extracted": "🧾 Text extracted, parsing resume...",
+        "parsed": "🧠 Resume parsed, saving...",
+        "stored": "💾 Saved, scoring against the job description...",
+    }
+
+    with requests.get(events_url, stream=True, timeout=EVENTS_TIMEOUT) as stream:
+        for event, payload in iter_sse(stream):
+            if event in stage_labels:
+                status.info(stage_labels[event])
+            if event == "parsed":
+                with parsed_area:
+                    render_parsed(payload.get("parsed", {}))
+            elif event == "scored":
+                with score_area:
+                    render_score(payload.get("score_result", {}))
+            elif event == "done":
+                status.success("✅ Resume analyzed successfully!")
+                break
+            elif event == "error":
+                status.error(f"❌ Backend error ({payload.get('status_code')}): {payload.get('detail')}")
+                break
+
+
 st.title("📄 Smart Resume Screener")
 st.markdown("### Upload your resume and get an instant AI-based screening score!")
 uploaded_file = st.file_uploader("Upload your resume (PDF only)", type=["pdf"])
 
 job_description = st.text_area("Paste the Job Description here")
+stream_progress = st.checkbox("Show results as they arrive", value=True)
 
 if uploaded_file and job_description:
     if st.button("Analyze Resume"):
-        with st.spinner("Analyzing your resume... Please wait ⏳"):
-            # Send file and job description to backend
-            files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
-            data = {"job_description": job_description}
-
-            try:
-                response = requests.post(
-                    f"{BACKEND_URL}/upload-resume",
-                    files=files,
-                    data=data,
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-
-                    st.success("✅ Resume analyzed successfully!")
-
-                    parsed = result.get("parsed", {})
-                    st.subheader("📊 Parsed Resume Data")
-                    if parsed:
-                        st.json(parsed)
-                    else:
-                        st.warning("Parsed data not available — check backend response.")
-
-                    score_data = result.get("score_result", {})
-                    st.subheader("🎯 Screening Score")
-
-                    if "score" in score_data:
-                        st.write(f"**Score:** {score_data['score']} / 100")
-                    else:
-                        st.warning("Score not available — check backend scoring logic.")
-
-                    if score_data.get("justification"):
-                        st.write("**Justification:**")
-                        for j in score_data["justification"]:
-                            st.write(f"- {j}")
-                    if score_data.get("matched_skills"):
-                        st.write("**✅ Matched Skills:**", ", ".join(score_data["matched_skills"]))
-
-                    if score_data.get("missing_skills"):
-                        st.write("**⚠️ Missing Skills:**", ", ".join(score_data["missing_skills"]))
-
-                else:
-                    st.error(f"❌ Backend error: {response.text}")
-
-            except Exception as e:
-                st.error(f"Error: {e}")
+        # Send file and job description to backend
+        files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
+        data = {"job_description": job_description}
+
+        try:
+            if stream_progress:
+                analyze_streaming(files, data)
+            else:
+                analyze_blocking(files, data)
+        except requests.Timeout:
+            st.error("⏱️ The backend took too long to respond. Try again in a moment.")
+        except Exception as e:
+            st.error(f"Error: {e}")
 
 else:
     st.info("Please upload a resume and enter a job description to begin.")